@@ -1,11 +1,17 @@
 import asyncio
+import collections
 import json
 import os
+import time
 from typing import List, Optional
 
-from litellm import acompletion
 from pydantic import BaseModel, Field
 
+from src.budget import BudgetController
+from src.fast_decomposer import FastDecomposer
+from src.incremental_json import loads_lenient
+from src.llm_client import get_llm_client
+
 # Define Pydantic models for structured output
 class AtomicFact(BaseModel):
     fact: str = Field(..., description="A single, atomic, verifiable fact extracted from the text.")
@@ -13,18 +19,39 @@ class AtomicFact(BaseModel):
 class ExtractionResponse(BaseModel):
     facts: List[AtomicFact] = Field(..., description="List of extracted atomic facts.")
 
+
+def fact_of(item) -> Optional[str]:
+    """Text of one entry of a (possibly repaired) 'facts' list; None for empty or cut-off entries."""
+    fact = item.get("fact") if isinstance(item, dict) else item
+    return fact.strip() if isinstance(fact, str) and fact.strip() else None
+
+
+def parse_facts(payload) -> List[str]:
+    """Facts of a {"facts": [...]} payload; entries a repair left empty are dropped."""
+    items = payload.get("facts") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        raise ValueError("Response has no 'facts' list")
+    facts = [{"fact": fact} for fact in map(fact_of, items) if fact]
+    return [item.fact for item in ExtractionResponse.model_validate({"facts": facts}).facts]
+
 class BackstoryAnalyzer:
     """
     Analyzes and decomposes complex backstories into atomic facts/claims.
     """
 
-    def __init__(self, llm_config: dict = None):
+    def __init__(self, llm_config: dict = None, fast_decomposer: Optional[FastDecomposer] = None):
         """
         Initialize the analyzer with LLM configuration.
 
         Args:
             llm_config (dict): Configuration for the LLM. 
                                Defaults to using 'gemini-1.5-pro' compatible settings.
+                               'fast_path_threshold' sets the complexity up to which backstories
+                               are decomposed locally (0 sends everything to the LLM).
+                               'pacing_s' is the pause before each LLM call (free-tier rate
+                               limits; default 15).
+            fast_decomposer (FastDecomposer): Rule-based decomposer for simple backstories;
+                                              built from 'fast_path_threshold' when omitted.
         """
         self.llm_config = llm_config or {}
         self.model_name = self.llm_config.get("model", "gemini/gemini-flash-latest")
@@ -33,15 +60,27 @@ class BackstoryAnalyzer:
         if not self.api_key:
              # Fallback check for Gemini/OpenAI/XAI for convenience
              self.api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        # Shared with NarrativeAuditor when both use the same model/key
+        self.client = get_llm_client({**self.llm_config, "model": self.model_name, "api_key": self.api_key})
+        self.fast_decomposer = fast_decomposer or FastDecomposer(self.llm_config.get("fast_path_threshold", 2.0))
+        self.pacing_s = self.llm_config.get("pacing_s", 15)
+        # Per-path ('fast' / 'llm') backstory counts and total seconds
+        self.path_counts = collections.Counter()
+        self.path_seconds = collections.Counter()
 
     async def extract_atomic_claims(self, backstory: str) -> List[str]:
         """
         Decomposes a backstory into atomic, verifiable facts.
         
         Process:
+        0. Fast path: simple backstories (see `FastDecomposer`) are split locally, skipping 1-2.
+           With a `BudgetController` on the client, step 2 is skipped once the budget runs low
+           and every backstory takes the fast path once it is exhausted.
         1. Extraction: LLM breaks text into facts (preserving entities/dates).
         2. Self-Correction: LLM reviews facts against original text.
 
+        Slightly malformed JSON from either step is repaired locally (see `repair_json`).
+
         Args:
             backstory (str): The narrative text to analyze.
 
@@ -51,20 +90,44 @@ class BackstoryAnalyzer:
         if not backstory or not backstory.strip():
             return []
 
-        # Step 1: Extraction
-        raw_claims = await self._decompose_text(backstory)
-        
-        # Step 2: Self-Correction/Validation
-        validated_claims = await self._validate_claims(backstory, raw_claims)
-        
+        start = time.perf_counter()
+        # Run-level budget (shared client): skip validation when low, no LLM once exhausted
+        budget = self.client.budget
+        mode = budget.mode() if budget is not None else "full"
+
+        if self.fast_decomposer.accepts(backstory) or mode == "exhausted":
+            path = "fast"
+            validated_claims = self.fast_decomposer.decompose(backstory)
+        else:
+            path = "llm"
+            # Step 1: Extraction
+            raw_claims = await self._decompose_text(backstory)
+
+            # Step 2: Self-Correction/Validation
+            if BudgetController.at_least(mode, "skip_validation"):
+                validated_claims = raw_claims
+            else:
+                validated_claims = await self._validate_claims(backstory, raw_claims)
+
+        self.path_counts[path] += 1
+        self.path_seconds[path] += time.perf_counter() - start
         return validated_claims
 
+    def path_report(self) -> str:
+        """One-line summary of how many backstories took each path and their mean time."""
+        parts = []
+        for path in ("fast", "llm"):
+            count = self.path_counts[path]
+            mean = self.path_seconds[path] / count if count else 0.0
+            parts.append(f"{path}: {count} ({mean:.3f}s avg)")
+        return "Decomposition paths - " + ", ".join(parts)
+
     async def decompose_backstory(self, text: str) -> list[str]:
         """
         Decomposes a backstory into atomic claims.
         """
         # Rate Limiting for Free Tier
-        await asyncio.sleep(15)
+        await asyncio.sleep(self.pacing_s)
 
         prompt = f"""
         Decompose the following backstory into a list of atomic, verifiable claims.
@@ -81,29 +144,16 @@ class BackstoryAnalyzer:
         5. Output strictly valid JSON matching the schema: {{ "facts": [ {{ "fact": "..." }}, ... ] }}
         """
         try:
-            response = await acompletion(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                api_key=self.api_key
-            )
-            
-            content = response.choices[0].message.content
-            parsed = ExtractionResponse.model_validate_json(content)
-            return [item.fact for item in parsed.facts]
+            return await self._request_facts(prompt, flow=text)
         except Exception as e:
             print(f"Decomposition error: {e}")
             return [text]
 
-    async def _decompose_text(self, text: str) -> List[str]:
+    def build_decomposition_prompt(self, text: str) -> str:
         """
-        Internal method to perform the initial decomposition.
+        Builds the Stage 1 (extraction) prompt for a backstory.
         """
-        # Rate Limit
-        import asyncio
-        await asyncio.sleep(15)
-
-        prompt = f"""
+        return f"""
         You are an expert Forensic Narrative Analyst.
         Target: Break the following text into a list of ATOMIC, VERIFIABLE facts.
         
@@ -117,31 +167,12 @@ class BackstoryAnalyzer:
         Text:
         "{text}"
         """
-        
-        try:
-            response = await acompletion(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                api_key=self.api_key
-            )
-            
-            content = response.choices[0].message.content
-            parsed = ExtractionResponse.model_validate_json(content)
-            return [item.fact for item in parsed.facts]
-        except Exception as e:
-            print(f"Extraction error: {e}")
-            # Fallback for demo purposes or robustness
-            return [text]
 
-    async def _validate_claims(self, original_text: str, claims: List[str]) -> List[str]:
+    def build_validation_prompt(self, original_text: str, claims: List[str]) -> str:
         """
-        Internal method to validate/correct the extracted claims.
+        Builds the Stage 2 (self-correction) prompt for extracted claims.
         """
-        if not claims:
-            return []
-
-        prompt = f"""
+        return f"""
         Review the following list of extracted claims against the original text.
         
         Original Text:
@@ -157,17 +188,46 @@ class BackstoryAnalyzer:
         4. Output strictly valid JSON: {{ "facts": [ {{ "fact": "..." }}, ... ] }}
         """
 
+    async def _request_facts(self, prompt: str, flow: str) -> List[str]:
+        """
+        Ask for a {"facts": [...]} payload and return the facts. Malformed JSON is
+        repaired locally.
+        """
+        response = await self.client.complete(prompt, response_format={"type": "json_object"}, flow=flow)
+        payload, repaired = loads_lenient(response.choices[0].message.content)
+        facts = parse_facts(payload)
+        if repaired:
+            self.client.stats["json_repaired"] += 1
+        return facts
+
+    async def _decompose_text(self, text: str) -> List[str]:
+        """
+        Internal method to perform the initial decomposition.
+        """
+        # Rate Limit
+        import asyncio
+        await asyncio.sleep(self.pacing_s)
+
+        prompt = self.build_decomposition_prompt(text)
+        
+        try:
+            return await self._request_facts(prompt, flow=text)
+        except Exception as e:
+            print(f"Extraction error: {e}")
+            # Fallback for demo purposes or robustness
+            return [text]
+
+    async def _validate_claims(self, original_text: str, claims: List[str]) -> List[str]:
+        """
+        Internal method to validate/correct the extracted claims.
+        """
+        if not claims:
+            return []
+
+        prompt = self.build_validation_prompt(original_text, claims)
+
         try:
-            response = await acompletion(
-                model=self.model_name,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"},
-                api_key=self.api_key
-            )
-            
-            content = response.choices[0].message.content
-            parsed = ExtractionResponse.model_validate_json(content)
-            return [item.fact for item in parsed.facts]
+            return await self._request_facts(prompt, flow=original_text)
         except Exception as e:
             print(f"Validation error: {e}")
             return claims
@@ -3,24 +3,303 @@ Module: auditor.py
 Description: The reasoning agent that validates claims against the index.
 """
 
+import asyncio
+import random
+import re
+import time
+
 import pandas as pd
 import pathway as pw
 
+from src.batcher import MicroBatcher
+from src.budget import BudgetController
+from src.chunk_store import ChunkStore, attach_text, drop_text, get_chunk_store
+from src.incremental_json import IncrementalJSONParser, loads_lenient
+from src.pathway_internals import append_only
+from src.llm_client import LLMError, LLMErrorKind, get_llm_client, output_tokens
+from src.reranker import LocalReranker, as_chunk_list, content_words
+from src.work_queue import WorkQueue
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+# Fields a single verdict needs (the expansion check reads the last two); with early
+# stopping, the stream is closed once they are in and the reason is not generated
+VERDICT_FIELDS = ("consistent", "confidence", "insufficient_evidence")
+EARLY_STOP_REASON = "Verdict taken before the reason was generated (early stop)"
+
+
+def _format_context(chunks: list, chunk_store: ChunkStore = None) -> str:
+    """Render selected chunks as numbered passages for the verification prompt."""
+    chunk_store = chunk_store or get_chunk_store()
+    passages = []
+    for i, chunk in enumerate(as_chunk_list(chunks), 1):
+        title = chunk["metadata"].get("chapter_title")
+        header = f"[{i}] {title}" if title else f"[{i}]"
+        passages.append(f"{header}\n{chunk_store.text_of(chunk)}")
+    return "\n\n".join(passages)
+
+
+def build_verification_prompt(claim: str, context, chunk_store: ChunkStore = None) -> str:
+    """
+    Prompt asking the LLM whether a claim is consistent with the selected passages.
+    Chunks that carry only a span reference are read from `chunk_store` here.
+    """
+    return (
+        f"Claim: {claim}\nContext:\n{_format_context(context, chunk_store)}\n"
+        "Is this claim consistent with the context? Return JSON "
+        "{'consistent': bool, 'confidence': float between 0 and 1, "
+        "'insufficient_evidence': bool (true if the passages do not settle the claim), 'reason': str}"
+    )
+
+
+def build_prefetch_query(backstory: str, char: str = "", book_name: str = "") -> str:
+    """Retrieval query for a whole backstory, prefixed with its character and book when known."""
+    prefix = " ".join(part for part in (char, f"({book_name})" if book_name else "") if part)
+    return f"{prefix}: {backstory}" if prefix else backstory
+
+
+def pack_context(claim: str, chunks: list, chunk_store: ChunkStore = None, max_chars: int = 600) -> list:
+    """
+    Cut each chunk down to its sentences most relevant to the claim.
+
+    Sentences are ranked by shared content words with the claim and kept, in text order,
+    until `max_chars` is reached. Packed chunks carry the excerpt as 'text' and 'packed': True.
+    """
+    chunk_store = chunk_store or get_chunk_store()
+    claim_words = content_words(claim)
+    packed = []
+    for chunk in as_chunk_list(chunks):
+        sentences = [s for s in SENTENCE_BREAK.split(chunk_store.text_of(chunk)) if s.strip()]
+        ranked = sorted(range(len(sentences)), key=lambda i: -len(claim_words & content_words(sentences[i])))
+        keep, size = set(), 0
+        for i in ranked:
+            if keep and size + len(sentences[i]) > max_chars:
+                break
+            keep.add(i)
+            size += len(sentences[i]) + 1
+        packed.append({**chunk, "text": " ".join(sentences[i] for i in sorted(keep)), "packed": True})
+    return packed
+
+
+def build_batch_verification_prompt(items: list, chunk_store: ChunkStore = None) -> str:
+    """Prompt verifying several (claim, context, ...) items in one call."""
+    sections = [
+        f"### Claim {i}: {claim}\nContext:\n{_format_context(context, chunk_store)}"
+        for i, (claim, context, *_) in enumerate(items)
+    ]
+    return (
+        "\n\n".join(sections)
+        + "\n\nFor each claim, is it consistent with its own context? Return JSON "
+        "{'verdicts': [{'id': int (claim number), 'consistent': bool, 'reason': str}, ...]}"
+    )
+
+
+def parse_batch_verdicts(payload: dict, count: int) -> list:
+    """Split a batch response into one verdict per claim; claims without an answer get an error verdict."""
+    verdicts = payload.get("verdicts") if isinstance(payload, dict) else None
+    if not isinstance(verdicts, list):
+        reason = payload.get("reason", "Malformed batch response") if isinstance(payload, dict) else "Malformed batch response"
+        return [{"consistent": False, "reason": reason} for _ in range(count)]
+    by_id = {}
+    for verdict in verdicts:
+        if isinstance(verdict, dict) and isinstance(verdict.get("id"), int):
+            by_id[verdict["id"]] = verdict
+    return [
+        {"consistent": bool(by_id[i].get("consistent")), "reason": by_id[i].get("reason", "")}
+        if i in by_id else {"consistent": False, "reason": "Missing from batch response"}
+        for i in range(count)
+    ]
+
+
+def needs_more_evidence(verdict: dict, threshold: float) -> bool:
+    """True when the verifier flagged missing evidence or answered below the confidence threshold."""
+    if verdict.get("insufficient_evidence") is True:
+        return True
+    try:
+        return float(verdict["confidence"]) < threshold
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+async def verify_with_expansion(
+    claim: str,
+    context,
+    ask,
+    chunk_store: ChunkStore = None,
+    threshold: float = 0.6,
+    radius: int = 1,
+    expand: bool = True,
+) -> dict:
+    """
+    Verify a claim, widening the context only when the first answer is uncertain.
+
+    Args:
+        claim (str): The atomic claim.
+        context: Selected chunks (see `as_chunk_list`).
+        ask: Async callable taking a prompt and returning the verdict dict.
+        chunk_store (ChunkStore): Source of the neighboring chunks.
+        threshold (float): Confidence below which the claim is re-checked.
+        radius (int): Neighbors fetched on each side of every selected chunk.
+        expand (bool): Allow the second, widened call (off in the cheaper budget modes).
+
+    Returns:
+        dict: The final verdict, plus 'context' (chunks the verdict is based on) and 'expanded'.
+    """
+    chunk_store = chunk_store or get_chunk_store()
+    chunks = as_chunk_list(context)
+    verdict = await ask(build_verification_prompt(claim, chunks, chunk_store))
+    if not expand or not needs_more_evidence(verdict, threshold):
+        return {**verdict, "context": drop_text(chunks), "expanded": False}
+
+    expanded = chunk_store.expand(chunks, radius)
+    if len(expanded) == len(chunks):
+        # Nothing to add (no spans, or neighbors already selected)
+        return {**verdict, "context": drop_text(chunks), "expanded": False}
+    print(f"Expanding context for '{claim[:30]}...' from {len(chunks)} to {len(expanded)} chunks")
+    verdict = await ask(build_verification_prompt(claim, expanded, chunk_store))
+    return {**verdict, "context": drop_text(expanded), "expanded": True}
+
+
+async def ask_verifier(client, prompt: str, claim: str, flow: str, pacing_s: float, max_retries: int = 10,
+                       stream: bool = False, early_stop: bool = False, claims: int = 1) -> dict:
+    """
+    Send a verification prompt and parse the JSON verdict, pacing every attempt and
+    backing off on rate limits. Slightly malformed JSON is repaired locally (see
+    `repair_json`); other errors end up as a `consistent: False` verdict with the error as
+    reason. The time until the verdict is returned and the output tokens per claim are
+    recorded on the client (`LLMClient.verdict_report`).
+
+    Args:
+        client (LLMClient): Shared LLM client (its budget stops the retries once exhausted).
+        prompt (str): Single or batch verification prompt.
+        claim (str): Label for log lines.
+        flow (str): Scheduling flow (backstory) of the call.
+        pacing_s (float): Pause before each attempt (free-tier rate limits).
+        max_retries (int): Attempts before giving up.
+        stream (bool): Stream the completion and parse it as it arrives. The verdict is
+                       still returned once the stream ends.
+        early_stop (bool): With `stream`, stop generating once `VERDICT_FIELDS` are in and
+                           return the verdict right away (without a reason).
+        claims (int): Claims verified by the prompt (for tokens per claim).
+    """
+    delay = pacing_s  # Start with the free-tier pacing (20s by default)
+
+    for attempt in range(max_retries):
+        if attempt and client.budget is not None and client.budget.mode() == "exhausted":
+            return {"consistent": False, "reason": "LLM budget exhausted during retries"}
+        try:
+            # Random jitter to prevent thundering herd
+            sleep_time = delay + random.uniform(0, pacing_s / 2)
+            await asyncio.sleep(sleep_time)
+
+            sent = time.perf_counter()
+            if stream:
+                parser = IncrementalJSONParser()
+
+                def on_text(delta: str) -> bool:
+                    parser.feed(delta)
+                    return early_stop and parser.has(*VERDICT_FIELDS)
+
+                resp = await client.stream(prompt, on_text, response_format={"type": "json_object"},
+                                           caching=False, flow=flow)
+                verdict = parser.result()
+                if resp.stopped_early:
+                    verdict.setdefault("reason", EARLY_STOP_REASON)
+                repaired = parser.repaired and not resp.stopped_early
+            else:
+                resp = await client.complete(
+                    prompt,
+                    response_format={"type": "json_object"},
+                    caching=False,
+                    flow=flow
+                )
+                verdict, repaired = loads_lenient(resp.choices[0].message.content)
+            if repaired:
+                client.stats["json_repaired"] += 1
+            client.record_verdicts(time.perf_counter() - sent, output_tokens(resp), claims)
+            return verdict
+        except LLMError as e:
+            if e.kind == LLMErrorKind.RATE_LIMIT:
+                print(f"RATE LIMIT (Attempt {attempt+1}/{max_retries}) for '{claim[:10]}...'. Sleeping {delay}s...")
+                delay = min(max(delay * 2, 5), 120) # Exponential backoff cap at 120s
+            elif e.retryable:
+                print(f"{e.kind.value.upper()} (Attempt {attempt+1}/{max_retries}) for '{claim[:10]}...'. Retrying...")
+            else:
+                print(f"VERIFICATION ERROR for claim '{claim}': {e}")
+                return {"consistent": False, "reason": f"Error during verification: {e.original}"}
+        except Exception as e:
+            print(f"VERIFICATION ERROR for claim '{claim}': {e}")
+            return {"consistent": False, "reason": f"Error during verification: {e}"}
+    
+    return {"consistent": False, "reason": "Max retries exceeded"}
+
+
 class NarrativeAuditor:
     """
     Audits claims by querying the Pathway index and checking for contradictions.
     """
 
-    def __init__(self, index_table: pw.Table, llm_config: dict = None):
+    def __init__(
+        self,
+        index_table: pw.Table,
+        llm_config: dict = None,
+        reranker: LocalReranker = None,
+        chunk_store: ChunkStore = None,
+        expand_threshold: float = 0.6,
+        expand_radius: int = 1,
+        prefetch_k: int = 40,
+        batch_size: int = 1,
+        batch_wait_s: float = 0.2,
+        commit_ms: int = 1500,
+        queue_workers: int = 0,
+        queue_high_watermark: int = 1024,
+    ):
         """
         Initialize the auditor.
 
         Args:
             index_table (pw.Table): The Pathway table serving as the vector index.
             llm_config (dict): Configuration for the reasoning engine (LiteLLM/OpenAI).
+            reranker (LocalReranker): Second-stage reranker choosing the context per claim.
+            chunk_store (ChunkStore): Memory-mapped books used to materialize chunk text lazily.
+            expand_threshold (float): Verdicts below this confidence (or flagged as insufficient
+                                      evidence) are re-checked with neighboring chunks added.
+            expand_radius (int): Neighboring chunks added on each side of every selected chunk.
+            prefetch_k (int): Size of the per-backstory candidate pool retrieved by `prefetch`.
+            batch_size (int): Claims verified per LLM call. Above 1, claims in flight (across
+                              backstories and callers) are grouped by a `MicroBatcher`.
+            batch_wait_s (float): Longest wait for a verification batch to fill up.
+            commit_ms (int): How often finished verdicts are committed to the output; each
+                             verdict waits up to this long (lower it for interactive use).
+            queue_workers (int): Above 0, claims are verified through a bounded `WorkQueue`
+                                 (`self.queue`) with this many verifications in progress;
+                                 0 starts every claim's verification as it arrives.
+            queue_high_watermark (int): Claims in flight (admitted, not yet verified) at which
+                                        producers calling `self.queue.admit()` are held back.
+
+        'pacing_s' in `llm_config` is the pause before each verification call (free-tier rate
+        limits; default 20). 'stream' streams the verdicts and parses them as they arrive;
+        'early_stop' then closes each stream once the verdict fields are in (no reason is
+        generated). See `ask_verifier`.
         """
         self.index_table = index_table
-        self.llm_config = llm_config
+        self.llm_config = llm_config or {}
+        self.reranker = reranker or LocalReranker()
+        self.chunk_store = chunk_store or get_chunk_store()
+        self.expand_threshold = expand_threshold
+        self.expand_radius = expand_radius
+        self.prefetch_k = prefetch_k
+        self.batch_size = batch_size
+        self.batch_wait_s = batch_wait_s
+        self.commit_ms = commit_ms
+        self.pacing_s = self.llm_config.get("pacing_s", 20)
+        self.stream = self.llm_config.get("stream", False)
+        self.early_stop = self.llm_config.get("early_stop", False)
+        self.batchers = {}  # (size, wait, retries) -> MicroBatcher
+        # The handler is bound by `audit_backstory`, which defines the verification step
+        self.queue = WorkQueue(None, queue_workers, queue_high_watermark) \
+            if queue_workers > 0 else None
+        # Shared with BackstoryAnalyzer when both use the same model/key
+        self.client = get_llm_client(self.llm_config)
 
     async def audit_claim(self, claim: str) -> dict:
         """
@@ -43,92 +322,282 @@ class NarrativeAuditor:
         # For now, let's assume we can query.
         pass
 
-    def audit_backstory(self, claims_table: pw.Table) -> pw.Table:
+    def _retrieve(self, queries: pw.Table, k: int) -> pw.Table:
         """
-        Audits a table of claims against the vector index.
+        Run a kNN query per row of `queries` (a table with a 'query' column).
 
-        Args:
-            claims_table (pw.Table): Table containing 'claim' column.
+        Index queries are answered once, as of now, and the index cannot take their
+        retraction. It is given an append-only copy of `queries`, and the answers (span
+        references, see `drop_text`) are joined back to the live rows: deleting a query
+        (an answered HTTP request) frees everything downstream of it, and only the answer
+        itself stays in the engine.
 
         Returns:
-            pw.Table: Table with 'claim', 'context', and 'verification_result'.
+            pw.Table: Table in the universe of `queries` with a 'result' column (list of chunks).
         """
-        # 1. Retrieve context for each claim from the index
-        # We assume self.index_table is a Pathway VectorStore definition (contextualized table)
-        # or we use knn matching.
-        # If self.index_table is the result of llm.vector_store, it's a VectorStoreServer.
-        # We can use the 'query' method which returns the table with added context.
-        
+        append_only_queries = append_only(queries)
         # Check if index has .retrieve_query method (standard xpack)
         if hasattr(self.index_table, "retrieve_query"):
              # Perform RAG retrieval
              # retrieve_query expects specific schema: query, k, filepath_globpattern, metadata_filter
-             query_table = claims_table.select(
-                 query=pw.this.claim,
-                 k=3,
+             query_table = append_only_queries.select(
+                 query=pw.this.query,
+                 k=k,
                  filepath_globpattern="*", # Match all
                  metadata_filter=None # No filter
              )
-             enriched_claims = self.index_table.retrieve_query(query_table)
+             answers = self.index_table.retrieve_query(query_table)
         elif hasattr(self.index_table, "query"):
-             enriched_claims = self.index_table.query(claims_table.select(query=pw.this.claim), k=3)
+             answers = self.index_table.query(append_only_queries.select(query=pw.this.query), k=k)
         else:
              raise ValueError("Index does not support query interface.")
 
-        # enriched_claims now has 'query' (the claim) and 'result' (list of chunks/docs)
-        
-        # 2. Verify consistency using LLM
+        answers = answers.select(result=pw.apply_with_type(
+            lambda result: pw.Json(drop_text(as_chunk_list(result))), pw.Json, pw.this.result
+        ))
+        return queries.join(answers, queries.id == answers.id, id=queries.id).select(
+            answers.result
+        ).with_universe_of(queries)
+
+    def prefetch(self, backstories: pw.Table) -> pw.Table:
+        """
+        Speculatively retrieve a candidate pool per backstory, before it is decomposed.
+
+        Args:
+            backstories (pw.Table): Table with a 'backstory' column and optional 'char' and
+                                    'book_name' columns (see `DataIngestor.ingest_test_csv`).
+
+        Returns:
+            pw.Table: Table in the universe of `backstories` with a 'pool' column of
+                      `prefetch_k` chunks, shared by all claims of the backstory.
+        """
+        columns = backstories.column_names()
+        char = backstories.char if "char" in columns else ""
+        book_name = backstories.book_name if "book_name" in columns else ""
+        queries = backstories.select(
+            query=pw.apply_with_type(build_prefetch_query, str, backstories.backstory, char, book_name)
+        )
+        return self._retrieve(queries, self.prefetch_k).select(pool=pw.this.result)
+
+    def select_contexts(self, claims_table: pw.Table, pool: pw.Table = None, revisions: pw.Table = None) -> pw.Table:
+        """
+        Retrieve and rerank the context of each claim.
+
+        Without a pool, each claim over-fetches `candidate_k` chunks from the index. With a
+        pool (see `prefetch`), claims are joined to their backstory's pool on 'backstory_id'
+        and reranked within it, with no index search of their own.
+
+        With `revisions` (re-audit requests, see `ReauditTracker`), every request searches the
+        index again for its claim, and the answer of the latest revision replaces the claim's
+        context. Index queries are answered once, as of now, so each request is a new query
+        row rather than an update of the claim's original one.
+
+        Returns:
+            pw.Table: Table in the universe of `claims_table` with 'claim', 'flow' and 'result'
+                      (selected chunks, text dropped), plus 'claim_key' and 'revision' (0 until
+                      re-audited) with `revisions`.
+        """
+        # Claims of one backstory share a scheduling flow
+        flow_column = "source_text" if "source_text" in claims_table.column_names() else "claim"
+
+        # Rerank candidates on CPU and keep a per-claim number of chunks (dynamic k).
+        # Only span references leave this step; the text is re-read from the mapped book.
+        reranker = self.reranker
+        chunk_store = self.chunk_store
+
         @pw.udf
-        async def verify_claim(claim: str, context: list[dict]) -> dict:
-            import asyncio
-            import json
-            import random
-            from litellm import acompletion
-
-            delay = 20  # Start with 20s
-            max_retries = 10
-            
-            prompt = f"Claim: {claim}\nContext: {context}\nIs this claim consistent with the context? Return JSON {{'consistent': bool, 'reason': str}}"
-
-            for attempt in range(max_retries):
-                try:
-                    # Random jitter to prevent thundering herd
-                    sleep_time = delay + random.uniform(0, 10)
-                    await asyncio.sleep(sleep_time)
-                    
-                    resp = await acompletion(
-                        model=self.llm_config.get("model", "gemini/gemini-flash-latest"),
-                        messages=[{"role": "user", "content": prompt}],
-                        response_format={"type": "json_object"},
-                        api_key=self.llm_config.get("api_key"),
-                        caching=False
-                    )
-                    return json.loads(resp.choices[0].message.content)
-                except Exception as e:
-                    # Check for Rate Limit errors generic signatures
-                    err_str = str(e).lower()
-                    if "429" in err_str or "resource exhausted" in err_str or "quota" in err_str:
-                        print(f"RATE LIMIT (Attempt {attempt+1}/{max_retries}) for '{claim[:10]}...'. Sleeping {delay}s...")
-                        delay = min(delay * 2, 120) # Exponential backoff cap at 120s
-                    else:
-                        print(f"VERIFICATION ERROR for claim '{claim}': {e}")
-                        return {"consistent": False, "reason": f"Error during verification: {e}"}
-            
-            return {"consistent": False, "reason": "Max retries exceeded"}
+        def select_context(claim: str, candidates: pw.Json) -> pw.Json:
+            chunks = attach_text(as_chunk_list(candidates), chunk_store)
+            return pw.Json(drop_text(reranker.select(claim, chunks)))
+
+        def search(claims: pw.Table, flow: str) -> pw.Table:
+            # Stage 1 over-fetches candidate_k chunks; stage 2 reranks them locally.
+            enriched_claims = self._retrieve(claims.select(query=pw.this.claim), self.reranker.candidate_k)
+
+            # enriched_claims has 'result' (list of chunks/docs) in the universe of claims
+            return enriched_claims.select(
+                claim=claims.claim,
+                flow=claims[flow],
+                result=select_context(claims.claim, pw.this.result)
+            )
+
+        if pool is None:
+            contexts = search(claims_table, flow_column)
+        else:
+            contexts = claims_table.join(pool, claims_table.backstory_id == pool.id, id=claims_table.id).select(
+                claim=claims_table.claim,
+                flow=claims_table[flow_column],
+                result=select_context(claims_table.claim, pool.pool)
+            )
+        if revisions is None:
+            return contexts
+
+        contexts = contexts.with_columns(claim_key=pw.apply_with_type(str, str, pw.this.id), revision=0)
+
+        # One new index query per re-audit request (requests are append-only)
+        requests = revisions.join(contexts, revisions.claim_key == contexts.claim_key).select(
+            claim_id=contexts.id,
+            claim_key=revisions.claim_key,
+            revision=revisions.revision,
+            claim=contexts.claim,
+            flow=contexts.flow
+        )
+        answers = search(requests, "flow") + requests.select(pw.this.claim_id, pw.this.claim_key, pw.this.revision)
+
+        # The latest revision's answer replaces the claim's context
+        latest = answers.groupby(pw.this.claim_key).reduce(
+            pw.this.claim_key,
+            revision=pw.reducers.max(pw.this.revision)
+        )
+        latest = answers.join(
+            latest, answers.claim_key == latest.claim_key, answers.revision == latest.revision
+        ).select(*pw.left).with_id(pw.this.claim_id).without(pw.this.claim_id)
+        return contexts.update_rows(latest)
+
+    def with_evidence_text(self, results: pw.Table) -> pw.Table:
+        """
+        Results of `audit_backstory` with the chunk text put back into 'context'.
+
+        Verdicts carry span references while the pipeline runs; apply this to the table
+        that is written out, so the output holds the evidence itself.
+        """
+        chunk_store = self.chunk_store
+        return results.with_columns(context=pw.apply_with_type(
+            lambda context: pw.Json(attach_text(as_chunk_list(context), chunk_store)), pw.Json, pw.this.context
+        ))
+
+    def audit_backstory(self, claims_table: pw.Table, pool: pw.Table = None, revisions: pw.Table = None) -> pw.Table:
+        """
+        Audits a table of claims against the vector index.
+
+        Args:
+            claims_table (pw.Table): Table containing 'claim' column. An optional 'source_text'
+                                     column (the backstory) groups claims for fair scheduling.
+            pool (pw.Table): Optional prefetched candidates per backstory (see `prefetch`);
+                             requires a 'backstory_id' column in `claims_table`.
+            revisions (pw.Table): Optional re-audit requests per claim (see `ReauditTracker`). A
+                                  new revision re-retrieves and re-verifies that claim, and the
+                                  stale verdict is retracted from the output.
+
+        Returns:
+            pw.Table: Table with 'claim', 'context', 'context_k', 'expanded', 'mode', 'is_consistent' and 'reason'.
+                      'context' holds span references (path, start, end) instead of chunk text
+                      (see `with_evidence_text` for output);
+                      'expanded' is true when neighboring chunks were added for an uncertain verdict;
+                      'mode' is the budget mode (see `BudgetController`) that produced the verdict.
+                      With `revisions`, 'claim_key' and 'revision' columns are added.
+        """
+        # 1-2. Retrieve context for each claim and rerank it locally
+        reranked_claims = self.select_contexts(claims_table, pool, revisions)
+        chunk_store = self.chunk_store
+
+        # 3. Verify consistency using LLM; uncertain verdicts are re-checked with neighboring chunks
+        client = self.client
+        pacing_s = self.pacing_s
+        expand_threshold = self.expand_threshold
+        expand_radius = self.expand_radius
+
+        # Fully async: claims reach this step one backstory at a time (decomposition is fully
+        # async too), and a batch-async UDF would verify those batches one after another.
+        @pw.udf(executor=pw.udfs.fully_async_executor(autocommit_duration_ms=self.commit_ms))
+        async def verify_claim(claim: str, context: pw.Json, flow: str, revision: int = 0) -> dict:
+            try:
+                if queue is not None:
+                    # Only the claim and its span list wait in the queue; the prompt is built
+                    # when a worker takes it
+                    verdict = await queue.submit((claim, as_chunk_list(context), flow))
+                else:
+                    verdict = await _verify(claim, context, flow)
+                return {**verdict, "revision": revision}
+            finally:
+                # The claim is settled (verdict or error): count it towards its backstory
+                if client.scheduler is not None:
+                    client.scheduler.finish(flow)
+
+        # Batched verification: with `batch_size` > 1 (e.g. the HTTP service) and in the
+        # cheapest budget mode. Batchers are created on first use, one per setting.
+        batchers = self.batchers
+        batch_size, batch_wait_s = self.batch_size, self.batch_wait_s
+
+        def _batcher(size: int, wait_s: float, max_retries: int) -> MicroBatcher:
+            key = (size, wait_s, max_retries)
+            if key not in batchers:
+                async def verify_batch(items: list) -> list:
+                    prompt = build_batch_verification_prompt(items, chunk_store)
+                    payload = await _ask(prompt, f"batch of {len(items)}", items[0][2], max_retries=max_retries,
+                                         claims=len(items))
+                    return parse_batch_verdicts(payload, len(items))
+                batchers[key] = MicroBatcher(verify_batch, size, wait_s)
+            return batchers[key]
+
+        async def _verify(claim: str, context: pw.Json, flow: str) -> dict:
+            budget = client.budget
+            mode = budget.use() if budget is not None else "full"
+            chunks = as_chunk_list(context)
+            if mode == "exhausted":
+                return {"consistent": False, "reason": "LLM budget exhausted before verification",
+                        "context": drop_text(chunks), "expanded": False, "mode": mode}
+
+            cheap = BudgetController.at_least(mode, "small_k")
+            if cheap:
+                chunks = chunks[:budget.small_k]
+            if BudgetController.at_least(mode, "packed_context"):
+                chunks = pack_context(claim, chunks, chunk_store, budget.pack_chars)
+
+            batcher = None
+            if BudgetController.at_least(mode, "batched"):
+                batcher = _batcher(budget.batch_size, budget.batch_wait_s, max_retries=2)
+            elif batch_size > 1:
+                batcher = _batcher(batch_size, batch_wait_s, max_retries=2 if cheap else 10)
+            if batcher is not None:
+                # Batched claims are not expanded: one uncertain claim would hold up the batch
+                verdict = await batcher.submit((claim, chunks, flow))
+                return {**verdict, "context": drop_text(chunks), "expanded": False, "mode": mode}
+
+            result = await verify_with_expansion(
+                claim,
+                chunks,
+                lambda prompt: _ask(prompt, claim, flow, max_retries=2 if cheap else 10),
+                chunk_store,
+                threshold=expand_threshold,
+                radius=expand_radius,
+                expand=not cheap,
+            )
+            return {**result, "mode": mode}
+
+        queue = self.queue
+        if queue is not None:
+            queue.handler = lambda item: _verify(*item)
+
+        stream, early_stop = self.stream, self.early_stop
+
+        async def _ask(prompt: str, claim: str, flow: str, max_retries: int = 10, claims: int = 1) -> dict:
+            return await ask_verifier(client, prompt, claim, flow, pacing_s, max_retries,
+                                      stream=stream, early_stop=early_stop, claims=claims)
 
         # Flatten the results for clearer CSV output
         # verification result is a dict, we extract fields
         # Note: In Pathway, we can use simple select with item access if type is handled
         
-        annotated_results = enriched_claims.select(
-            claim=claims_table.claim,
-            context=pw.this.result,
-            verification=verify_claim(claims_table.claim, pw.this.result)
-        )
+        # A re-audit updates its row in place: until the new verdict is in, the row keeps the
+        # previous one, so the revision is read from the verdict, not from the claim.
+        revision = reranked_claims.revision if revisions is not None else 0
+        keys = [reranked_claims.claim_key] if revisions is not None else []
+        annotated_results = reranked_claims.select(
+            *keys,
+            pw.this.claim,
+            verification=verify_claim(pw.this.claim, pw.this.result, pw.this.flow, revision)
+        ).await_futures()
+        if revisions is not None:
+            annotated_results = annotated_results.with_columns(revision=pw.this.verification["revision"].as_int())
 
         final_results = annotated_results.select(
+            *(annotated_results[c] for c in ("claim_key", "revision") if revisions is not None),
             pw.this.claim,
-            pw.this.context,
+            context=pw.this.verification["context"],
+            context_k=pw.apply_with_type(lambda chunks: len(chunks.value), int, pw.this.verification["context"]),
+            expanded=pw.this.verification["expanded"],
+            mode=pw.this.verification["mode"],
             is_consistent=pw.this.verification["consistent"],
             reason=pw.this.verification["reason"]
         )
@@ -0,0 +1,280 @@
+"""
+Module: batch_evaluation.py
+Description: Static batch evaluation of a labeled dataset. Books and claims are embedded
+             in bulk, every claim is retrieved with one matrix multiply against the chunk
+             vectors, and verification runs as large concurrent batches of LLM calls.
+
+`run_evaluation.py` pushes the same data through the streaming engine row by row (one
+embedding request and one kNN query per claim). Here the whole dataset is known up
+front, so none of that per-row machinery is needed. Retrieval candidates, reranking,
+verification prompts and the output columns are the same as in the streaming path, so
+`compute_metrics.py` reads either result file.
+
+Usage example::
+    python -m src.batch_evaluation --dataset data/gold_standard.csv --books-dir data/mini
+    python -m src.batch_evaluation --dataset data/train.csv --concurrency 8 --batch-size 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from src.analyzer import BackstoryAnalyzer
+from src.auditor import (ask_verifier, build_batch_verification_prompt, parse_batch_verdicts,
+                         verify_with_expansion)
+from src.chunk_store import ChunkSpan, ChunkStore, attach_text, drop_text
+from src.llm_client import get_llm_client
+from src.reranker import LocalReranker
+from src.scheduler import FairScheduler
+from src.vector_index import QuantizedVectorIndex
+
+
+class BulkEmbedder:
+    """
+    Embeds many texts with few API calls: `batch_size` texts per request and up to
+    `concurrency` requests in flight.
+    """
+
+    def __init__(self, model: str = "gemini/text-embedding-004", api_key: str = None,
+                 batch_size: int = 100, concurrency: int = 4):
+        """
+        Initialize the embedder.
+
+        Args:
+            model (str): LiteLLM embedding model.
+            api_key (str): Provider API key.
+            batch_size (int): Texts per embedding request (100 is Gemini's limit).
+            concurrency (int): Requests in flight.
+        """
+        self.model = model
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.calls = 0
+
+    async def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        import litellm
+
+        self.calls += 1
+        response = await litellm.aembedding(model=self.model, input=texts, api_key=self.api_key)
+        rows = sorted(response.data, key=lambda item: item["index"])
+        return np.array([row["embedding"] for row in rows], dtype=np.float32)
+
+    async def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed all texts; rows follow the input order."""
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(batch):
+            async with semaphore:
+                return await self._embed_batch(batch)
+
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        return np.concatenate(await asyncio.gather(*(one(b) for b in batches)))
+
+
+class BatchEvaluator:
+    """
+    Evaluates a fully known set of claims against a fixed library of books.
+
+    Usage:
+        evaluator = BatchEvaluator(BulkEmbedder(api_key=key), llm_config)
+        await evaluator.index_books(paths)
+        results = await evaluator.evaluate(claims)
+    """
+
+    def __init__(self, embedder, llm_config: dict = None, reranker: LocalReranker = None,
+                 chunk_store: ChunkStore = None, concurrency: int = 16, batch_size: int = 1):
+        """
+        Initialize the evaluator.
+
+        Args:
+            embedder: Object with an async `embed(texts) -> np.ndarray` (see `BulkEmbedder`).
+            llm_config (dict): Verification model settings, as for `NarrativeAuditor`
+                               ('pacing_s' defaults to 20; 'stream' and 'early_stop'
+                               as in `ask_verifier`).
+            reranker (LocalReranker): Second-stage reranker choosing the context per claim.
+            chunk_store (ChunkStore): Memory-mapped books; chunks are their spans.
+            concurrency (int): Verification calls in flight.
+            batch_size (int): Claims per verification call (1 verifies with context expansion).
+        """
+        self.embedder = embedder
+        self.llm_config = llm_config or {}
+        self.reranker = reranker or LocalReranker()
+        self.chunk_store = chunk_store or ChunkStore()
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.pacing_s = self.llm_config.get("pacing_s", 20)
+        self.stream = self.llm_config.get("stream", False)
+        self.early_stop = self.llm_config.get("early_stop", False)
+        self.client = get_llm_client(self.llm_config)
+        if self.client.scheduler is None:
+            # Calls are paced outside the scheduler and at most `concurrency` run at once
+            self.client.scheduler = FairScheduler(max_concurrency=concurrency, verbose=False)
+        self.index: Optional[QuantizedVectorIndex] = None
+        self.chunks: List[dict] = []
+        self.timings = {}
+
+    async def index_books(self, paths: List[str]) -> int:
+        """Chunk every book and embed all chunks in bulk; returns the number of chunks."""
+        start = time.perf_counter()
+        chunks, texts = [], []
+        for path in paths:
+            for meta in self.chunk_store.chunk_metadata(path):
+                chunks.append({"metadata": {**meta, "path": path}})
+                texts.append(self.chunk_store.text(ChunkSpan(path, meta["start"], meta["end"])))
+        vectors = await self.embedder.embed(texts) if texts else np.empty((0, 1), dtype=np.float32)
+        self.index = QuantizedVectorIndex(vectors.shape[1], storage="float32")
+        self.index.add(list(range(len(chunks))), vectors)
+        self.chunks = chunks
+        self.timings["index_s"] = time.perf_counter() - start
+        return len(chunks)
+
+    async def retrieve(self, claims: List[str]) -> List[list]:
+        """Embed all claims in bulk, search them as one matrix product and rerank each."""
+        start = time.perf_counter()
+        queries = await self.embedder.embed(claims)
+        ids, scores = self.index.search_batch(queries, self.reranker.candidate_k)
+        contexts = []
+        for claim, row_ids, row_scores in zip(claims, ids, scores):
+            # Same candidates as the vector store returns (dist = 1 - cosine), text read from the map
+            candidates = [
+                {**self.chunks[i], "text": self.chunk_store.text_of(self.chunks[i]), "dist": 1.0 - float(score)}
+                for i, score in zip(row_ids, row_scores)
+            ]
+            contexts.append(drop_text(self.reranker.select(claim, candidates)))
+        self.timings["retrieve_s"] = time.perf_counter() - start
+        return contexts
+
+    async def verify(self, claims: List[str], contexts: List[list]) -> List[dict]:
+        """Verify every claim at once; the client's scheduler bounds the calls in flight."""
+        start = time.perf_counter()
+
+        async def ask(prompt: str, label: str, flow: str, count: int = 1) -> dict:
+            return await ask_verifier(self.client, prompt, label, flow, self.pacing_s,
+                                      stream=self.stream, early_stop=self.early_stop, claims=count)
+
+        async def single(i: int) -> List[dict]:
+            result = await verify_with_expansion(
+                claims[i], contexts[i], lambda prompt: ask(prompt, claims[i], claims[i]), self.chunk_store
+            )
+            return [result]
+
+        async def batch(rows: range) -> List[dict]:
+            items = [(claims[i], contexts[i]) for i in rows]
+            payload = await ask(build_batch_verification_prompt(items, self.chunk_store),
+                                f"batch of {len(items)}", f"batch {rows.start}", len(items))
+            return [{**verdict, "context": contexts[i], "expanded": False}
+                    for i, verdict in zip(rows, parse_batch_verdicts(payload, len(items)))]
+
+        if self.batch_size > 1:
+            groups = [range(i, min(i + self.batch_size, len(claims))) for i in range(0, len(claims), self.batch_size)]
+            parts = await asyncio.gather(*(batch(rows) for rows in groups))
+        else:
+            parts = await asyncio.gather(*(single(i) for i in range(len(claims))))
+        self.timings["verify_s"] = time.perf_counter() - start
+        return [verdict for part in parts for verdict in part]
+
+    async def evaluate(self, claims: List[str]) -> pd.DataFrame:
+        """
+        Retrieve and verify every claim.
+
+        Returns:
+            pd.DataFrame: One row per claim with the columns of the streaming output:
+                          claim, context, context_k, expanded, mode, is_consistent, reason.
+        """
+        contexts = await self.retrieve(claims)
+        verdicts = await self.verify(claims, contexts)
+        return pd.DataFrame({
+            "claim": claims,
+            "context": [json.dumps(v["context"]) for v in verdicts],
+            "context_k": [len(v["context"]) for v in verdicts],
+            "expanded": [bool(v.get("expanded")) for v in verdicts],
+            "mode": "full",
+            "is_consistent": [bool(v.get("consistent")) for v in verdicts],
+            "reason": [v.get("reason", "") for v in verdicts],
+        })
+
+
+async def decompose_all(analyzer: BackstoryAnalyzer, backstories: List[str], concurrency: int) -> List[List[str]]:
+    """Decompose every backstory, `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(text):
+        async with semaphore:
+            return await analyzer.extract_atomic_claims(text)
+
+    return list(await asyncio.gather(*(one(text) for text in backstories)))
+
+
+async def run(args, embedder, llm_config: dict) -> pd.DataFrame:
+    """Evaluate `args.dataset` against the books of `args.books_dir`."""
+    start = time.perf_counter()
+    dataset = pd.read_csv(args.dataset)
+    evaluator = BatchEvaluator(embedder, llm_config, concurrency=args.concurrency, batch_size=args.batch_size)
+    paths = sorted(os.path.join(args.books_dir, name) for name in os.listdir(args.books_dir))
+
+    if "claim" in dataset.columns:
+        claims, backstory_ids = dataset["claim"].astype(str).tolist(), None
+    else:
+        # Backstories (train.csv 'content'): decomposed concurrently, claims evaluated together
+        analyzer = BackstoryAnalyzer(llm_config=llm_config)
+        decomposed = await decompose_all(analyzer, dataset["content"].astype(str).tolist(), args.concurrency)
+        backstory_ids = [row for row, claims in zip(dataset.index, decomposed) for _ in claims]
+        claims = [claim for claims in decomposed for claim in claims]
+        print(analyzer.path_report())
+
+    chunks = await evaluator.index_books(paths)
+    results = await evaluator.evaluate(claims)
+    if backstory_ids is not None:
+        results.insert(0, "backstory_id", backstory_ids)
+
+    timings = ", ".join(f"{name[:-2]} {seconds:.1f}s" for name, seconds in evaluator.timings.items())
+    print(f"Evaluated {len(claims)} claims against {chunks} chunks in {time.perf_counter() - start:.1f}s "
+          f"({timings}; {getattr(embedder, 'calls', '?')} embedding calls)")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static batch evaluation of a labeled dataset.")
+    parser.add_argument("--dataset", default="data/gold_standard.csv",
+                        help="CSV with 'claim' (and 'expected') or backstories in 'content' (and 'label')")
+    parser.add_argument("--books-dir", default="data/mini", help="Books to retrieve from")
+    parser.add_argument("--out", default="results/evaluation_results.csv", help="Result CSV")
+    parser.add_argument("--concurrency", type=int, default=16, help="LLM calls in flight")
+    parser.add_argument("--batch-size", type=int, default=1, help="Claims per verification call")
+    parser.add_argument("--embed-batch", type=int, default=100, help="Texts per embedding request")
+    parser.add_argument("--pacing-s", type=float, default=20, help="Pause before each LLM call (free-tier rate limits)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    embedder = BulkEmbedder(api_key=api_key, batch_size=args.embed_batch)
+    llm_config = {"model": "gemini/gemini-flash-latest", "api_key": api_key, "pacing_s": args.pacing_s}
+    results = asyncio.run(run(args, embedder, llm_config))
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    # Output carries the evidence text, read back through the spans
+    results["context"] = [json.dumps(attach_text(json.loads(context))) for context in results["context"]]
+    results.to_csv(args.out, index=False)
+    print(f"Results written to {args.out}")
+
+    dataset = pd.read_csv(args.dataset)
+    if "expected" in dataset.columns:
+        from src.compute_metrics import compute_metrics
+        compute_metrics(gold_path=args.dataset, results_path=args.out)
+    elif "label" in dataset.columns:
+        # A backstory is consistent when every one of its claims is
+        predicted = results.groupby("backstory_id")["is_consistent"].all().reindex(dataset.index, fill_value=True)
+        expected = dataset["label"].astype(str).str.lower() == "consistent"
+        print(f"Backstory accuracy: {(predicted == expected).mean():.2%} over {len(dataset)} backstories")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Module: batcher.py
+Description: Async micro-batching: collects items submitted within a short window and
+             handles them with one call.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    Groups concurrent `submit` calls into batches for a single handler call.
+
+    A batch is flushed when it reaches `max_batch` items or `max_wait_s` after its first
+    item arrived, whichever comes first. The handler receives the items in submission
+    order and must return one result per item; each caller gets its own result back.
+    If the handler raises, every caller in the batch receives the exception.
+
+    Usage:
+        batcher = MicroBatcher(verify_many, max_batch=8, max_wait_s=0.2)
+        verdict = await batcher.submit((claim, context))
+    """
+
+    def __init__(self, handler: Callable[[list], Awaitable[list]], max_batch: int = 8, max_wait_s: float = 0.2):
+        """
+        Initialize the batcher.
+
+        Args:
+            handler: Async callable mapping a list of items to a list of results.
+            max_batch (int): Largest batch handed to the handler.
+            max_wait_s (float): Longest time an item waits for others to join its batch.
+        """
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self._pending: List[tuple] = []  # (item, future)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait_s, self._flush)
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[tuple]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = await self.handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"Batch handler returned {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
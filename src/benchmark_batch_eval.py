@@ -0,0 +1,145 @@
+"""
+Module: benchmark_batch_eval.py
+Description: Wall-clock time of evaluating one labeled claim set through the streaming
+             pipeline (`run_evaluation.py`: VectorStoreServer + `NarrativeAuditor`) versus
+             the static batch mode (`batch_evaluation.py`), on the same books and claims.
+
+Both paths run offline. Embeddings come from `HashingEmbedder` behind a fixed delay per
+request (`--embed-ms`): the streaming path sends one request per chunk and per claim,
+while the batch path sends `--embed-batch` texts per request. The LLM is the simulated
+completion of `benchmark_server` (`--llm-ms` per call). Both paths get the same number of
+LLM calls in flight (`--llm-concurrency`) and no free-tier pacing. The streaming run is a
+separate process; its time covers `pw.run()`, from reading the books to the last verdict.
+The share of claims whose selected context spans are identical in both paths is reported
+as a check that the batch retrieval matches the streaming one.
+
+Usage example::
+    python -m src.benchmark_batch_eval --claims 200 --embed-ms 50 --llm-ms 800
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import src.llm_client
+from src.batch_evaluation import BatchEvaluator, BulkEmbedder
+from src.benchmark_prefetch import split_claims
+from src.benchmark_server import simulated_completion
+from src.local_embedder import HashingEmbedder
+
+
+class OfflineBulkEmbedder(BulkEmbedder):
+    """`BulkEmbedder` answering from `HashingEmbedder` after a fixed delay per request."""
+
+    def __init__(self, delay_s: float, dimensions: int = 768, batch_size: int = 100, concurrency: int = 4):
+        super().__init__(batch_size=batch_size, concurrency=concurrency)
+        self.delay_s = delay_s
+        self.local = HashingEmbedder(dimensions)
+
+    async def _embed_batch(self, texts: list) -> np.ndarray:
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self.local.embed(texts)
+
+
+def spans_of(context) -> frozenset:
+    """(book file name, start, end) of the chunks a verdict was checked against."""
+    chunks = json.loads(context) if isinstance(context, str) else context
+    return frozenset((os.path.basename(c["metadata"]["path"]), c["metadata"]["start"], c["metadata"]["end"])
+                     for c in chunks)
+
+
+def run_streaming(args, claims_csv: str) -> dict:
+    """Evaluate the claims through the Pathway pipeline (run in a subprocess)."""
+    import pathway as pw
+    from pathway.xpacks import llm
+
+    from src.auditor import NarrativeAuditor
+    from src.benchmark_prefetch import LatencyEmbedder
+    from src.chunker import BookChunker
+    from src.scheduler import FairScheduler
+
+    src.llm_client.acompletion = simulated_completion(args.llm_ms, 0)
+    books = pw.io.fs.read(args.books_dir, format="binary", mode="static", with_metadata=True)
+    embedder = LatencyEmbedder(args.embed_ms / 1000)
+    index = llm.vector_store.VectorStoreServer(books, embedder=embedder, parser=BookChunker())
+    claims = pw.io.csv.read(claims_csv, schema=pw.schema_from_csv(claims_csv), mode="static")
+    auditor = NarrativeAuditor(index_table=index, llm_config={"model": "offline", "api_key": "offline",
+                                                               "pacing_s": 0, "hedge": False})
+    auditor.client.scheduler = FairScheduler(max_concurrency=args.llm_concurrency, verbose=False)
+    results = auditor.audit_backstory(claims)
+
+    rows = {}
+    pw.io.subscribe(results, lambda key, row, time, is_addition: rows.update(
+        {row["claim"]: spans_of(row["context"].value)} if is_addition else {}))
+    start = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    return {"seconds": time.perf_counter() - start, "embed_calls": embedder.calls,
+            "contexts": {claim: sorted(spans) for claim, spans in rows.items()}}
+
+
+async def run_batch(args, claims: list) -> dict:
+    src.llm_client.acompletion = simulated_completion(args.llm_ms, 0)
+    embedder = OfflineBulkEmbedder(args.embed_ms / 1000, batch_size=args.embed_batch)
+    start = time.perf_counter()
+    evaluator = BatchEvaluator(embedder, {"model": "offline", "api_key": "offline", "pacing_s": 0, "hedge": False},
+                               concurrency=args.llm_concurrency)
+    paths = sorted(os.path.join(args.books_dir, name) for name in os.listdir(args.books_dir))
+    await evaluator.index_books(paths)
+    results = await evaluator.evaluate(claims)
+    return {"seconds": time.perf_counter() - start, "embed_calls": embedder.calls, "timings": evaluator.timings,
+            "contexts": {row.claim: spans_of(row.context) for row in results.itertuples()}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming vs. static batch evaluation wall-clock time.")
+    parser.add_argument("--claims", type=int, default=200, help="Claims taken from the backstories of --backstories")
+    parser.add_argument("--backstories", nargs="+", default=["data/train.csv"],
+                        help="CSVs whose 'content' backstories are split into claims")
+    parser.add_argument("--books-dir", default="data/mini", help="Books to retrieve from")
+    parser.add_argument("--embed-ms", type=float, default=50, help="Simulated latency of one embedding request")
+    parser.add_argument("--embed-batch", type=int, default=100, help="Texts per embedding request (batch path)")
+    parser.add_argument("--llm-ms", type=float, default=800, help="Simulated latency of one LLM call")
+    parser.add_argument("--llm-concurrency", type=int, default=16, help="LLM calls in flight (both paths)")
+    parser.add_argument("--streaming", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.streaming:
+        print(json.dumps(run_streaming(args, args.streaming)))
+        return
+
+    backstories = pd.concat([pd.read_csv(path)["content"] for path in args.backstories]).astype(str)
+    claims = list(dict.fromkeys(c for text in backstories for c in split_claims(text)))[:args.claims]
+    with tempfile.TemporaryDirectory() as tmp:
+        claims_csv = os.path.join(tmp, "claims.csv")
+        pd.DataFrame({"claim": claims}).to_csv(claims_csv, index=False)
+        command = [sys.executable, "-m", "src.benchmark_batch_eval", "--streaming", claims_csv] + sys.argv[1:]
+        output = subprocess.run(command, capture_output=True, text=True)
+        if output.returncode != 0:
+            print(output.stderr[-3000:])
+            raise SystemExit("Streaming run failed")
+        streaming = json.loads(output.stdout.strip().splitlines()[-1])
+
+    batch = asyncio.run(run_batch(args, claims))
+    same = sum(frozenset(map(tuple, streaming["contexts"].get(c, []))) == batch["contexts"][c] for c in claims)
+    print(f"{len(claims)} claims; embedding {args.embed_ms:.0f} ms/request, LLM {args.llm_ms:.0f} ms/call, "
+          f"{args.llm_concurrency} calls in flight")
+    print(f"{'path':<10} {'seconds':>8} {'claims/s':>9} {'embed calls':>12}")
+    for label, result in (("streaming", streaming), ("batch", batch)):
+        print(f"{label:<10} {result['seconds']:>8.1f} {len(claims) / result['seconds']:>9.1f} {result['embed_calls']:>12}")
+    print(f"Speed-up {streaming['seconds'] / batch['seconds']:.1f}x; batch stages: "
+          + ", ".join(f"{name[:-2]} {seconds:.2f}s" for name, seconds in batch["timings"].items()))
+    print(f"Claims answered by the streaming run: {len(streaming['contexts'])}/{len(claims)}; "
+          f"same context in both paths: {same}/{len(claims)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Module: benchmark_hierarchical.py
+Description: Query latency and recall of the chapter -> passage `HierarchicalIndex`
+             against the flat passage index, as the library grows.
+
+The corpus comes from `generate_stress_data` (or an existing `--corpus` directory with
+Books/ and facts.jsonl). Passages are embedded offline with `HashingEmbedder`. The
+synthetic books are mostly shared filler and the hashing embedder has no notion of word
+importance, so its raw vectors of different passages are nearly identical; every bucket
+is scaled by its IDF over the passages first, as a semantic embedder would discount
+common words. Each query is a planted fact sentence or its contradicting variant. Two
+recall figures are reported: recall@k against the exact flat top-k, and evidence@k, the
+share of queries whose planted passage is among the k results.
+
+Usage example::
+    python -m src.benchmark_hierarchical --books 40 --book-mb 1 --library-sizes 10 20 40
+    python -m src.benchmark_hierarchical --corpus data/synthetic --top-sections 4 8 16
+"""
+
+import argparse
+import bisect
+import json
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from src.chunker import BookChunker
+from src.generate_stress_data import generate
+from src.hierarchical_index import HierarchicalIndex
+from src.local_embedder import HashingEmbedder
+from src.vector_index import QuantizedVectorIndex
+
+
+def load_corpus(corpus: str, embedder: HashingEmbedder, chunker: BookChunker):
+    """Chunk and embed every book once: per book, its passage ids, chapter keys and vectors."""
+    books = {}
+    books_dir = os.path.join(corpus, "Books")
+    for name in sorted(os.listdir(books_dir)):
+        path = os.path.join(books_dir, name)
+        with open(path, "rb") as f:
+            chunks = chunker.chunk(f.read())
+        books[name[:-len(".txt")]] = {
+            "ids": [(path, meta["start"], meta["end"]) for _, meta in chunks],
+            "chapters": [(path, meta["chapter"]) for _, meta in chunks],
+            "vectors": embedder.embed([text for text, _ in chunks]),
+        }
+    return books
+
+
+def idf_weights(vectors: np.ndarray) -> np.ndarray:
+    """Inverse document frequency of each hashed bucket over the passages."""
+    df = (vectors > 0).sum(axis=0)
+    return np.log(len(vectors) / (1 + df)).clip(min=0).astype(np.float32)
+
+
+def weighted(vectors: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    vectors = vectors * weights
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def evidence_of(book: dict, fact: dict):
+    """Id of the passage holding a planted fact."""
+    starts = [start for _, start, _ in book["ids"]]
+    return book["ids"][bisect.bisect_right(starts, fact["byte_start"]) - 1]
+
+
+def run(books: dict, facts: list, titles: list, args, embedder: HashingEmbedder) -> list:
+    ids = [i for t in titles for i in books[t]["ids"]]
+    chapters = [c for t in titles for c in books[t]["chapters"]]
+    vectors = np.concatenate([books[t]["vectors"] for t in titles])
+    weights = idf_weights(vectors)
+    vectors = weighted(vectors, weights)
+
+    rng = random.Random(0)
+    picked = rng.sample([f for f in facts if f["book"] in set(titles)], min(args.queries, len(facts)))
+    texts = [f["sentence"] if i % 2 == 0 else f["false_sentence"] for i, f in enumerate(picked)]
+    evidence = [evidence_of(books[f["book"]], f) for f in picked]
+    queries = weighted(embedder.embed(texts), weights)
+
+    flat = QuantizedVectorIndex(args.dim, storage="float32")
+    flat.add(ids, vectors)
+    indexes = [("flat", None, flat)]
+    for probe in args.top_sections:
+        index = HierarchicalIndex(args.dim, top_sections=probe, section_passages=args.section_passages,
+                                  summary=args.summary)
+        index.add(ids, vectors, chapters)
+        indexes.append((f"top {probe}", probe, index))
+
+    truth = None
+    rows = []
+    for label, probe, index in indexes:
+        index.search(queries[0], k=args.k)  # builds pending sections outside the timing
+        latencies, results = [], []
+        for query in queries:
+            start = time.perf_counter()
+            results.append([i for i, _ in index.search(query, k=args.k)])
+            latencies.append(time.perf_counter() - start)
+        if truth is None:
+            truth = results
+        sections = len(index.section_keys) if probe else 0
+        scanned = len(ids) if probe is None else probe * len(ids) / max(1, sections) + sections
+        rows.append({
+            "books": len(titles),
+            "passages": len(ids),
+            "index": label,
+            "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+            "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+            "scanned": scanned,
+            "recall": sum(len(set(r) & set(t)) for r, t in zip(results, truth)) / (len(truth) * args.k),
+            "evidence": sum(e in r for e, r in zip(evidence, results)) / len(results),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the hierarchical index against the flat index.")
+    parser.add_argument("--corpus", help="Existing corpus (Books/ and facts.jsonl from generate_stress_data)")
+    parser.add_argument("--books", type=int, default=40, help="Books to generate without --corpus")
+    parser.add_argument("--book-mb", type=float, default=1.0, help="Size of each generated book")
+    parser.add_argument("--chapters", type=int, default=40, help="Chapters per generated book")
+    parser.add_argument("--facts-per-book", type=int, default=100, help="Planted facts per generated book")
+    parser.add_argument("--library-sizes", type=int, nargs="+", help="Numbers of books to index (default: 1/4, 1/2, all)")
+    parser.add_argument("--queries", type=int, default=300, help="Queries per library size")
+    parser.add_argument("--k", type=int, default=5, help="Passages per query")
+    parser.add_argument("--top-sections", type=int, nargs="+", default=[4, 16, 64], help="Sections probed per query")
+    parser.add_argument("--section-passages", type=int, default=8, help="Longest section, in passages")
+    parser.add_argument("--summary", choices=HierarchicalIndex.SUMMARIES, default="max", help="Section summary vector")
+    parser.add_argument("--dim", type=int, default=768, help="Embedding dimensionality")
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder(args.dim)
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            corpus = tmp
+            generate(tmp, args.books, args.book_mb, args.chapters, args.facts_per_book, rows=0,
+                     contradict_ratio=0.5, seed=0)
+        with open(os.path.join(corpus, "facts.jsonl"), encoding="utf-8") as f:
+            facts = [json.loads(line) for line in f]
+        start = time.perf_counter()
+        books = load_corpus(corpus, embedder, BookChunker())
+        print(f"Chunked and embedded {len(books)} books in {time.perf_counter() - start:.1f}s")
+
+    titles = list(books)
+    sizes = args.library_sizes or sorted({max(1, len(titles) // 4), max(1, len(titles) // 2), len(titles)})
+    print(f"k={args.k}, sections of up to {args.section_passages} passages, {args.summary} summaries")
+    print(f"{'books':>5} {'passages':>8} {'index':<7} {'p50 ms':>7} {'p95 ms':>7} {'scanned':>8} "
+          f"{f'recall@{args.k}':>9} {f'evidence@{args.k}':>11}")
+    for size in sizes:
+        for row in run(books, facts, titles[:size], args, embedder):
+            print(f"{row['books']:>5} {row['passages']:>8} {row['index']:<7} {row['p50_ms']:>7.2f} {row['p95_ms']:>7.2f} "
+                  f"{row['scanned']:>8.0f} {row['recall']:>9.3f} {row['evidence']:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
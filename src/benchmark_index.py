@@ -0,0 +1,104 @@
+"""
+Module: benchmark_index.py
+Description: Compares memory footprint, query latency and recall@k of the quantized
+             vector index storage modes against the full-precision baseline.
+
+Usage example::
+    python -m src.benchmark_index --vectors 100000 --dim 768 --k 10
+    python -m src.benchmark_index --embeddings results/chunk_embeddings.npy
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.vector_index import QuantizedVectorIndex
+
+
+def synthetic_embeddings(n: int, dim: int, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors, closer to real text embeddings than isotropic noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size=n)] + 0.6 * rng.normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def exact_neighbours(vectors: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, storages, rescore_factor: int, pq_subspaces: int):
+    truth = exact_neighbours(vectors, queries, k)
+    ids = list(range(len(vectors)))
+    rows = []
+
+    for storage in storages:
+        index = QuantizedVectorIndex(
+            vectors.shape[1], storage=storage, rescore_factor=rescore_factor, pq_subspaces=pq_subspaces
+        )
+        start = time.perf_counter()
+        index.add(ids, vectors)
+        build_s = time.perf_counter() - start
+
+        latencies = []
+        hits = 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = index.search(query, k=k)
+            latencies.append(time.perf_counter() - start)
+            hits += len(set(i for i, _ in found) & set(expected.tolist()))
+
+        rows.append({
+            "storage": storage,
+            "memory_mb": index.memory_bytes() / 1e6,
+            "build_s": build_s,
+            "p50_ms": float(np.percentile(latencies, 50)) * 1000,
+            "p95_ms": float(np.percentile(latencies, 95)) * 1000,
+            "recall": hits / (len(queries) * k),
+        })
+        index.close()
+
+    baseline = rows[0]["memory_mb"] if rows and rows[0]["storage"] == "float32" else None
+    print(f"\n{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries, k={k}")
+    print(f"{'storage':<9} {'memory MB':>10} {'ratio':>7} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {f'recall@{k}':>10}")
+    for row in rows:
+        ratio = f"{baseline / row['memory_mb']:.1f}x" if baseline else "-"
+        print(
+            f"{row['storage']:<9} {row['memory_mb']:>10.1f} {ratio:>7} {row['build_s']:>8.2f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['recall']:>10.3f}"
+        )
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized vector storage against full precision.")
+    parser.add_argument("--vectors", type=int, default=50000, help="Number of synthetic vectors")
+    parser.add_argument("--dim", type=int, default=768, help="Synthetic vector dimensionality")
+    parser.add_argument("--embeddings", help="Optional .npy file with real chunk embeddings [n, dim]")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per query")
+    parser.add_argument("--rescore-factor", type=int, default=4, help="Candidates rescored per result")
+    parser.add_argument("--pq-subspaces", type=int, default=96, help="PQ subspaces (must divide dim)")
+    parser.add_argument("--storage", nargs="+", default=list(QuantizedVectorIndex.STORAGE_MODES))
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = np.load(args.embeddings).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        vectors = synthetic_embeddings(args.vectors, args.dim)
+
+    # Queries are perturbed copies of stored vectors, mimicking a claim close to its evidence.
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, len(vectors), size=args.queries)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(args.queries, vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    storages = ["float32"] + [s for s in args.storage if s != "float32"]
+    run(vectors, queries, args.k, storages, args.rescore_factor, args.pq_subspaces)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Module: benchmark_ingest.py
+Description: Ingest throughput (MB/s) of reading and chunking a large book drop through
+             Pathway, as a function of the number of parser worker processes.
+
+Each setting runs in its own process: the books are read with `pw.io.fs.read` (static,
+binary) and chunked by the parser `VectorStoreServer` would use, `BookChunker` in-process
+("in-process") or `ParallelBookParser` with N workers. Embedding is not part of the
+measurement. Throughput is the corpus size divided by the wall time of the Pathway run;
+the start-up of the pool's worker processes is included.
+
+The corpus comes from `generate_stress_data` (or an existing `--books-dir`). Speed-up is
+bounded by the cores of the machine (printed with the results).
+
+Usage example::
+    python -m src.benchmark_ingest --books 32 --book-mb 2 --workers 1 2 4 8
+    python -m src.benchmark_ingest --books-dir data/external/Dataset/Books
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.generate_stress_data import generate
+
+
+def ingest_once(books_dir: str, workers: int, max_inflight_mb: float) -> dict:
+    """Read and chunk every book once; report bytes, chunks and wall time."""
+    import pathway as pw
+
+    from src.chunker import BookChunker
+    from src.parallel_parser import ParallelBookParser
+
+    parser = BookChunker() if workers == 0 else ParallelBookParser(workers=workers, max_inflight_mb=max_inflight_mb)
+    if workers == 0:
+        parser = pw.udf(parser.chunk)
+    files = pw.io.fs.read(books_dir, format="binary", mode="static", with_metadata=True)
+    chunked = files.select(size=pw.apply(len, pw.this.data), chunks=parser(pw.this.data))
+    stats = {"files": 0, "bytes": 0, "chunks": 0}
+
+    def on_change(key, row, time, is_addition):
+        stats["files"] += 1
+        stats["bytes"] += row["size"]
+        stats["chunks"] += len(row["chunks"])
+
+    pw.io.subscribe(chunked, on_change)
+    start = time.perf_counter()
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+    stats["seconds"] = time.perf_counter() - start
+    if workers:
+        stats["peak_inflight_mb"] = parser.budget.peak / 2**20
+        parser.shutdown()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest throughput against parser worker processes.")
+    parser.add_argument("--books-dir", help="Existing books directory (default: generate one)")
+    parser.add_argument("--books", type=int, default=32, help="Books to generate without --books-dir")
+    parser.add_argument("--book-mb", type=float, default=2.0, help="Size of each generated book")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts (default: 1, 2, 4, ... up to the CPU count)")
+    parser.add_argument("--max-inflight-mb", type=float, default=256, help="Bytes parsed at once by the pool")
+    parser.add_argument("--repeats", type=int, default=2, help="Runs per setting; the fastest is kept")
+    parser.add_argument("--run-one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        print(json.dumps(ingest_once(args.books_dir, args.run_one, args.max_inflight_mb)))
+        return
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or sorted({2 ** i for i in range(cpus.bit_length())} | {cpus})
+    with tempfile.TemporaryDirectory() as tmp:
+        books_dir = args.books_dir
+        if books_dir is None:
+            generate(tmp, args.books, args.book_mb, chapters=40, facts_per_book=0, rows=0,
+                     contradict_ratio=0.5, seed=0)
+            books_dir = os.path.join(tmp, "Books")
+
+        print(f"{cpus} CPUs; in-flight budget {args.max_inflight_mb:.0f} MB")
+        print(f"{'parser':<14} {'files':>5} {'MB':>7} {'chunks':>7} {'seconds':>8} {'MB/s':>7} {'speed-up':>8} {'peak MB':>8}")
+        baseline = None
+        for count in [0] + workers:
+            runs = []
+            for _ in range(args.repeats):
+                command = [sys.executable, "-m", "src.benchmark_ingest", "--run-one", str(count),
+                           "--books-dir", books_dir, "--max-inflight-mb", str(args.max_inflight_mb)]
+                output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+                runs.append(json.loads(output.strip().splitlines()[-1]))
+            best = min(runs, key=lambda r: r["seconds"])
+            mb = best["bytes"] / 2**20
+            rate = mb / best["seconds"]
+            baseline = baseline or rate
+            label = "in-process" if count == 0 else f"{count} workers"
+            peak = f"{best['peak_inflight_mb']:>8.1f}" if count else f"{'-':>8}"
+            print(f"{label:<14} {best['files']:>5} {mb:>7.1f} {best['chunks']:>7} {best['seconds']:>8.2f} "
+                  f"{rate:>7.1f} {rate / baseline:>7.2f}x {peak}")
+
+
+if __name__ == "__main__":
+    main()
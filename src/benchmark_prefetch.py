@@ -0,0 +1,198 @@
+"""
+Module: benchmark_prefetch.py
+Description: Per-backstory latency from arrival until every claim has its context, with
+             per-claim index search versus a speculative per-backstory pool. Both modes run with the
+             same executor for decomposition; each executor is measured in turn.
+
+The pipeline graph of main.py is used (VectorStoreServer over the books, decomposition,
+`NarrativeAuditor.select_contexts`), with the API calls replaced by
+fixed delays: `--decompose-ms` for the two decomposition calls and `--embed-ms` for
+each embedding request (vectors come from the offline `HashingEmbedder`).
+Verification is not part of the measurement; it is the same in both modes.
+
+Usage example::
+    python -m src.benchmark_prefetch --backstories 40 --decompose-ms 3000 --embed-ms 300
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pathway as pw
+from pathway.xpacks import llm
+
+from src.chunker import BookChunker
+from src.local_embedder import HashingEmbedder
+
+SENTENCE = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_claims(backstory: str) -> list:
+    """Stand-in for decomposition: one claim per sentence."""
+    return [s for s in SENTENCE.split(backstory.strip()) if s]
+
+
+class LatencyEmbedder(pw.UDF):
+    """Offline embedder that answers after a fixed delay, like a remote embedding API."""
+
+    def __init__(self, delay_s: float, dimensions: int = 768):
+        super().__init__()
+        self.delay_s = delay_s
+        self.local = HashingEmbedder(dimensions)
+        self.calls = 0
+
+    async def __wrapped__(self, text: str, **kwargs) -> np.ndarray:
+        self.calls += 1
+        await asyncio.sleep(self.delay_s)
+        return self.local.embed([text])[0]
+
+    def get_embedding_dimension(self, **kwargs) -> int:
+        return self.local.dimensions
+
+
+class BackstorySubject(pw.io.python.ConnectorSubject):
+    """Emits the backstories once the index is built and records their arrival times."""
+
+    def __init__(self, rows: list, start_after_s: float):
+        super().__init__()
+        self.rows = rows
+        self.start_after_s = start_after_s
+        self.arrived = {}
+
+    def run(self):
+        time.sleep(self.start_after_s)
+        for row in self.rows:
+            self.arrived[row["backstory"]] = time.perf_counter()
+            self.next(**row)
+
+
+def run_mode(mode: str, args) -> dict:
+    from src.auditor import NarrativeAuditor
+
+    rows = (
+        pd.read_csv(args.train_csv)[["content", "char", "book_name"]]
+        .head(args.backstories)
+        .rename(columns={"content": "backstory"})
+        .astype(str)
+        .to_dict("records")
+    )
+    expected = {row["backstory"]: len(split_claims(row["backstory"])) for row in rows}
+
+    books = pw.io.fs.read(args.books_dir, format="binary", mode="static", with_metadata=True)
+    embedder = LatencyEmbedder(args.embed_ms / 1000)
+    index = llm.vector_store.VectorStoreServer(books, embedder=embedder, parser=BookChunker())
+
+    class BackstorySchema(pw.Schema):
+        backstory: str
+        char: str
+        book_name: str
+
+    subject = BackstorySubject(rows, args.index_wait_s)
+    test_table = pw.io.python.read(subject, schema=BackstorySchema, autocommit_duration_ms=50)
+
+    # Set per run and the same in both modes, so only prefetching differs
+    if args.executor == "fully-async":
+        executor = pw.udfs.fully_async_executor(autocommit_duration_ms=50)
+    else:
+        executor = pw.udfs.auto_executor()
+
+    @pw.udf(executor=executor)
+    async def decompose_udf(text: str) -> list[str]:
+        await asyncio.sleep(args.decompose_ms / 1000)
+        return split_claims(text)
+
+    claims_table = test_table.select(
+        original_text=pw.this.backstory,
+        backstory_id=pw.this.id,
+        claims=decompose_udf(pw.this.backstory)
+    ).await_futures()
+
+    auditor = NarrativeAuditor(index_table=index, llm_config={"model": "offline", "api_key": "offline"},
+                               prefetch_k=args.prefetch_k)
+    pool = auditor.prefetch(test_table) if mode == "prefetch" else None
+    atomic_claims = claims_table.flatten(pw.this.claims).select(
+        claim=pw.this.claims,
+        source_text=pw.this.original_text,
+        backstory_id=pw.this.backstory_id
+    )
+    contexts = auditor.select_contexts(atomic_claims, pool)
+
+    done = {}  # backstory -> (claims with context, time of the last one)
+    context_sizes = []
+    clock = time.perf_counter
+
+    def on_change(key, row, time, is_addition):
+        if not is_addition:
+            return
+        now = clock()
+        context_sizes.append(len(row["result"].value))
+        claims_seen, _ = done.get(row["flow"], (0, None))
+        done[row["flow"]] = (claims_seen + 1, now)
+
+    pw.io.subscribe(contexts, on_change)
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+
+    latencies = [
+        done[text][1] - subject.arrived[text]
+        for text in expected
+        if text in done and done[text][0] >= expected[text]
+    ]
+    return {
+        "mode": mode,
+        "backstories": len(latencies),
+        "claims": len(context_sizes),
+        "p50_s": statistics.median(latencies) if latencies else None,
+        "p95_s": sorted(latencies)[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        "mean_s": statistics.mean(latencies) if latencies else None,
+        "avg_context_k": statistics.mean(context_sizes) if context_sizes else 0.0,
+        "embedding_calls": embedder.calls,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-claim retrieval with speculative prefetch.")
+    parser.add_argument("--books-dir", default="data/Books", help="Books to index")
+    parser.add_argument("--train-csv", default="data/train.csv", help="Backstories (content, char, book_name)")
+    parser.add_argument("--backstories", type=int, default=40, help="Backstories to process")
+    parser.add_argument("--decompose-ms", type=float, default=3000, help="Simulated latency of decomposition")
+    parser.add_argument("--embed-ms", type=float, default=300, help="Simulated latency of one embedding request")
+    parser.add_argument("--prefetch-k", type=int, default=40, help="Pool size per backstory")
+    parser.add_argument("--index-wait-s", type=float, default=10.0, help="Delay before backstories arrive (index build)")
+    parser.add_argument("--executor", choices=["async", "fully-async"], action="append",
+                        help="Executor of the decomposition UDF, used in both modes (default: both, one after the other)")
+    parser.add_argument("--mode", choices=["per-claim", "prefetch"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        args.executor = args.executor[0]
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    print(f"{args.backstories} backstories, decomposition {args.decompose_ms:.0f} ms, embedding {args.embed_ms:.0f} ms")
+    print(f"{'executor':<12} {'mode':<10} {'done':>5} {'claims':>7} {'p50 s':>7} {'p95 s':>7} {'mean s':>7} "
+          f"{'ctx k':>6} {'embeds':>7}")
+    for executor in args.executor or ["async", "fully-async"]:
+        reports = {}
+        for mode in ("per-claim", "prefetch"):
+            # The executor given first wins in the child run
+            command = [sys.executable, "-m", "src.benchmark_prefetch", "--mode", mode, "--executor", executor]
+            command += sys.argv[1:]
+            out = subprocess.run(command, check=True, capture_output=True, text=True)
+            reports[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+        for mode, r in reports.items():
+            print(f"{executor:<12} {mode:<10} {r['backstories']:>5} {r['claims']:>7} {r['p50_s']:>7.2f} "
+                  f"{r['p95_s']:>7.2f} {r['mean_s']:>7.2f} {r['avg_context_k']:>6.2f} {r['embedding_calls']:>7}")
+        saved = reports["per-claim"]["mean_s"] - reports["prefetch"]["mean_s"]
+        print(f"{executor:<12} mean latency per backstory drops by {saved:.2f}s "
+              f"({saved / reports['per-claim']['mean_s']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Module: benchmark_server.py
+Description: Load test of the HTTP audit service (src/server.py): throughput and latency
+             at several concurrency levels, for several request-window / batch settings.
+
+By default each setting starts its own offline server: the books are indexed with
+`LatencyEmbedder` (`--embed-ms` per embedding request) and the LLM is simulated by a
+stand-in for `litellm.acompletion` that answers after `--llm-ms` plus `--llm-ms-per-claim`
+for every claim in the prompt (so one batched call is cheaper than many single ones, as
+with a real provider). With `--url`, an already running server is measured instead.
+
+Usage example::
+    python -m src.benchmark_server --concurrency 1 4 16 32 --requests 64
+    python -m src.benchmark_server --url http://localhost:8000/v1/audit
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+import pandas as pd
+
+from src.benchmark_prefetch import LatencyEmbedder, split_claims
+
+# (label, window ms, claims per verification call)
+SETTINGS = (("no batching", 20, 1), ("window 200ms, batch 8", 200, 8), ("window 500ms, batch 16", 500, 16))
+BATCH_CLAIM = re.compile(r"^### Claim \d+:", re.M)
+
+
+def simulated_completion(llm_ms: float, per_claim_ms: float, token_ms: float = 0, reason: str = "simulated"):
+    """
+    Offline stand-in for `litellm.acompletion`. Decomposition prompts get one fact per
+    sentence, validation prompts their claims back, and verification prompts (single or
+    batched) a consistent verdict per claim, with `reason` as the reason.
+
+    The answer takes `llm_ms` plus `per_claim_ms` per claim, plus `token_ms` per output
+    token (4 characters). With `stream=True` it is returned as an async stream of chunks:
+    the first arrives after the fixed part, then one token every `token_ms`.
+    """
+    async def acompletion(messages=None, stream=False, **kwargs):
+        prompt = messages[-1]["content"]
+        batch = BATCH_CLAIM.findall(prompt)
+        if batch:
+            payload = {"verdicts": [{"id": i, "consistent": True, "reason": reason} for i in range(len(batch))]}
+        elif "Extracted Claims:" in prompt:
+            claims = json.loads(prompt.split("Extracted Claims:", 1)[1].split("Task:", 1)[0])
+            payload = {"facts": [{"fact": claim} for claim in claims]}
+        elif '"facts"' in prompt:
+            text = prompt.split("Text:", 1)[1].strip().strip('"')
+            payload = {"facts": [{"fact": claim} for claim in split_claims(text)]}
+        else:
+            payload = {"consistent": True, "confidence": 0.9, "insufficient_evidence": False, "reason": reason}
+        items = len(payload.get("verdicts") or payload.get("facts") or [None])
+        content = json.dumps(payload)
+        tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+        usage = {"completion_tokens": len(tokens), "total_tokens": len(prompt) // 4 + len(tokens)}
+        await asyncio.sleep((llm_ms + per_claim_ms * items) / 1000)
+        if stream:
+            return stream_chunks(tokens, token_ms, usage)
+        await asyncio.sleep(token_ms * len(tokens) / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=usage,
+        )
+
+    return acompletion
+
+
+async def stream_chunks(tokens: list, token_ms: float, usage: dict):
+    """LiteLLM-style stream of `tokens`, one every `token_ms`; the last chunk carries the usage."""
+    for i, token in enumerate(tokens):
+        if i:
+            await asyncio.sleep(token_ms / 1000)
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))], usage=None)
+    yield SimpleNamespace(choices=[], usage=usage)
+
+
+def serve_offline(args) -> None:
+    """Run the audit service over the books with simulated embeddings and LLM."""
+    import pathway as pw
+    from pathway.xpacks import llm
+
+    import src.llm_client
+    from src.analyzer import BackstoryAnalyzer
+    from src.auditor import NarrativeAuditor
+    from src.chunker import BookChunker
+    from src.scheduler import FairScheduler
+    from src.server import build_service
+
+    src.llm_client.acompletion = simulated_completion(args.llm_ms, args.llm_ms_per_claim)
+
+    books = pw.io.fs.read(args.books_dir, format="binary", mode="static", with_metadata=True)
+    index = llm.vector_store.VectorStoreServer(books, embedder=LatencyEmbedder(args.embed_ms / 1000),
+                                               parser=BookChunker())
+    llm_config = {"model": "offline", "api_key": "offline", "pacing_s": 0, "hedge": False}
+    analyzer = BackstoryAnalyzer(llm_config=llm_config)
+    scheduler = FairScheduler(max_concurrency=args.llm_concurrency)
+    analyzer.client.scheduler = scheduler
+    auditor = NarrativeAuditor(index_table=index, llm_config=llm_config,
+                               batch_size=args.batch_size, batch_wait_s=args.window_ms / 1000, commit_ms=args.window_ms)
+    build_service(analyzer, auditor, "127.0.0.1", args.port, args.window_ms, scheduler=scheduler)
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+
+
+async def wait_ready(url: str, timeout_s: float) -> None:
+    """Poll the endpoint until a claim is answered with evidence (the index is built)."""
+    deadline = time.monotonic() + timeout_s
+    async with httpx.AsyncClient(timeout=30) as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.post(url, json={"claim": "The ship sailed from Glasgow."})
+                verdicts = response.json().get("verdicts", [])
+                if response.status_code == 200 and verdicts and verdicts[0]["evidence"]:
+                    return
+            except (httpx.HTTPError, ValueError):
+                pass
+            await asyncio.sleep(1)
+    raise TimeoutError(f"No answer with evidence from {url} within {timeout_s:.0f}s")
+
+
+async def load(url: str, bodies: list, concurrency: int) -> dict:
+    """Send every body with `concurrency` requests in flight; report throughput and latency."""
+    latencies, claims, errors = [], 0, 0
+    pending = iter(bodies)
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal claims, errors
+        for body in pending:
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=body)
+                response.raise_for_status()
+                claims += response.json()["claims"]
+                latencies.append(time.perf_counter() - start)
+            except (httpx.HTTPError, ValueError, KeyError) as e:
+                errors += 1
+                if errors == 1:
+                    print(f"  first error: {type(e).__name__}: {e}")
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(timeout=600, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    ordered = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "claims": claims,
+        "throughput_rps": len(latencies) / elapsed,
+        "claims_per_s": claims / elapsed,
+        "p50_s": statistics.median(ordered) if ordered else float("nan"),
+        "p95_s": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else float("nan"),
+    }
+
+
+def request_bodies(args) -> list:
+    rows = pd.read_csv(args.train_csv)[["content", "char", "book_name"]].astype(str).to_dict("records")
+    if args.kind == "claim":
+        # One request per sentence: verification is the only LLM call
+        rows = [{"claim": claim, "char": r["char"], "book_name": r["book_name"]}
+                for r in rows for claim in split_claims(r["content"])]
+    else:
+        rows = [{"backstory": r["content"], "char": r["char"], "book_name": r["book_name"]} for r in rows]
+    return [rows[i % len(rows)] for i in range(args.requests)]
+
+
+def measure(url: str, args) -> list:
+    asyncio.run(wait_ready(url, args.ready_timeout_s))
+    bodies = request_bodies(args)
+    return [asyncio.run(load(url, bodies, concurrency)) for concurrency in args.concurrency]
+
+
+def print_reports(label: str, reports: list) -> None:
+    print(f"\n{label}")
+    print(f"{'conc':>5} {'ok':>5} {'err':>4} {'req/s':>7} {'claims/s':>9} {'p50 s':>7} {'p95 s':>7}")
+    for r in reports:
+        print(f"{r['concurrency']:>5} {r['requests']:>5} {r['errors']:>4} {r['throughput_rps']:>7.2f} "
+              f"{r['claims_per_s']:>9.2f} {r['p50_s']:>7.2f} {r['p95_s']:>7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and latency of the HTTP audit service.")
+    parser.add_argument("--url", help="Measure a running server instead of starting offline ones")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32], help="Requests in flight")
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--kind", choices=["backstory", "claim"], default="backstory",
+                        help="Send whole backstories or single claims")
+    parser.add_argument("--train-csv", default="data/train.csv", help="Backstories (content, char, book_name)")
+    parser.add_argument("--books-dir", default="data/Books", help="Books to index (offline servers)")
+    parser.add_argument("--embed-ms", type=float, default=50, help="Simulated latency of one embedding request")
+    parser.add_argument("--llm-ms", type=float, default=800, help="Simulated latency of one LLM call")
+    parser.add_argument("--llm-ms-per-claim", type=float, default=50, help="Simulated extra latency per claim in a call")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM calls in flight")
+    parser.add_argument("--port", type=int, default=8765, help="Port of the offline servers")
+    parser.add_argument("--ready-timeout-s", type=float, default=300, help="Longest wait for the index to be built")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--window-ms", type=int, default=200, help=argparse.SUPPRESS)
+    parser.add_argument("--batch-size", type=int, default=8, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve_offline(args)
+        return
+    if args.url:
+        print_reports(args.url, measure(args.url, args))
+        return
+
+    url = f"http://127.0.0.1:{args.port}/v1/audit"
+    print(f"LLM {args.llm_ms:.0f} ms + {args.llm_ms_per_claim:.0f} ms/claim, {args.llm_concurrency} in flight; "
+          f"{args.requests} requests per level")
+    for label, window_ms, batch_size in SETTINGS:
+        command = [sys.executable, "-m", "src.benchmark_server", "--serve",
+                   "--window-ms", str(window_ms), "--batch-size", str(batch_size)] + sys.argv[1:]
+        with tempfile.TemporaryFile() as log:
+            server = subprocess.Popen(command, stdout=log, stderr=subprocess.STDOUT)
+            try:
+                reports = measure(url, args)
+            finally:
+                server.terminate()
+                server.wait()
+            print_reports(label, reports)
+            if any(r["errors"] for r in reports):
+                log.seek(0)
+                print(log.read().decode(errors="replace")[-2000:])
+
+
+if __name__ == "__main__":
+    main()
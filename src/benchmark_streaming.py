@@ -0,0 +1,120 @@
+"""
+Module: benchmark_streaming.py
+Description: Verdict latency (until `ask_verifier` returns) and output tokens per claim with
+             buffered, streamed and early-stopped verification calls, plus the share of
+             malformed responses recovered by local JSON repair.
+
+The LLM is simulated offline: each answer takes `--ttft-ms` before its first token and
+`--token-ms` per output token (4 characters), and verdicts carry a reason of realistic
+length. `--malformed-rate` of the verification answers are corrupted the way models slip
+(single quotes and Python literals, trailing commas, code fences, a cut-off reason). Before
+incremental parsing, every one of those became a "consistent: false" error verdict.
+
+Usage example::
+    python -m src.benchmark_streaming --claims 64 --ttft-ms 400 --token-ms 15 --malformed-rate 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+
+import src.llm_client
+from src.auditor import ask_verifier, build_verification_prompt
+from src.benchmark_prefetch import split_claims
+from src.benchmark_server import simulated_completion, stream_chunks
+from src.llm_client import get_llm_client
+
+REASON = ("The second passage states that he left the port of Glasgow in the spring of 1864 on board the "
+          "Duncan, which agrees with both the place and the year given in the claim.")
+MODES = (("buffered", False, False), ("streamed", True, False), ("streamed + early stop", True, True))
+
+
+def corrupt(content: str, kind: int) -> str:
+    """One of the usual ways a model breaks its JSON."""
+    if kind == 0:
+        return content.replace('"', "'").replace("true", "True").replace("false", "False")
+    if kind == 1:
+        return content[:-1] + ",}"
+    if kind == 2:
+        return f"```json\n{content}\n```"
+    return content[:int(len(content) * 0.8)]  # cut off in the reason
+
+
+def timed_completion(ttft_ms: float, token_ms: float, malformed_rate: float, seed: int = 0):
+    """`simulated_completion` with per-token output time and a share of malformed answers."""
+    answer = simulated_completion(ttft_ms, 0, reason=REASON)
+    rng = random.Random(seed)
+    counts = {"malformed": 0, "unparseable": 0}
+
+    async def acompletion(messages=None, stream=False, **kwargs):
+        response = await answer(messages=messages, **kwargs)
+        content = response.choices[0].message.content
+        if '"consistent"' in content and rng.random() < malformed_rate:
+            content = corrupt(content, counts["malformed"] % 4)
+            counts["malformed"] += 1
+            try:
+                json.loads(content)
+            except json.JSONDecodeError:
+                counts["unparseable"] += 1
+        tokens = [content[i:i + 4] for i in range(0, len(content), 4)]
+        usage = {"completion_tokens": len(tokens), "total_tokens": response.usage["total_tokens"]}
+        if stream:
+            return stream_chunks(tokens, token_ms, usage)
+        await asyncio.sleep(token_ms * len(tokens) / 1000)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+    return acompletion, counts
+
+
+async def verify_all(claims: list, stream: bool, early_stop: bool, label: str) -> dict:
+    client = get_llm_client({"model": f"offline/{label}", "hedge": False})
+    context = [{"text": "He left the port of Glasgow in the spring of 1864 on board the Duncan.", "metadata": {}}]
+    start = time.perf_counter()
+    verdicts = await asyncio.gather(*(
+        ask_verifier(client, build_verification_prompt(claim, context), claim, claim, 0,
+                     stream=stream, early_stop=early_stop)
+        for claim in claims
+    ))
+    seconds = time.perf_counter() - start
+    latencies = sorted(client.verdict_latencies)
+    return {
+        "seconds": seconds,
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "tokens": statistics.mean(client.verdict_tokens),
+        "repaired": client.stats["json_repaired"],
+        "errors": sum(str(v.get("reason", "")).startswith("Error during verification") for v in verdicts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs. streamed LLM responses.")
+    parser.add_argument("--claims", type=int, default=64, help="Claims verified per mode")
+    parser.add_argument("--train-csv", default="data/train.csv", help="Source of the claims")
+    parser.add_argument("--ttft-ms", type=float, default=400, help="Simulated time to the first output token")
+    parser.add_argument("--token-ms", type=float, default=15, help="Simulated time per output token")
+    parser.add_argument("--malformed-rate", type=float, default=0.1, help="Share of verification answers corrupted")
+    args = parser.parse_args()
+
+    backstories = pd.read_csv(args.train_csv)["content"].astype(str).tolist()
+    claims = list(dict.fromkeys(c for text in backstories for c in split_claims(text)))[:args.claims]
+
+    print(f"{len(claims)} claims; first token after {args.ttft_ms:.0f} ms, {args.token_ms:.0f} ms per output token, "
+          f"{args.malformed_rate:.0%} of verdicts malformed")
+    print(f"{'verification':<24} {'verdict p50':>12} {'p95':>7} {'tokens/claim':>13} {'wall':>6} "
+          f"{'malformed':>10} {'repaired':>9} {'errors':>7}")
+    for label, stream, early_stop in MODES:
+        src.llm_client.acompletion, counts = timed_completion(args.ttft_ms, args.token_ms, args.malformed_rate)
+        result = asyncio.run(verify_all(claims, stream, early_stop, label))
+        print(f"{label:<24} {result['p50']:>11.2f}s {result['p95']:>6.2f}s {result['tokens']:>13.1f} "
+              f"{result['seconds']:>5.1f}s {counts['unparseable']:>10} {result['repaired']:>9} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
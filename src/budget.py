@@ -0,0 +1,114 @@
+"""
+Module: budget.py
+Description: Run-level budget on LLM tokens, calls and wall-clock time, with a ladder
+             of cheaper pipeline modes as the budget runs low.
+"""
+
+import collections
+import time
+from typing import Optional
+
+# Degradation ladder, cheapest last. Each mode keeps the savings of the modes before it.
+MODES = ("full", "skip_validation", "small_k", "packed_context", "batched", "exhausted")
+
+
+class BudgetController:
+    """
+    Tracks LLM usage across `BackstoryAnalyzer` and `NarrativeAuditor` and picks a mode.
+
+    The shared `LLMClient` reports every provider request (`record`). The remaining share
+    of the budget is the minimum over the configured limits (tokens, calls, seconds); the
+    mode steps down the ladder as it shrinks:
+
+        remaining > 50%     full             both decomposition stages, full context
+        30-50%              skip_validation  decomposition skips the self-correction call
+        15-30%              small_k          verification uses at most `small_k` chunks, no retries beyond 2
+        5-15%               packed_context   each chunk is cut to its `pack_chars` most relevant sentences
+        0-5%                batched          claims are verified `batch_size` at a time in one call
+        0%                  exhausted        no further LLM calls; claims get an explicit "budget" reason
+    """
+
+    LADDER = ((0.5, "full"), (0.3, "skip_validation"), (0.15, "small_k"), (0.05, "packed_context"), (0.0, "batched"))
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        max_calls: Optional[int] = None,
+        max_seconds: Optional[float] = None,
+        small_k: int = 2,
+        pack_chars: int = 600,
+        batch_size: int = 8,
+        batch_wait_s: float = 2.0,
+    ):
+        """
+        Initialize the budget. Limits left as None are not enforced.
+
+        Args:
+            max_tokens (int): Total prompt + completion tokens for the run.
+            max_calls (int): Total LLM requests for the run (hedged duplicates included).
+            max_seconds (float): Wall-clock time for the run, counted from construction.
+            small_k (int): Chunks kept per claim from `small_k` mode on.
+            pack_chars (int): Characters kept per chunk from `packed_context` mode on.
+            batch_size (int): Claims per verification call in `batched` mode.
+            batch_wait_s (float): Longest wait for a verification batch to fill up.
+        """
+        self.max_tokens = max_tokens
+        self.max_calls = max_calls
+        self.max_seconds = max_seconds
+        self.small_k = small_k
+        self.pack_chars = pack_chars
+        self.batch_size = batch_size
+        self.batch_wait_s = batch_wait_s
+
+        self.started_at = time.monotonic()
+        self.tokens = 0
+        self.calls = 0
+        self.mode_counts = collections.Counter()
+
+    def record(self, response=None) -> None:
+        """Count one LLM request and, when the response reports usage, its tokens."""
+        self.calls += 1
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if total is None and isinstance(usage, dict):
+            total = usage.get("total_tokens")
+        if isinstance(total, (int, float)):
+            self.tokens += int(total)
+
+    def remaining(self) -> float:
+        """Smallest remaining share (0..1) across the enforced limits; 1.0 if none are set."""
+        shares = [1.0]
+        if self.max_tokens:
+            shares.append(1 - self.tokens / self.max_tokens)
+        if self.max_calls:
+            shares.append(1 - self.calls / self.max_calls)
+        if self.max_seconds:
+            shares.append(1 - (time.monotonic() - self.started_at) / self.max_seconds)
+        return max(0.0, min(shares))
+
+    def mode(self) -> str:
+        """Current mode on the degradation ladder."""
+        remaining = self.remaining()
+        if remaining <= 0:
+            return "exhausted"
+        for floor, mode in self.LADDER:
+            if remaining > floor:
+                return mode
+        return "batched"
+
+    def use(self) -> str:
+        """Current mode, counted as the mode of one verdict or decomposition."""
+        mode = self.mode()
+        self.mode_counts[mode] += 1
+        return mode
+
+    @staticmethod
+    def at_least(mode: str, level: str) -> bool:
+        """True if `mode` is `level` or further down the ladder."""
+        return MODES.index(mode) >= MODES.index(level)
+
+    def report(self) -> str:
+        elapsed = time.monotonic() - self.started_at
+        modes = ", ".join(f"{m}: {self.mode_counts[m]}" for m in MODES if self.mode_counts[m])
+        return (f"Budget - {self.remaining():.0%} left ({self.tokens} tokens, {self.calls} calls, {elapsed:.0f}s); "
+                f"mode {self.mode()}; verdicts by mode: {modes or 'none'}")
@@ -0,0 +1,249 @@
+"""
+Module: chunk_store.py
+Description: Memory-mapped book store that represents chunks as byte spans and
+             materializes their text only on demand.
+"""
+
+import bisect
+import mmap
+import os
+import threading
+from typing import Dict, List, NamedTuple, Optional
+
+from src.chunker import BookChunker, chunk_digest
+
+
+class ChunkSpan(NamedTuple):
+    """A chunk as a reference into its source file: `file_id` is the book's path."""
+
+    file_id: str
+    start: int
+    end: int
+
+
+class ChunkStore:
+    """
+    Keeps one read-only memory map per book and resolves chunk spans against it.
+
+    Chunks carry `path`, `start` and `end` metadata (see `BookChunker`), so retrieval
+    results can drop their text and keep only the span; `text()` decodes the bytes when a
+    prompt is built or output is written. Pages are served from the OS page cache and are
+    shared, not copied, across every result that references them.
+
+    A map is reopened when its file is replaced, grows or is modified, so books that are
+    updated while the pipeline runs keep resolving. A chunk whose bytes moved (an edit
+    earlier in the book) is found again by its digest, see `locate`.
+
+    The store is shared by the engine and the async UDF threads: maps are swapped and
+    sliced under a lock, and a replaced map is never closed while a reader may hold it
+    (it is released once unreferenced). Books must be updated by an atomic rename
+    (`replace_book`), not rewritten in place: reading a mapped page past the end of a
+    truncated file kills the process (SIGBUS).
+    """
+
+    def __init__(self, chunker: BookChunker = None):
+        """
+        Initialize the store.
+
+        Args:
+            chunker (BookChunker): Chunker used by `add_book` and `neighbors`.
+        """
+        self.chunker = chunker or BookChunker()
+        self._maps: Dict[str, tuple] = {}  # file_id -> (mmap, (inode, size, mtime))
+        self._spans: Dict[str, List[dict]] = {}
+        self._lock = threading.RLock()
+
+    def _map(self, file_id: str) -> mmap.mmap:
+        """Current map of a book; call with the lock held."""
+        stat = os.stat(file_id)
+        version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        cached = self._maps.get(file_id)
+        if cached is not None and cached[1] == version:
+            return cached[0]
+        # The replaced map is not closed: another thread may still be slicing it
+        self._spans.pop(file_id, None)
+        with open(file_id, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else b""
+        self._maps[file_id] = (mapped, version)
+        return mapped
+
+    def _read(self, span: ChunkSpan) -> bytes:
+        """Copy of the bytes of a span, taken under the lock."""
+        with self._lock:
+            return self._map(span.file_id)[span.start:span.end]
+
+    def add_book(self, path: str) -> List[ChunkSpan]:
+        """
+        Map a book and chunk it without copying its text.
+
+        Args:
+            path (str): Path of the book; used as its file_id.
+
+        Returns:
+            List[ChunkSpan]: The book's chunks in file order.
+        """
+        return [ChunkSpan(path, meta["start"], meta["end"]) for meta in self.chunk_metadata(path)]
+
+    def chunk_metadata(self, file_id: str) -> List[dict]:
+        """Chunker metadata (chapter, chunk_index, start, end) of a book, computed once per version."""
+        with self._lock:
+            mapped = self._map(file_id)
+            if file_id not in self._spans:
+                self._spans[file_id] = self.chunker.spans(mapped)
+            return self._spans[file_id]
+
+    def text(self, span: ChunkSpan) -> str:
+        """Materialize the text of one span."""
+        return self._read(span).decode("utf-8", errors="replace").strip()
+
+    @staticmethod
+    def span_of(chunk: dict) -> Optional[ChunkSpan]:
+        """The span of a retrieved chunk, or None when its metadata has no byte offsets."""
+        meta = chunk.get("metadata") or {}
+        if meta.get("path") is None or meta.get("start") is None or meta.get("end") is None:
+            return None
+        return ChunkSpan(meta["path"], int(meta["start"]), int(meta["end"]))
+
+    def locate(self, chunk: dict) -> Optional[ChunkSpan]:
+        """
+        Current span of a retrieved chunk.
+
+        Chunks with a `digest` (see `BookChunker.spans`) are checked against the bytes at
+        their span; when those changed, the chunk with the same digest (preferably in the
+        same chapter, then the nearest) is looked up in the current version of the book.
+
+        Returns:
+            Optional[ChunkSpan]: The span, or None when the chunk has no byte offsets or its
+                                 content is no longer in the book.
+        """
+        span = self.span_of(chunk)
+        digest = (chunk.get("metadata") or {}).get("digest")
+        if span is None or digest is None:
+            return span
+        if chunk_digest(self._read(span)) == digest:
+            return span
+        chapter = chunk["metadata"].get("chapter")
+        moved = [m for m in self.chunk_metadata(span.file_id) if m["digest"] == digest]
+        if not moved:
+            return None
+        best = min(moved, key=lambda m: (m["chapter"] != chapter, abs(m["start"] - span.start)))
+        return ChunkSpan(span.file_id, best["start"], best["end"])
+
+    def text_of(self, chunk: dict) -> str:
+        """Text of a retrieved chunk: inline text if present, otherwise read through its span."""
+        if chunk.get("text") is not None:
+            return chunk["text"]
+        try:
+            span = self.locate(chunk)
+            return self.text(span) if span is not None else ""
+        except (OSError, ValueError):  # book removed, or the store closed
+            return ""
+
+    def neighbors(self, span: ChunkSpan, radius: int = 1) -> List[ChunkSpan]:
+        """
+        Spans of the chunks surrounding `span` in the same book (excluding `span` itself).
+
+        Args:
+            span (ChunkSpan): The anchor chunk.
+            radius (int): Chunks to take on each side.
+        """
+        metas = self.chunk_metadata(span.file_id)
+        starts = [m["start"] for m in metas]
+        position = bisect.bisect_right(starts, span.start) - 1
+        if position < 0 or metas[position]["end"] < span.end:
+            return []
+        lo, hi = max(0, position - radius), min(len(metas), position + radius + 1)
+        return [ChunkSpan(span.file_id, m["start"], m["end"]) for m in metas[lo:hi] if m["start"] != span.start]
+
+    def expand(self, chunks: List[dict], radius: int = 1) -> List[dict]:
+        """
+        Add the chunks surrounding each retrieved chunk, found by file offset.
+
+        Args:
+            chunks (List[dict]): Retrieved chunks; those without a span are kept as they are.
+            radius (int): Neighbors to add on each side of every chunk.
+
+        Returns:
+            List[dict]: Original and neighbor chunks in file order (neighbors marked
+                        `expanded`), followed by the chunks that have no span.
+        """
+        with_span, without_span = {}, []
+        for chunk in chunks:
+            try:
+                span = self.locate(chunk)
+            except (OSError, ValueError):
+                span = self.span_of(chunk)
+            if span is None:
+                without_span.append(chunk)
+                continue
+            if span != self.span_of(chunk):
+                chunk = {**chunk, "metadata": {**chunk["metadata"], "start": span.start, "end": span.end}}
+            with_span.setdefault(span, chunk)
+
+        for span in list(with_span):
+            try:
+                metas = {m["start"]: m for m in self.chunk_metadata(span.file_id)}
+                neighbors = self.neighbors(span, radius)
+            except (OSError, ValueError):
+                continue
+            for neighbor in neighbors:
+                if neighbor not in with_span:
+                    meta = dict(metas[neighbor.start], path=neighbor.file_id)
+                    with_span[neighbor] = {"metadata": meta, "expanded": True}
+
+        ordered = [with_span[span] for span in sorted(with_span)]
+        return ordered + without_span
+
+    def close(self) -> None:
+        """Release every memory map."""
+        with self._lock:
+            for mapped, _ in self._maps.values():
+                if isinstance(mapped, mmap.mmap):
+                    mapped.close()
+            self._maps.clear()
+            self._spans.clear()
+
+
+def replace_book(path: str, text: str) -> None:
+    """
+    Write a new version of a book with an atomic rename, so that memory maps of the
+    previous version stay valid (see `ChunkStore`).
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def drop_text(chunks: List[dict]) -> List[dict]:
+    """
+    Replace chunk text by its span reference wherever the metadata allows it.
+
+    Chunks without byte offsets (e.g. from a mock index) keep their text.
+    """
+    compact = []
+    for chunk in chunks:
+        if ChunkStore.span_of(chunk) is not None:
+            chunk = {k: v for k, v in chunk.items() if k != "text"}
+        compact.append(chunk)
+    return compact
+
+
+def attach_text(chunks: List[dict], chunk_store: ChunkStore = None) -> List[dict]:
+    """
+    Inverse of `drop_text`: give every chunk its text again, read through its span.
+    Used when results are written out, so output files carry the evidence itself.
+    """
+    chunk_store = chunk_store or get_chunk_store()
+    return [{**chunk, "text": chunk_store.text_of(chunk)} for chunk in chunks]
+
+
+_store: Optional[ChunkStore] = None
+
+
+def get_chunk_store() -> ChunkStore:
+    """Return the process-wide chunk store, creating it on first use."""
+    global _store
+    if _store is None:
+        _store = ChunkStore()
+    return _store
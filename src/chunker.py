@@ -0,0 +1,140 @@
+"""
+Module: chunker.py
+Description: Chapter-aware paragraph chunking of plain-text novels with byte offsets.
+"""
+
+import hashlib
+import re
+from typing import List, Tuple
+
+# "CHAPTER IV." (Verne) or "Chapter 8. The Château d’If" (Dumas), on a line of its own.
+CHAPTER_HEADING = re.compile(rb"^[ \t]*(?:CHAPTER|Chapter)[ \t]+(?:[IVXLCDM]+|\d+)\b[^\r\n]*$", re.MULTILINE)
+PARAGRAPH_BREAK = re.compile(rb"(?:\r?\n)[ \t]*(?:\r?\n)+")
+NON_SPACE = re.compile(rb"\S")
+
+
+class BookChunker:
+    """
+    Splits a book into paragraph-aligned chunks that never cross a chapter boundary.
+
+    Usable directly as a Pathway `VectorStoreServer` parser: it takes the raw file bytes
+    and returns `(text, metadata)` pairs, where metadata carries the chapter number and
+    title, the chunk's position within the file, its byte span and a digest of its bytes
+    (which identifies the chunk after an edit elsewhere in the book shifts its span).
+    """
+
+    def __init__(self, chunk_size: int = 1500, min_chapter_bytes: int = 300):
+        """
+        Initialize the chunker.
+
+        Args:
+            chunk_size (int): Target chunk size in bytes; paragraphs are packed up to this size.
+            min_chapter_bytes (int): Headings closer together than this (tables of contents)
+                                     are not treated as chapter starts.
+        """
+        self.chunk_size = chunk_size
+        self.min_chapter_bytes = min_chapter_bytes
+
+    def __call__(self, contents: bytes) -> List[Tuple[str, dict]]:
+        return self.chunk(contents)
+
+    def chapters(self, contents: bytes) -> List[Tuple[int, str, int, int]]:
+        """
+        Locate chapters in the book.
+
+        Returns:
+            List[Tuple[int, str, int, int]]: (chapter number, title, byte start, byte end).
+                                             Chapter 0 is the front matter before the first heading.
+        """
+        headings = [m for m in CHAPTER_HEADING.finditer(contents)]
+        starts = [
+            m for i, m in enumerate(headings)
+            if (headings[i + 1].start() if i + 1 < len(headings) else len(contents)) - m.start() >= self.min_chapter_bytes
+        ]
+
+        chapters = []
+        first = starts[0].start() if starts else len(contents)
+        if first > 0:
+            chapters.append((0, "", 0, first))
+        for number, match in enumerate(starts, 1):
+            end = starts[number].start() if number < len(starts) else len(contents)
+            title = match.group(0).decode("utf-8", errors="replace").strip()
+            chapters.append((number, title, match.start(), end))
+        return chapters
+
+    def chunk(self, contents: bytes) -> List[Tuple[str, dict]]:
+        """
+        Chunk a book.
+
+        Args:
+            contents (bytes): Raw UTF-8 file contents.
+
+        Returns:
+            List[Tuple[str, dict]]: Chunk text and metadata
+                                    (chapter, chapter_title, chunk_index, start, end, digest).
+        """
+        if isinstance(contents, str):
+            contents = contents.encode("utf-8")
+        return self.materialize(contents, self.spans(contents))
+
+    @staticmethod
+    def materialize(contents: bytes, spans: List[dict]) -> List[Tuple[str, dict]]:
+        """Attach the text of each span (as returned by `spans`) to its metadata."""
+        return [
+            (contents[meta["start"]:meta["end"]].decode("utf-8", errors="replace").strip(), meta)
+            for meta in spans
+        ]
+
+    def spans(self, contents) -> List[dict]:
+        """
+        Chunk a book without materializing any text.
+
+        Args:
+            contents: Raw file contents; any bytes-like object, including an `mmap`.
+
+        Returns:
+            List[dict]: Chunk metadata (chapter, chapter_title, chunk_index, start, end, digest).
+                        Whitespace-only spans are skipped.
+        """
+        spans = []
+        for chapter, title, chapter_start, chapter_end in self.chapters(contents):
+            for start, end in self._pack_paragraphs(contents, chapter_start, chapter_end):
+                if not NON_SPACE.search(contents, start, end):
+                    continue
+                spans.append({
+                    "chapter": chapter,
+                    "chapter_title": title,
+                    "chunk_index": len(spans),
+                    "start": start,
+                    "end": end,
+                    "digest": chunk_digest(contents[start:end]),
+                })
+        return spans
+
+    def _pack_paragraphs(self, contents: bytes, start: int, end: int) -> List[Tuple[int, int]]:
+        """Greedily pack whole paragraphs of [start, end) into spans of about chunk_size bytes."""
+        spans = []
+        span_start = start
+        last_break = None
+        for brk in PARAGRAPH_BREAK.finditer(contents, start, end):
+            if brk.start() - span_start > self.chunk_size and last_break is not None and last_break.start() > span_start:
+                spans.append((span_start, last_break.start()))
+                span_start = last_break.end()
+            last_break = brk
+        if span_start < end:
+            spans.append((span_start, end))
+        return spans
+
+
+def chunk_digest(data: bytes) -> str:
+    """Short content hash of a chunk's bytes."""
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def chunk_spans(contents: bytes, chunk_size: int = 1500, min_chapter_bytes: int = 300) -> List[dict]:
+    """
+    `BookChunker.spans` as a module-level function, so it can be sent to worker processes
+    (see src/parallel_parser.py). This module must not import pathway: spawned workers
+    import it and should start quickly.
+    """
+    return BookChunker(chunk_size, min_chapter_bytes).spans(contents)
@@ -8,11 +8,11 @@ def normalize_bool(val):
         return val.lower() == "true"
     return bool(val)
 
-def compute_metrics():
+def compute_metrics(gold_path="data/gold_standard.csv", results_path="results/evaluation_results.csv"):
     # Load Expectation
     try:
-        gold_df = pd.read_csv("data/gold_standard.csv")
-        results_df = pd.read_csv("results/evaluation_results.csv")
+        gold_df = pd.read_csv(gold_path)
+        results_df = pd.read_csv(results_path)
     except FileNotFoundError:
         print("Waiting for files...")
         return
@@ -51,6 +51,10 @@ def compute_metrics():
     print(f"ACCURACY:  {accuracy:.2%}")
     print(f"PRECISION: {precision:.2%}")
     print(f"RECALL:    {recall:.2%}")
+    if 'context_k' in merged:
+        print(f"AVG CONTEXT CHUNKS: {merged['context_k'].mean():.2f}")
+    if 'expanded' in merged:
+        print(f"EXPANDED CONTEXT:  {merged['expanded'].apply(normalize_bool).mean():.2%}")
     print("="*30)
     
     # Show Failures
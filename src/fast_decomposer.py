@@ -0,0 +1,110 @@
+"""
+Module: fast_decomposer.py
+Description: CPU-only rule-based decomposition of simple backstories into atomic claims.
+"""
+
+import re
+from typing import List
+
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"“‘(]?[A-Z0-9])")
+WORD = re.compile(r"[\w’'-]+")
+ENTITY = re.compile(r"\b(?:[A-Z][\w’'-]+|\d[\d,.]*)")
+MARKUP = re.compile(r"\*\*|__")
+
+# Markers of embedded clauses that usually need rewriting (not just splitting) to stay atomic
+SUBORDINATORS = {"which", "who", "whom", "whose", "while", "although", "though", "because", "whereas", "unless"}
+TIME_MARKERS = {"after", "before", "when", "until", "since"}
+# Clause boundaries the fast path can split on: the right side becomes its own claim
+CLAUSE_BREAK = re.compile(r";\s+|,\s+(?:and|but|yet|so)\s+")
+SUBJECTS = {"he", "she", "they", "it", "we", "i", "his", "her", "their", "its", "the", "a", "an"}
+
+
+def entities(text: str) -> set:
+    """Names and numbers in a text (capitalized words and digit runs)."""
+    return {e.rstrip(".,") for e in ENTITY.findall(text)}
+
+
+class FastDecomposer:
+    """
+    Splits short, plain backstories into claims without an LLM.
+
+    Texts are scored by `complexity`; only those at or below `threshold` are accepted.
+    Accepted texts are split into sentences, then at clause boundaries (';' and ', and' /
+    ', but' followed by a new subject). Text is never rewritten or dropped beyond the
+    conjunction itself, so every name, date and number of the backstory stays in a claim.
+    """
+
+    def __init__(self, threshold: float = 2.0, min_clause_words: int = 3):
+        """
+        Initialize the decomposer.
+
+        Args:
+            threshold (float): Highest complexity score handled locally.
+            min_clause_words (int): Shortest clause that is split off into its own claim.
+        """
+        self.threshold = threshold
+        self.min_clause_words = min_clause_words
+
+    def complexity(self, text: str) -> float:
+        """
+        Score how hard a backstory is to decompose with rules.
+
+        0.05 per word, 0.5 per extra sentence, 1.0 per relative / concessive clause marker,
+        0.5 per temporal clause marker and 0.5 per clause boundary.
+        """
+        words = [w.lower() for w in WORD.findall(text)]
+        sentences = len(self._sentences(text))
+        return (
+            0.05 * len(words)
+            + 0.5 * max(0, sentences - 1)
+            + 1.0 * sum(w in SUBORDINATORS for w in words)
+            + 0.5 * sum(w in TIME_MARKERS for w in words)
+            + 0.5 * len(CLAUSE_BREAK.findall(text))
+        )
+
+    def accepts(self, text: str) -> bool:
+        """True if the backstory is simple enough for the fast path."""
+        return bool(text and text.strip()) and self.complexity(text) <= self.threshold
+
+    def decompose(self, text: str) -> List[str]:
+        """
+        Split a backstory into sentence and clause level claims.
+
+        Args:
+            text (str): The backstory.
+
+        Returns:
+            List[str]: Claims in text order, each ending with a period.
+        """
+        claims = []
+        for sentence in self._sentences(MARKUP.sub("", text)):
+            claims.extend(self._clauses(sentence))
+        return [self._finish(claim) for claim in claims if WORD.search(claim)]
+
+    @staticmethod
+    def _sentences(text: str) -> List[str]:
+        return [s.strip() for s in SENTENCE_BREAK.split(text.strip()) if s.strip()]
+
+    def _clauses(self, sentence: str) -> List[str]:
+        parts = [sentence]
+        for match in reversed(list(CLAUSE_BREAK.finditer(sentence))):
+            left, right = parts[0][:match.start()], parts[0][match.end():]
+            words = WORD.findall(right)
+            if len(words) < self.min_clause_words:
+                continue
+            # A semicolon always joins independent clauses; a conjunction only when a new subject follows
+            if not match.group().startswith(";") and not self._starts_clause(words[0]):
+                continue
+            parts = [left, right] + parts[1:]
+        return parts
+
+    @staticmethod
+    def _starts_clause(word: str) -> bool:
+        # A new clause starts with a pronoun / determiner or a name, not a bare verb
+        return word.lower() in SUBJECTS or word[0].isupper()
+
+    @staticmethod
+    def _finish(claim: str) -> str:
+        claim = claim.strip().rstrip(",;:")
+        claim = claim[0].upper() + claim[1:]
+        return claim if claim[-1] in ".!?\"”’)" else claim + "."
@@ -1,57 +1,237 @@
+"""
+Module: generate_stress_data.py
+Description: Seeded generator of synthetic novels with planted facts and matching
+             backstory CSVs, for testing the pipeline at production corpus sizes.
+
+Books are streamed to disk chapter by chapter, so multi-GB corpora never sit in memory.
+
+Output layout (under --out)::
+    Books/<title>.txt   chaptered novels ("CHAPTER XII." headings)
+    train.csv           backstories in the train.csv schema: id,book_name,char,caption,content,label
+    facts.jsonl         every planted fact with its book, chapter and byte span
+
+Usage example::
+    python -m src.generate_stress_data --books 20 --book-mb 5 --facts-per-book 500 --rows 2000
+"""
 
+import argparse
+import csv
+import json
 import os
 import random
+from typing import Dict, Iterator, List, Set
 
-DATA_DIR = "data/mini"
-if not os.path.exists(DATA_DIR):
-    os.makedirs(DATA_DIR)
-
-# 1. Generate Long Book (approx 50KB)
-book_path = os.path.join(DATA_DIR, "long_book.txt")
-print(f"Generating {book_path}...")
-
-chapters = []
-for i in range(1, 21): # 20 Chapters
-    chapter_content = f"Chapter {i}: The Journey Continues\n\n"
-    # Filler text
-    chapter_content += "The spaceship hummed with a low vibration. Captain Reynolds checked the navigation charts. " * 50
-    # Specific facts for testing
-    if i == 5:
-        chapter_content += "On Stardate 4523.1, the crew discovered the Lost City of Zara. It was built of crystal and light. "
-    if i == 10:
-        chapter_content += "Lieutenant Commander Data (no relation) accidentally deleted the archives on Tuesday. "
-    if i == 15:
-        chapter_content += "The alien artifact was exactly 4.2 meters tall and vibrated at 400Hz. "
-    
-    chapter_content += "\nThere was silence in the void. " * 20
-    chapters.append(chapter_content)
-
-with open(book_path, "w") as f:
-    f.write("\n".join(chapters))
-
-# Remove sample_book.txt to avoid confusion
-if os.path.exists(os.path.join(DATA_DIR, "sample_book.txt")):
-    os.remove(os.path.join(DATA_DIR, "sample_book.txt"))
-
-# 2. Generate Long Backstory CSV
-csv_path = "data/test_mini.csv"
-print(f"Generating {csv_path}...")
-
-# Mix of True and False claims related to the specific facts above
-backstory = """
-1. Captain Reynolds commands the spaceship.
-2. The crew discovered the Lost City of Zara on Stardate 4523.1.
-3. The Lost City of Zara was built of mud and brick. (False)
-4. Lieutenant Commander Data deleted the archives.
-5. The archives were deleted on a Wednesday. (False - Tuesday)
-6. The alien artifact was 4.2 meters tall.
-7. The artifact vibrated at 400Hz.
-8. The artifact was green. (False - Not mentioned)
-9. The ship hummed with a high-pitched whine. (False - low vibration)
-10. There are 20 chapters in this chronicle. (Inferred)
-"""
+SYLLABLES = ["ar", "bel", "cor", "dan", "el", "far", "gil", "hal", "is", "jor", "kel", "lan", "mor",
+             "nav", "or", "pel", "quin", "ros", "sel", "tor", "ul", "var", "wen", "yor", "zan"]
+PLACES = ["Valparaiso", "the Azores", "Tristan da Cunha", "Melbourne", "the Cape", "Lisbon", "Marseilles",
+          "Smyrna", "Batavia", "Callao", "Aden", "Bombay", "Havana", "Bordeaux", "Hobart", "Montevideo"]
+MONTHS = ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+          "October", "November", "December"]
+ITEMS = ["barrels of powder", "letters", "gold coins", "crates of tea", "muskets", "charts", "horses"]
+RELATIONS = ["brother", "sister", "cousin", "guardian", "godfather", "uncle", "aunt", "apprentice"]
+SHIP_WORDS = ["Albatross", "Perseverance", "Morning Star", "Dauntless", "Ariel", "Nautilus", "Seraph",
+              "Providence", "Fortune", "Halcyon", "Meridian", "Valiant"]
+FILLER_WORDS = ("the sea was grey and the wind rose slowly over the deck while the crew watched the "
+                "horizon in silence for any sign of land and the old captain walked between the masts "
+                "with his hands behind his back thinking of the long voyage still ahead of them").split()
+
+
+def roman(number: int) -> str:
+    numerals = [(1000, "M"), (900, "CM"), (500, "D"), (400, "CD"), (100, "C"), (90, "XC"), (50, "L"),
+                (40, "XL"), (10, "X"), (9, "IX"), (5, "V"), (4, "IV"), (1, "I")]
+    out = ""
+    for value, letters in numerals:
+        while number >= value:
+            out += letters
+            number -= value
+    return out
+
+
+class FactFactory:
+    """
+    Creates facts and their contradicting variants.
+
+    Each fact is a dict with `type` (date, number, name, relation), the character it is about,
+    the `sentence` planted in the book, and a `false_sentence` changing exactly one detail.
+    A false sentence is never one of the character's true sentences (and vice versa), so a
+    contradicting backstory is always contradicted by the book.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+
+    def name(self) -> str:
+        first = "".join(self.rng.choice(SYLLABLES) for _ in range(2)).capitalize()
+        last = "".join(self.rng.choice(SYLLABLES) for _ in range(3)).capitalize()
+        return f"{first} {last}"
+
+    def make(self, char: str, others: List[str], true: Set[str] = frozenset(),
+             false: Set[str] = frozenset(), attempts: int = 100) -> dict:
+        """
+        Create a fact about `char`, re-drawn until it does not collide with `true` (sentences
+        already planted for the character) or `false` (their false variants).
+
+        Raises:
+            ValueError: When no such fact is found in `attempts` draws.
+        """
+        others = [other for other in others if other != char]
+        for _ in range(attempts):
+            fact = self._draw(char, others)
+            if fact["false_sentence"] not in true and fact["sentence"] not in false:
+                return fact
+        raise ValueError(f"No distinct fact left for {char}")
+
+    def _draw(self, char: str, others: List[str]) -> dict:
+        rng = self.rng
+        kind = rng.choice(["date", "number", "name", "relation"])
+        if kind == "date":
+            place, day, month = rng.choice(PLACES), rng.randint(1, 28), rng.choice(MONTHS)
+            year = rng.randint(1780, 1880)
+            fake = year + rng.choice([-1, 1]) * rng.randint(1, 12)
+            sentence = f"{char} arrived in {place} on {day} {month} {year}."
+            false_sentence = f"{char} arrived in {place} on {day} {month} {fake}."
+        elif kind == "number":
+            count, item, place = rng.randint(3, 900), rng.choice(ITEMS), rng.choice(PLACES)
+            fake = count + rng.randint(1, 50) * rng.choice([-1, 1]) if count > 60 else count + rng.randint(7, 40)
+            sentence = f"{char} carried {count} {item} to {place}."
+            false_sentence = f"{char} carried {fake} {item} to {place}."
+        elif kind == "name":
+            ship, fake = rng.sample(SHIP_WORDS, 2)
+            sentence = f"{char} served aboard a brig called the {ship}."
+            false_sentence = f"{char} served aboard a brig called the {fake}."
+        else:
+            relation, fake = rng.sample(RELATIONS, 2)
+            other = rng.choice(others)
+            sentence = f"{char} was the {relation} of {other}."
+            false_sentence = f"{char} was the {fake} of {other}."
+        return {"type": kind, "char": char, "sentence": sentence, "false_sentence": false_sentence}
+
+
+def filler_paragraphs(rng: random.Random, count: int = 256) -> List[str]:
+    """Pre-built pool of filler paragraphs, sampled while streaming so generation stays fast."""
+    pool = []
+    for _ in range(count):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(FILLER_WORDS, k=rng.randint(8, 20))
+            sentences.append(" ".join(words).capitalize() + ".")
+        pool.append(" ".join(sentences))
+    return pool
+
+
+def stream_book(path: str, title: str, target_bytes: int, chapters: int, facts: List[dict],
+                fillers: List[str], rng: random.Random) -> Iterator[dict]:
+    """
+    Write one book to `path`, planting each fact in a random chapter.
+
+    Yields:
+        dict: Each planted fact, updated with its chapter and byte span in the file.
+    """
+    by_chapter = {}
+    for fact in facts:
+        by_chapter.setdefault(rng.randint(1, chapters), []).append(fact)
+    chapter_bytes = max(1, target_bytes // chapters)
+    paragraph_bytes = sum(len(p) + 2 for p in fillers) // len(fillers)
+
+    with open(path, "wb") as f:
+        offset = f.write(f"{title.upper()}\n\nA synthetic novel.\n\n\n".encode("utf-8"))
+        for chapter in range(1, chapters + 1):
+            offset += f.write(f"CHAPTER {roman(chapter)}.\n\n".encode("utf-8"))
+            planted = by_chapter.get(chapter, [])
+            paragraphs = max(len(planted) + 1, chapter_bytes // paragraph_bytes)
+            slots = dict(zip(rng.sample(range(paragraphs), len(planted)), planted))
+            written = 0
+            for p in range(paragraphs):
+                paragraph = rng.choice(fillers)
+                fact = slots.get(p)
+                if fact is not None:
+                    prefix = (paragraph + " ").encode("utf-8")
+                    start = offset + written + len(prefix)
+                    sentence = fact["sentence"].encode("utf-8")
+                    fact.update(chapter=chapter, byte_start=start, byte_end=start + len(sentence))
+                    paragraph = f"{paragraph} {fact['sentence']} {rng.choice(fillers)}"
+                    yield fact
+                written += f.write((paragraph + "\n\n").encode("utf-8"))
+            offset += written + f.write(b"\n")
+
+
+def generate(out_dir: str, books: int, book_mb: float, chapters: int, facts_per_book: int,
+             rows: int, contradict_ratio: float, seed: int) -> dict:
+    """
+    Generate a corpus.
+
+    Returns:
+        dict: Counts of books, bytes, facts and backstory rows written.
+    """
+    rng = random.Random(seed)
+    factory = FactFactory(rng)
+    fillers = filler_paragraphs(rng)
+    books_dir = os.path.join(out_dir, "Books")
+    os.makedirs(books_dir, exist_ok=True)
+
+    all_facts = []
+    total_bytes = 0
+    with open(os.path.join(out_dir, "facts.jsonl"), "w", encoding="utf-8") as facts_file:
+        for b in range(books):
+            title = f"The Voyage of the {rng.choice(SHIP_WORDS)} {roman(b + 1)}"
+            path = os.path.join(books_dir, f"{title}.txt")
+            characters = [factory.name() for _ in range(max(2, facts_per_book // 5))]
+            true: Dict[str, Set[str]] = {char: set() for char in characters}
+            false: Dict[str, Set[str]] = {char: set() for char in characters}
+            facts = []
+            for _ in range(facts_per_book):
+                char = rng.choice(characters)
+                fact = factory.make(char, characters, true[char], false[char])
+                true[char].add(fact["sentence"])
+                false[char].add(fact["false_sentence"])
+                facts.append(fact)
+            for fact in stream_book(path, title, int(book_mb * 1024 * 1024), chapters, facts, fillers, rng):
+                fact.update(fact_id=len(all_facts), book=title)
+                facts_file.write(json.dumps(fact) + "\n")
+                all_facts.append(fact)
+            total_bytes += os.path.getsize(path)
+            print(f"Wrote {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MB, {len(facts)} facts)")
+
+    # Backstories: 1-3 facts about one character; a contradicting row alters exactly one of them.
+    by_char = {}
+    for fact in all_facts:
+        by_char.setdefault((fact["book"], fact["char"]), []).append(fact)
+    groups = list(by_char.items())
+    csv_path = os.path.join(out_dir, "train.csv")
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "book_name", "char", "caption", "content", "label"])
+        for row_id in range(rows if groups else 0):
+            (book, char), char_facts = rng.choice(groups)
+            picked = rng.sample(char_facts, min(len(char_facts), rng.randint(1, 3)))
+            sentences = [fact["sentence"] for fact in picked]
+            label = "consistent"
+            if rng.random() < contradict_ratio:
+                altered = rng.randrange(len(picked))
+                sentences[altered] = picked[altered]["false_sentence"]
+                label = "contradict"
+            caption = ",".join(str(fact["fact_id"]) for fact in picked)
+            writer.writerow([row_id, book, char, caption, " ".join(sentences), label])
+
+    print(f"Wrote {csv_path} ({rows} backstories) and facts.jsonl ({len(all_facts)} facts)")
+    return {"books": books, "bytes": total_bytes, "facts": len(all_facts), "rows": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic book corpus with planted facts.")
+    parser.add_argument("--out", default="data/synthetic", help="Output directory")
+    parser.add_argument("--books", type=int, default=3, help="Number of books")
+    parser.add_argument("--book-mb", type=float, default=1.0, help="Approximate size of each book in MB")
+    parser.add_argument("--chapters", type=int, default=40, help="Chapters per book")
+    parser.add_argument("--facts-per-book", type=int, default=200, help="Planted facts per book")
+    parser.add_argument("--rows", type=int, default=500, help="Backstory rows in train.csv")
+    parser.add_argument("--contradict-ratio", type=float, default=0.5, help="Share of contradicting backstories")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    generate(args.out, args.books, args.book_mb, args.chapters, args.facts_per_book,
+             args.rows, args.contradict_ratio, args.seed)
 
-with open(csv_path, "w") as f:
-    f.write(f"character_name,backstory\nCaptain Reynolds,\"{backstory}\"")
 
-print("Stress test data generated.")
+if __name__ == "__main__":
+    main()
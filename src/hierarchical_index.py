@@ -0,0 +1,219 @@
+"""
+Module: hierarchical_index.py
+Description: Two-level (chapter -> passage) vector index. A query scores one vector per
+             chapter section first and searches passages only inside the best sections.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.chunker import BookChunker
+
+
+class HierarchicalIndex:
+    """
+    Coarse-to-fine cosine index over chapters and their passages.
+
+    Passages are added per chapter (see `add_chapter`). Chapters longer than
+    `section_passages` are cut into consecutive sections so one summary vector never has
+    to stand for a whole long chapter. A section's summary is the element-wise maximum of
+    its passage vectors ("max": a single passage that matches a query keeps its section
+    visible) or their mean ("mean": the centroid), normalized. Passages of a section are
+    stored contiguously, so the fine search of a section is one slice of the passage matrix.
+
+    A query scores every section (coarse level), keeps the `top_sections` best and scores
+    only their passages (fine level). Work per query grows with the number of sections and
+    the size of the probed ones, not with the number of passages in the library; recall
+    against an exact flat search is traded off through `top_sections`.
+
+    Usage:
+        index = HierarchicalIndex(768, top_sections=16)
+        index.add_chapter(("book.txt", 3), ids, vectors)
+        hits = index.search(query, k=5)
+    """
+
+    SUMMARIES = ("max", "mean")
+
+    def __init__(self, dimensions: int, top_sections: int = 16, section_passages: int = 8, summary: str = "max"):
+        """
+        Initialize the index.
+
+        Args:
+            dimensions (int): Embedding dimensionality (768 for text-embedding-004).
+            top_sections (int): Sections whose passages are searched per query.
+            section_passages (int): Longest section, in passages; longer chapters are split.
+            summary (str): One of SUMMARIES, how a section's passages become its vector.
+        """
+        if summary not in self.SUMMARIES:
+            raise ValueError(f"Unknown summary '{summary}'. Expected one of {self.SUMMARIES}.")
+        self.dimensions = dimensions
+        self.top_sections = top_sections
+        self.section_passages = max(1, section_passages)
+        self.summary = summary
+
+        self.ids: List = []
+        self._section_keys: List[Tuple[Hashable, int]] = []  # (chapter key, section number)
+        self._pending: List[Tuple[Hashable, list, np.ndarray]] = []
+        self._passages = np.empty((0, dimensions), dtype=np.float32)
+        self._sections = np.empty((0, dimensions), dtype=np.float32)
+        self._bounds = np.empty((0, 2), dtype=np.int64)  # passage [start, end) per section
+
+    def __len__(self) -> int:
+        return len(self.ids) + sum(len(ids) for _, ids, _ in self._pending)
+
+    @property
+    def section_keys(self) -> List[Tuple[Hashable, int]]:
+        """(chapter key, section number) of every section, in index order."""
+        self._build()
+        return self._section_keys
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add_chapter(self, chapter_key: Hashable, ids: Sequence, vectors: np.ndarray) -> None:
+        """
+        Add the passages of one chapter.
+
+        Args:
+            chapter_key (Hashable): Identifies the chapter, e.g. (path, chapter number).
+            ids (Sequence): Identifiers returned by `search`, one per passage, in text order.
+            vectors (np.ndarray): Array of shape [n, dimensions].
+        """
+        vectors = self._normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length.")
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dim vectors, got {vectors.shape[1]}.")
+        if len(ids):
+            self._pending.append((chapter_key, list(ids), vectors))
+
+    def add(self, ids: Sequence, vectors: np.ndarray, chapter_keys: Sequence[Hashable]) -> None:
+        """
+        Add passages of any number of chapters; passages are grouped by `chapter_keys`
+        (one per passage), keeping their order within each chapter.
+        """
+        vectors = self._normalize(vectors)
+        if not len(ids) == len(vectors) == len(chapter_keys):
+            raise ValueError("ids, vectors and chapter_keys must have the same length.")
+        groups: Dict[Hashable, List[int]] = {}
+        for row, key in enumerate(chapter_keys):
+            groups.setdefault(key, []).append(row)
+        for key, rows in groups.items():
+            self.add_chapter(key, [ids[row] for row in rows], vectors[rows])
+
+    def _build(self) -> None:
+        """Fold pending chapters into the passage matrix and section summaries."""
+        if not self._pending:
+            return
+        passages, sections, bounds = [self._passages], [self._sections], [self._bounds]
+        offset = len(self.ids)
+        for chapter_key, ids, vectors in self._pending:
+            for number, start in enumerate(range(0, len(ids), self.section_passages)):
+                block = vectors[start:start + self.section_passages]
+                sections.append(self._normalize(block.max(axis=0) if self.summary == "max" else block.mean(axis=0)))
+                bounds.append(np.array([[offset + start, offset + start + len(block)]], dtype=np.int64))
+                self._section_keys.append((chapter_key, number))
+            passages.append(vectors)
+            self.ids.extend(ids)
+            offset += len(ids)
+        self._passages = np.concatenate(passages)
+        self._sections = np.concatenate(sections)
+        self._bounds = np.concatenate(bounds)
+        self._pending = []
+
+    def search_batch(self, queries: np.ndarray, k: int, top_sections: Optional[int] = None) -> Tuple[List[List], np.ndarray]:
+        """
+        Search many queries at once.
+
+        Args:
+            queries (np.ndarray): Array of shape [n_queries, dimensions].
+            k (int): Number of passages per query.
+            top_sections (int): Sections probed per query (defaults to `self.top_sections`).
+
+        Returns:
+            Tuple[List[List], np.ndarray]: Passage ids per query and their cosine scores
+                                           ([n_queries, k], NaN-padded when fewer were found).
+        """
+        self._build()
+        queries = self._normalize(queries)
+        scores_out = np.full((len(queries), k), np.nan, dtype=np.float32)
+        if not self.ids:
+            return [[] for _ in range(len(queries))], scores_out
+
+        probe = min(top_sections or self.top_sections, len(self._sections))
+        coarse = queries @ self._sections.T
+        if probe < coarse.shape[1]:
+            chosen = np.argpartition(-coarse, probe - 1, axis=1)[:, :probe]
+        else:
+            chosen = np.tile(np.arange(coarse.shape[1]), (len(queries), 1))
+
+        results = []
+        for row, query in enumerate(queries):
+            rows = np.concatenate([np.arange(start, end) for start, end in self._bounds[chosen[row]]])
+            fine = self._passages[rows] @ query
+            top = min(k, len(rows))
+            best = np.argpartition(-fine, top - 1)[:top] if top < len(rows) else np.arange(len(rows))
+            best = best[np.argsort(-fine[best])]
+            results.append([self.ids[i] for i in rows[best]])
+            scores_out[row, :top] = fine[best]
+        return results, scores_out
+
+    def search(self, query: np.ndarray, k: int = 3, top_sections: Optional[int] = None) -> List[Tuple[object, float]]:
+        """
+        Search a single query.
+
+        Returns:
+            List[Tuple[object, float]]: (id, cosine score) pairs, best first.
+        """
+        ids, scores = self.search_batch(np.atleast_2d(query), k, top_sections)
+        return list(zip(ids[0], scores[0, :len(ids[0])].tolist()))
+
+    def memory_bytes(self) -> int:
+        """Resident memory of the passage matrix, section summaries and section bounds."""
+        self._build()
+        return self._passages.nbytes + self._sections.nbytes + self._bounds.nbytes
+
+
+def index_books(paths: Iterable[str], embed, dimensions: int, chunker: BookChunker = None,
+                top_sections: int = 16, section_passages: int = 8, summary: str = "max",
+                batch_size: int = 256) -> HierarchicalIndex:
+    """
+    Chunk books with `BookChunker` and index their passages by chapter.
+
+    Args:
+        paths (Iterable[str]): Book files.
+        embed: Callable mapping a list of texts to an [n, dimensions] array
+               (e.g. `HashingEmbedder.embed`).
+        dimensions (int): Embedding dimensionality.
+        chunker (BookChunker): Chunker defining chapters and passages.
+        top_sections (int): See `HierarchicalIndex`.
+        section_passages (int): See `HierarchicalIndex`.
+        summary (str): See `HierarchicalIndex`.
+        batch_size (int): Passages embedded per call.
+
+    Returns:
+        HierarchicalIndex: Passage ids are (path, byte start, byte end) spans, chapter keys
+                           (path, chapter number).
+    """
+    chunker = chunker or BookChunker()
+    index = HierarchicalIndex(dimensions, top_sections, section_passages, summary)
+    for path in paths:
+        with open(path, "rb") as f:
+            chunks = chunker.chunk(f.read())
+        texts = [text for text, _ in chunks]
+        vectors = np.concatenate(
+            [embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+        ) if texts else np.empty((0, dimensions), dtype=np.float32)
+        index.add(
+            [(path, meta["start"], meta["end"]) for _, meta in chunks],
+            vectors,
+            [(path, meta["chapter"]) for _, meta in chunks],
+        )
+    return index
@@ -0,0 +1,282 @@
+"""
+Module: incremental_json.py
+Description: Incremental parsing and local repair of the JSON objects the LLM returns.
+             While a completion streams in, every top-level field and every element of a
+             top-level array is reported as soon as its text is complete; a payload that
+             is slightly malformed (or cut off) is repaired instead of being re-requested.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+_LITERALS = {"true": "true", "false": "false", "null": "null", "True": "true", "False": "false", "None": "null"}
+_WORD = re.compile(r"[A-Za-z0-9_+\-.]+")
+_NUMBER = re.compile(r"-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?$")
+
+
+def _read_string(text: str, i: int) -> Tuple[str, int, bool]:
+    """Read the string opening at `text[i]`; returns (JSON literal, next index, closed)."""
+    quote, j, parts = text[i], i + 1, []
+    while j < len(text):
+        c = text[j]
+        if c == "\\":
+            if j + 1 == len(text):
+                break
+            escaped = text[j + 1]
+            parts.append("'" if quote == "'" and escaped == "'" else c + escaped)
+            j += 2
+            continue
+        if c == quote:
+            return '"' + "".join(parts) + '"', j + 1, True
+        parts.append('\\"' if c == '"' else c)
+        j += 1
+    return '"' + "".join(parts) + '"', j, False
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse a JSON object (or array) the way a model meant it.
+
+    Repairs code fences and prose around the payload, single-quoted strings, Python
+    literals (True / False / None), unquoted keys, missing and trailing commas, and a
+    payload cut off mid-way: an open string is closed, a dangling key or partial value is
+    dropped and open containers are closed. Text after the first complete value is ignored.
+
+    Raises:
+        ValueError: When no object can be recovered.
+    """
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON object in response")
+    tokens: List[Tuple[str, str]] = []  # (kind, JSON text); kinds: open close comma colon key str value
+    stack: List[str] = []
+    i = min(starts)
+
+    def value_ends() -> bool:
+        return bool(tokens) and tokens[-1][0] in ("str", "value", "close")
+
+    def drop_dangling() -> None:
+        # Trailing commas, and keys without (a complete) value
+        while tokens and tokens[-1][0] in ("comma", "colon", "key"):
+            tokens.pop()
+
+    def add_value(kind: str, literal: str) -> None:
+        if value_ends():
+            tokens.append(("comma", ","))
+        if stack and stack[-1] == "{" and (not tokens or tokens[-1][0] in ("open", "comma")):
+            kind = "key"
+        tokens.append((kind, literal))
+
+    while i < len(text) and not (tokens and not stack):
+        c = text[i]
+        if c in "\"'":
+            literal, i, _ = _read_string(text, i)
+            add_value("str", literal)
+            continue
+        if c in "{[":
+            if value_ends():
+                tokens.append(("comma", ","))
+            tokens.append(("open", c))
+            stack.append(c)
+        elif c in "}]":
+            drop_dangling()
+            if stack:
+                tokens.append(("close", "}" if stack.pop() == "{" else "]"))
+        elif c == ",":
+            if tokens and tokens[-1][0] not in ("open", "comma"):
+                tokens.append(("comma", ","))
+        elif c == ":":
+            tokens.append(("colon", ":"))
+        else:
+            match = _WORD.match(text, i)
+            if match is None:
+                i += 1
+                continue
+            word, i = match.group(), match.end()
+            if word in _LITERALS:
+                add_value("value", _LITERALS[word])
+            elif _NUMBER.match(word):
+                add_value("value", word)
+            elif i < len(text):
+                add_value("str", json.dumps(word))  # unquoted key or bare word
+            # else: a literal or number cut off mid-way
+            continue
+        i += 1
+
+    if stack:
+        # Cut off: drop what cannot stand on its own, then close the open containers
+        drop_dangling()
+        for opened in reversed(stack):
+            tokens.append(("close", "}" if opened == "{" else "]"))
+
+    try:
+        return json.loads("".join(literal for _, literal in tokens), strict=False)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unrepairable JSON: {e}") from e
+
+
+def loads_lenient(text: str) -> Tuple[Any, bool]:
+    """Parse `text` as JSON, falling back to `repair_json`; returns (value, repaired)."""
+    try:
+        return json.loads(text, strict=False), False
+    except (json.JSONDecodeError, TypeError):
+        return repair_json(text or ""), True
+
+
+def _parse_value(text: str) -> Any:
+    text = text.strip()
+    try:
+        return json.loads(text, strict=False)
+    except json.JSONDecodeError:
+        pass
+    if text[:1] in "{[":
+        return repair_json(text)
+    if text[:1] in "\"'":
+        return json.loads(_read_string(text, 0)[0], strict=False)
+    if text in _LITERALS:
+        return json.loads(_LITERALS[text])
+    return text
+
+
+class IncrementalJSONParser:
+    """
+    Consumes a JSON object chunk by chunk, as streamed by the LLM.
+
+    `feed` returns the events completed by the new text:
+        ("field", key, value)  a top-level field, e.g. ("field", "consistent", True)
+        ("item", key, value)   one element of the top-level array `key`, e.g.
+                               ("item", "facts", {"fact": "..."})
+
+    A literal (true / false / null) is reported as soon as its last letter arrives; a
+    number once its delimiter does. Prose before the object and text after it are
+    ignored. `result` parses the whole payload, repairing it when needed.
+
+    Usage:
+        parser = IncrementalJSONParser()
+        for delta in stream:
+            for kind, key, value in parser.feed(delta):
+                ...
+        payload = parser.result()
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self.items: Dict[str, list] = {}
+        self.done = False
+        self.repaired = False
+        self._start: Optional[int] = None
+        self._pos = 0
+        self._stack: List[str] = []
+        self._quote: Optional[str] = None
+        self._string_start = 0
+        self._escape = False
+        self._key: Optional[str] = None
+        self._value_start: Optional[int] = None
+        self._item_start: Optional[int] = None
+
+    def has(self, *keys: str) -> bool:
+        """True once every one of `keys` has been parsed as a top-level field."""
+        return all(key in self.fields for key in keys)
+
+    def _field(self, end: int, events: list) -> None:
+        raw, self._value_start = self.text[self._value_start:end], None
+        if raw.strip() and self._key is not None:
+            try:
+                value = _parse_value(raw)
+            except ValueError:
+                return
+            self.fields[self._key] = value
+            events.append(("field", self._key, value))
+
+    def _item(self, end: int, events: list) -> None:
+        raw, self._item_start = self.text[self._item_start:end], None
+        if raw.strip() and self._key is not None:
+            try:
+                value = _parse_value(raw)
+            except ValueError:
+                return
+            self.items.setdefault(self._key, []).append(value)
+            events.append(("item", self._key, value))
+
+    def feed(self, chunk: str) -> List[Tuple[str, str, Any]]:
+        """Add streamed text; returns the fields and array items it completed."""
+        events = []
+        self.text += chunk
+        text, stack = self.text, self._stack
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._quote is not None:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == self._quote:
+                    self._quote = None
+                    depth = len(stack)
+                    if depth == 1 and self._value_start is None:
+                        self._key = _parse_value(text[self._string_start:i + 1])
+                    elif depth == 1:
+                        self._field(i + 1, events)
+                    elif depth == 2 and stack[1] == "[" and self._item_start is not None:
+                        self._item(i + 1, events)
+            elif not stack and c != "{":
+                pass  # prose before the object
+            elif c in "\"'":
+                self._quote, self._string_start = c, i
+            elif c in "{[":
+                if not stack:
+                    self._start = i
+                stack.append(c)
+                if len(stack) == 2 and c == "[":
+                    self._item_start = i + 1
+            elif c in "}]":
+                if len(stack) == 1 and self._value_start is not None:
+                    self._field(i, events)
+                elif len(stack) == 2 and stack[1] == "[" and self._item_start is not None:
+                    self._item(i, events)
+                stack.pop()
+                if not stack:
+                    self.done = True
+                elif len(stack) == 1 and self._value_start is not None:
+                    self._field(i + 1, events)
+                elif len(stack) == 2 and stack[1] == "[" and self._item_start is not None:
+                    self._item(i + 1, events)
+            elif c == ",":
+                if len(stack) == 1 and self._value_start is not None:
+                    self._field(i, events)
+                elif len(stack) == 2 and stack[1] == "[":
+                    if self._item_start is not None:
+                        self._item(i, events)
+                    self._item_start = i + 1
+            elif c == ":" and len(stack) == 1:
+                self._value_start = i + 1
+            i += 1
+        self._pos = i
+
+        # A literal is complete once its last letter is in
+        if len(stack) == 1 and self._value_start is not None and self._quote is None:
+            if text[self._value_start:i].strip() in _LITERALS:
+                self._field(i, events)
+        return events
+
+    def result(self) -> Any:
+        """
+        The whole payload: parsed as is when valid, repaired otherwise (`repaired` is set).
+        When even repair fails, the fields and items parsed so far are returned.
+
+        Raises:
+            ValueError: When nothing could be parsed.
+        """
+        # The object as streamed, without prose around it
+        payload = self.text[self._start:self._pos] if self.done else self.text
+        try:
+            value, self.repaired = loads_lenient(payload)
+            return value
+        except ValueError:
+            if not self.fields and not self.items:
+                raise
+            self.repaired = True
+            return {**self.items, **self.fields}
@@ -6,19 +6,26 @@ Description: Manages vector indexing using Pathway's LLM XPack.
 import pathway as pw
 from pathway.xpacks import llm
 
+from src.parallel_parser import make_parser
+
 class HybridIndexer:
     """
     Builds and manages a Hybrid Vector Store (Vector + Keyword) for efficient retrieval.
     """
 
-    def __init__(self, embedder_config: dict = None):
+    def __init__(self, embedder_config: dict = None, parse_workers: int = None, max_inflight_mb: float = 256):
         """
         Initialize the indexer.
 
         Args:
             embedder_config (dict): Configuration for the embedding model (e.g., LiteLLM/OpenAI).
+            parse_workers (int): Processes chunking new files in parallel (defaults to the
+                                 number of CPUs; 1 chunks in-process).
+            max_inflight_mb (float): Largest amount of file contents being chunked at once.
         """
         self.embedder_config = embedder_config
+        self.parse_workers = parse_workers
+        self.max_inflight_mb = max_inflight_mb
 
     def build_index(self, table: pw.Table) -> pw.Table:
         """
@@ -36,9 +43,10 @@ class HybridIndexer:
             api_key=self.embedder_config.get("api_key")
         )
 
-        # Create a parser with defaults (smart chunking via unstructured)
-        # To further minimize rows, we could explore mode="single" but let's stick to standard smart parsing
-        parser = llm.parsers.ParseUnstructured()
+        # Chapter-aware paragraph chunking. ParseUnstructured's default "single" mode indexed
+        # each book as one document; these chunks also carry chapter and byte-offset metadata
+        # used by the reranker. Files of a large drop are chunked on a process pool.
+        parser = make_parser(self.parse_workers, self.max_inflight_mb)
 
         # Create a vector store using Pathway's LLM XPack
         # Using VectorStoreServer class from the module
@@ -3,8 +3,40 @@ Module: ingestor.py
 Description: Handles data ingestion using Pathway.
 """
 
+import csv
+import os
+
 import pathway as pw
 
+# Optional train.csv columns passed through for speculative retrieval
+OPTIONAL_BACKSTORY_COLUMNS = ("char", "book_name")
+
+
+def read_csv_header(csv_path: str) -> list:
+    """
+    Column names of a CSV input: a file, or a directory of CSV files as accepted by
+    `pw.io.csv.read` (the first file in name order is read).
+
+    Args:
+        csv_path (str): Path to a CSV file or a directory of them.
+
+    Returns:
+        list: The header row; empty when there is no file to read yet.
+    """
+    if os.path.isdir(csv_path):
+        files = sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(csv_path)
+            for name in names
+            if not name.startswith(".")
+        )
+        if not files:
+            return []
+        csv_path = files[0]
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), [])
+
+
 class DataIngestor:
     """
     Responsible for ingesting data from various sources (files, streams) using Pathway.
@@ -53,19 +85,28 @@ class DataIngestor:
 
         Returns:
             pw.Table: A Pathway table representing the CSV data.
+                      Columns: [backstory, char, book_name]; 'char' and 'book_name' are
+                      empty when the CSV does not have them.
         """
         # Read CSV file
         # Default mode is streaming, but for a potentially static CSV, 'static' might be safer
         # unless we expect the CSV to grow. The existing code passes watch_mode to constructor.
         # Let's assume the CSV might update or just use the same mode policy.
         
-        class BackstorySchema(pw.Schema):
-            content: str
+        # Optional columns must be declared only when present: the CSV reader rejects
+        # schema fields that are missing from the header.
+        header = read_csv_header(csv_path)
+        present = [c for c in OPTIONAL_BACKSTORY_COLUMNS if c in header]
+        BackstorySchema = pw.schema_from_types(content=str, **{c: str for c in present})
 
         table = pw.io.csv.read(
             csv_path,
             mode="streaming" if self.watch_mode else "static",
             schema=BackstorySchema
         )
-        # Rename content to backstory to match main.py expectation across files
-        return table.select(backstory=pw.this.content)
+        # Rename content to backstory to match main.py expectation across files;
+        # absent optional columns are filled with empty strings.
+        return table.select(
+            backstory=pw.this.content,
+            **{c: (table[c] if c in present else "") for c in OPTIONAL_BACKSTORY_COLUMNS}
+        )
@@ -0,0 +1,389 @@
+"""
+Module: llm_client.py
+Description: Shared async LLM client with pooled connections, per-call deadlines,
+             hedged requests, streamed completions and structured error classification.
+"""
+
+import asyncio
+import collections
+import contextlib
+import os
+import time
+from enum import Enum
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+import httpx
+import litellm
+from litellm import acompletion
+from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+
+class LLMErrorKind(str, Enum):
+    """Failure classes that callers branch on instead of matching error strings."""
+
+    RATE_LIMIT = "rate_limit"
+    TIMEOUT = "timeout"
+    TRANSIENT = "transient"
+    AUTH = "auth"
+    BAD_REQUEST = "bad_request"
+    UNKNOWN = "unknown"
+
+
+RETRYABLE_KINDS = {LLMErrorKind.RATE_LIMIT, LLMErrorKind.TIMEOUT, LLMErrorKind.TRANSIENT}
+
+# Providers whose LiteLLM handlers accept an `AsyncHTTPHandler` as the per-call `client`.
+# Others (e.g. OpenAI, which expects its own SDK client) keep LiteLLM's connections.
+POOLED_PROVIDERS = {"gemini", "vertex_ai", "vertex_ai_beta"}
+
+
+class LLMError(Exception):
+    """
+    Raised by `LLMClient` for every failed completion.
+
+    Attributes:
+        kind (LLMErrorKind): Classified failure type.
+        original (Exception): The underlying provider / transport exception.
+    """
+
+    def __init__(self, kind: LLMErrorKind, original: Exception):
+        super().__init__(f"{kind.value}: {original}")
+        self.kind = kind
+        self.original = original
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind in RETRYABLE_KINDS
+
+
+def classify_error(error: Exception) -> LLMErrorKind:
+    """
+    Map a LiteLLM / transport exception onto an `LLMErrorKind`.
+
+    Exception types are checked first; the HTTP status code is the fallback for
+    provider errors that LiteLLM surfaces as a generic `APIError`.
+    """
+    if isinstance(error, LLMError):
+        return error.kind
+    if isinstance(error, litellm.RateLimitError):
+        return LLMErrorKind.RATE_LIMIT
+    if isinstance(error, (litellm.Timeout, asyncio.TimeoutError, httpx.TimeoutException)):
+        return LLMErrorKind.TIMEOUT
+    if isinstance(error, (litellm.AuthenticationError, litellm.PermissionDeniedError)):
+        return LLMErrorKind.AUTH
+    if isinstance(error, (litellm.BadRequestError, litellm.NotFoundError)):
+        return LLMErrorKind.BAD_REQUEST
+    if isinstance(error, (
+        litellm.ServiceUnavailableError,
+        litellm.InternalServerError,
+        litellm.APIConnectionError,
+        httpx.TransportError,
+    )):
+        return LLMErrorKind.TRANSIENT
+
+    status = getattr(error, "status_code", None)
+    if status == 429:
+        return LLMErrorKind.RATE_LIMIT
+    if status == 408:
+        return LLMErrorKind.TIMEOUT
+    if status in (401, 403):
+        return LLMErrorKind.AUTH
+    if isinstance(status, int) and status >= 500:
+        return LLMErrorKind.TRANSIENT
+    if isinstance(status, int) and status >= 400:
+        return LLMErrorKind.BAD_REQUEST
+    return LLMErrorKind.UNKNOWN
+
+
+class LLMClient:
+    """
+    Single entry point for chat completions, shared by `BackstoryAnalyzer` and `NarrativeAuditor`.
+
+    - Connection pooling: one keep-alive `httpx.AsyncClient` per event loop, passed to
+      LiteLLM with every call (`client=`) for the providers in `POOLED_PROVIDERS`.
+    - Deadlines: every call carries a request timeout and a hard `asyncio.wait_for` deadline.
+    - Hedging: once enough latencies are recorded, a call still running after the observed
+      p95 latency gets one duplicate request; whichever answers first wins, the other is cancelled.
+    - Scheduling: when `scheduler` (a `FairScheduler`) is set, calls tagged with a `flow`
+      wait for their fair turn before being sent.
+    - Budget: when `budget` (a `BudgetController`) is set, every provider request and its
+      token usage are recorded against it.
+    - Streaming: `stream` hands the completion to a callback as it is generated and stops
+      reading (closing the request) as soon as the callback has what it needs.
+    """
+
+    def __init__(
+        self,
+        model: str = "gemini/gemini-flash-latest",
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        max_connections: int = 32,
+        hedge: bool = True,
+        hedge_percentile: float = 95.0,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+    ):
+        """
+        Initialize the client.
+
+        Args:
+            model (str): LiteLLM model name.
+            api_key (str): Provider API key; falls back to GEMINI/GOOGLE/OPENAI env vars.
+            timeout (float): Per-call deadline in seconds.
+            max_connections (int): Size of the keep-alive connection pool.
+            hedge (bool): Send a duplicate request for calls slower than the hedge percentile.
+            hedge_percentile (float): Latency percentile after which a call is hedged.
+            hedge_min_samples (int): Latencies to observe before hedging starts.
+            latency_window (int): Number of recent latencies kept for the percentile.
+        """
+        self.model = model
+        self.api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY") or os.getenv("OPENAI_API_KEY")
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies = collections.deque(maxlen=latency_window)
+        self._sessions: Dict[int, tuple] = {}  # id(loop) -> (loop, handler wrapping the session)
+        self.stats = collections.Counter()
+        # Verification calls: seconds from request to the returned verdict, output tokens per claim
+        self.verdict_latencies = collections.deque(maxlen=latency_window)
+        self.verdict_tokens = collections.deque(maxlen=latency_window)
+        self.scheduler = None
+        self.budget = None
+
+    @classmethod
+    def from_config(cls, llm_config: dict) -> "LLMClient":
+        """Build a client from the `llm_config` dicts used across the pipeline."""
+        keys = ("model", "api_key", "timeout", "max_connections", "hedge", "hedge_percentile", "hedge_min_samples")
+        return cls(**{k: llm_config[k] for k in keys if llm_config.get(k) is not None})
+
+    def _session(self) -> dict:
+        """Per-call LiteLLM arguments that route the request through this loop's pool."""
+        if self.model.split("/", 1)[0] not in POOLED_PROVIDERS:
+            return {}
+        loop = asyncio.get_running_loop()
+        owner, handler = self._sessions.get(id(loop), (None, None))
+        # Ids of closed loops get reused; a session is only valid on the loop that created it.
+        if owner is not loop or handler.client.is_closed:
+            handler = AsyncHTTPHandler(timeout=httpx.Timeout(self.timeout, connect=10.0))
+            handler.client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+            )
+            self._sessions[id(loop)] = (loop, handler)
+        return {"client": handler}
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a duplicate request is sent, or None while hedging is off."""
+        if not self.hedge or len(self._latencies) < self.hedge_min_samples:
+            return None
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, int(len(ordered) * self.hedge_percentile / 100))
+        return ordered[index]
+
+    async def _attempt(self, timeout: float, kwargs: dict):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await asyncio.wait_for(acompletion(timeout=timeout, **kwargs), timeout=timeout)
+        finally:
+            # Failed and cancelled (hedged) requests still count against the budget
+            if self.budget is not None:
+                self.budget.record(response)
+        self._latencies.append(time.perf_counter() - start)
+        return response
+
+    async def complete(self, prompt: str = None, messages: list = None, timeout: float = None, flow=None, **kwargs):
+        """
+        Run one chat completion.
+
+        Args:
+            prompt (str): User prompt; shorthand for a single user message.
+            messages (list): Full message list (takes precedence over `prompt`).
+            timeout (float): Per-call deadline overriding the client default.
+            flow: Backstory key used by the fair scheduler; unscheduled when None.
+            **kwargs: Passed through to `litellm.acompletion` (e.g. response_format, caching).
+
+        Returns:
+            The LiteLLM response object.
+
+        Raises:
+            LLMError: On any failure, classified by `LLMErrorKind`.
+        """
+        timeout = timeout or self.timeout
+        call = {
+            "model": self.model,
+            "messages": messages or [{"role": "user", "content": prompt}],
+            "api_key": self.api_key,
+            **self._session(),
+            **kwargs,
+        }
+        self.stats["calls"] += 1
+
+        turn = self.scheduler.slot(flow) if self.scheduler is not None and flow is not None else contextlib.nullcontext()
+        try:
+            async with turn:
+                return await self._hedged(timeout, call)
+        except Exception as e:
+            kind = classify_error(e)
+            self.stats[f"error_{kind.value}"] += 1
+            raise LLMError(kind, e) from e
+
+    async def stream(self, prompt: str = None, on_text: Callable[[str], bool] = None, messages: list = None,
+                     timeout: float = None, flow=None, **kwargs):
+        """
+        Run one streamed chat completion.
+
+        Streamed calls are not hedged: a duplicate would pay for the output twice, and the
+        caller already acts on the first tokens. The deadline covers the whole stream.
+
+        Args:
+            prompt (str): User prompt; shorthand for a single user message.
+            on_text: Called with every text delta; returning True stops the stream early
+                     (the rest of the completion is neither read nor waited for).
+            messages (list): Full message list (takes precedence over `prompt`).
+            timeout (float): Per-call deadline overriding the client default.
+            flow: Backstory key used by the fair scheduler; unscheduled when None.
+            **kwargs: Passed through to `litellm.acompletion`.
+
+        Returns:
+            A response with `choices[0].message.content` (the text received), `usage`
+            (estimated from the text when the provider reports none) and `stopped_early`.
+
+        Raises:
+            LLMError: On any failure, classified by `LLMErrorKind`.
+        """
+        timeout = timeout or self.timeout
+        call = {
+            "model": self.model,
+            "messages": messages or [{"role": "user", "content": prompt}],
+            "api_key": self.api_key,
+            **self._session(),
+            **kwargs,
+        }
+        self.stats["calls"] += 1
+        self.stats["streamed"] += 1
+
+        turn = self.scheduler.slot(flow) if self.scheduler is not None and flow is not None else contextlib.nullcontext()
+        try:
+            async with turn:
+                return await asyncio.wait_for(self._stream_attempt(timeout, call, on_text), timeout=timeout)
+        except Exception as e:
+            kind = classify_error(e)
+            self.stats[f"error_{kind.value}"] += 1
+            raise LLMError(kind, e) from e
+
+    async def _stream_attempt(self, timeout: float, call: dict, on_text):
+        parts, usage, stopped = [], None, False
+        response = None
+        try:
+            stream = await acompletion(timeout=timeout, stream=True, **call)
+            try:
+                async for chunk in stream:
+                    usage = getattr(chunk, "usage", None) or usage
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        parts.append(delta)
+                        if on_text is not None and on_text(delta):
+                            stopped = True
+                            break
+            finally:
+                close = getattr(stream, "aclose", None)
+                if stopped and close is not None:
+                    await close()
+            content = "".join(parts)
+            if stopped:
+                self.stats["stopped_early"] += 1
+            if usage is None:
+                prompt_chars = sum(len(str(m.get("content", ""))) for m in call["messages"])
+                usage = {"completion_tokens": len(content) // 4, "total_tokens": (prompt_chars + len(content)) // 4}
+            response = SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                usage=usage,
+                stopped_early=stopped,
+            )
+        finally:
+            if self.budget is not None:
+                self.budget.record(response)
+        return response
+
+    def record_verdicts(self, seconds: float, output_tokens: int, claims: int = 1) -> None:
+        """Record one verification call: time until its verdict was returned and output tokens per claim."""
+        self.stats["verdict_calls"] += 1
+        self.verdict_latencies.append(seconds)
+        self.verdict_tokens.append(output_tokens / max(1, claims))
+
+    def verdict_report(self) -> str:
+        """One-line summary of verdict latency and output tokens per claim."""
+        if not self.verdict_latencies:
+            return "Verdicts - none yet"
+        ordered = sorted(self.verdict_latencies)
+        p50 = ordered[len(ordered) // 2]
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        tokens = sum(self.verdict_tokens) / len(self.verdict_tokens)
+        return (f"Verdicts - {self.stats['verdict_calls']} calls; verdict latency p50 {p50:.2f}s, p95 {p95:.2f}s; "
+                f"{tokens:.0f} output tokens/claim; {self.stats['stopped_early']} stopped early, "
+                f"{self.stats['json_repaired']} repaired")
+
+    async def _hedged(self, timeout: float, call: dict):
+        primary = asyncio.ensure_future(self._attempt(timeout, call))
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout:
+            return await primary
+
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        self.stats["hedged"] += 1
+        pending = {primary, asyncio.ensure_future(self._attempt(timeout, call))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of the current event loop."""
+        _, handler = self._sessions.pop(id(asyncio.get_running_loop()), (None, None))
+        if handler is not None:
+            await handler.client.aclose()
+
+
+def output_tokens(response) -> int:
+    """Completion tokens reported by a response, or estimated from its text."""
+    usage = getattr(response, "usage", None)
+    tokens = getattr(usage, "completion_tokens", None)
+    if tokens is None and isinstance(usage, dict):
+        tokens = usage.get("completion_tokens")
+    if isinstance(tokens, (int, float)):
+        return int(tokens)
+    return len(response.choices[0].message.content or "") // 4
+
+
+_clients: Dict[tuple, LLMClient] = {}
+
+
+def get_llm_client(llm_config: dict = None) -> LLMClient:
+    """
+    Return the process-wide client for a model / API key pair, creating it on first use.
+    """
+    llm_config = llm_config or {}
+    key = (llm_config.get("model", "gemini/gemini-flash-latest"), llm_config.get("api_key"))
+    if key not in _clients:
+        _clients[key] = LLMClient.from_config(llm_config)
+    return _clients[key]
@@ -0,0 +1,57 @@
+"""
+Module: local_embedder.py
+Description: Deterministic, dependency-free text embedder for offline benchmarks and tests.
+"""
+
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+
+TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    Embeds text by hashing word unigrams and bigrams into a fixed number of buckets.
+
+    Not a semantic model: it only rewards shared words. It lets retrieval code run
+    offline and reproducibly where calling `text-embedding-004` is not possible.
+    """
+
+    def __init__(self, dimensions: int = 768):
+        """
+        Initialize the embedder.
+
+        Args:
+            dimensions (int): Output vector size.
+        """
+        self.dimensions = dimensions
+        self._buckets = {}
+
+    def _bucket(self, token: str) -> int:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            bucket = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            bucket %= self.dimensions
+            self._buckets[token] = bucket
+        return bucket
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch of texts.
+
+        Returns:
+            np.ndarray: L2-normalized float32 array of shape [len(texts), dimensions].
+        """
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = TOKEN.findall(text.lower())
+            for token in tokens:
+                vectors[row, self._bucket(token)] += 1.0
+            for first, second in zip(tokens, tokens[1:]):
+                vectors[row, self._bucket(f"{first} {second}")] += 0.5
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
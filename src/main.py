@@ -13,6 +13,10 @@ from src.ingestor import DataIngestor
 from src.indexer import HybridIndexer
 from src.analyzer import BackstoryAnalyzer
 from src.auditor import NarrativeAuditor
+from src.budget import BudgetController
+from src.profiler import SamplingProfiler
+from src.reaudit import ReauditTracker
+from src.scheduler import FairScheduler
 
 def main():
     """
@@ -30,9 +34,24 @@ def main():
     import argparse
     parser = argparse.ArgumentParser()
     parser.add_argument("--reindex", action="store_true", help="Clear existing index before ingestion")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM calls in flight, shared fairly across backstories")
+    parser.add_argument("--fast-path-threshold", type=float, default=2.0, help="Complexity up to which backstories are decomposed without the LLM (0 disables)")
+    parser.add_argument("--budget-tokens", type=int, help="Run-level LLM token budget")
+    parser.add_argument("--budget-calls", type=int, help="Run-level LLM call budget")
+    parser.add_argument("--budget-minutes", type=float, help="Run-level wall-clock budget")
+    parser.add_argument("--no-reaudit", action="store_true", help="Keep verdicts as they are when books change")
+    parser.add_argument("--parse-workers", type=int, help="Processes chunking new books in parallel (default: number of CPUs)")
+    parser.add_argument("--parse-inflight-mb", type=float, default=256, help="Largest amount of book contents chunked at once")
+    parser.add_argument("--queue-workers", type=int, default=32, help="Claims verified at once through the bounded queue (0 disables the queue)")
+    parser.add_argument("--queue-high-watermark", type=int, default=1024, help="Claims in flight at which decomposed backstories wait before emitting theirs")
+    parser.add_argument("--profile", action="store_true", help="Sample CPU stacks by pipeline stage; writes flamegraph input and a summary to results/")
+    parser.add_argument("--profile-interval-ms", type=float, default=5, help="Time between profiler samples")
+    parser.add_argument("--stream", action="store_true", help="Stream verification completions and parse the verdicts as they arrive")
+    parser.add_argument("--early-stop", action="store_true", help="With --stream, stop each verification once the verdict fields are in (no reason)")
+    parser.add_argument("--no-prefetch", action="store_true", help="Search the index per claim instead of prefetching a pool per backstory")
     args = parser.parse_args()
     if args.reindex:
-        import shutil, os
+        import shutil
         index_dir = os.path.join(os.getcwd(), "data", "index")
         if os.path.isdir(index_dir):
             shutil.rmtree(index_dir)
@@ -57,7 +76,7 @@ def main():
     indexer = HybridIndexer(embedder_config={
         "model": "gemini/text-embedding-004", 
         "api_key": api_key
-    }) 
+    }, parse_workers=args.parse_workers, max_inflight_mb=args.parse_inflight_mb)
     index = indexer.build_index(combined_table)
     
     # 4. Processing Pipeline
@@ -67,38 +86,120 @@ def main():
     # B. Analyze (Decompose) Backstories
     # Initialize Analyzer
     # using gemini-flash-latest explicitly to avoid version issues
-    analyzer = BackstoryAnalyzer(llm_config={"model": "gemini/gemini-flash-latest", "api_key": api_key})
+    analyzer = BackstoryAnalyzer(llm_config={
+        "model": "gemini/gemini-flash-latest",
+        "api_key": api_key,
+        "fast_path_threshold": args.fast_path_threshold
+    })
+
+    # Fair queuing of decomposition and verification calls across backstories
+    scheduler = FairScheduler(max_concurrency=args.llm_concurrency)
+
+    # Run-level budget: as it runs low the pipeline steps down to cheaper modes
+    budget = None
+    if args.budget_tokens or args.budget_calls or args.budget_minutes:
+        budget = BudgetController(
+            max_tokens=args.budget_tokens,
+            max_calls=args.budget_calls,
+            max_seconds=args.budget_minutes * 60 if args.budget_minutes else None,
+        )
     
+    # Claims wait for verification in a bounded queue; when too many are in flight,
+    # decomposed backstories wait before emitting theirs (backpressure)
+    auditor = NarrativeAuditor(
+        index_table=index, 
+        llm_config={"model": "gemini/gemini-flash-latest", "api_key": api_key,
+                    "stream": args.stream, "early_stop": args.early_stop},
+        queue_workers=args.queue_workers,
+        queue_high_watermark=args.queue_high_watermark,
+    )
+    # Set on both clients: they are only one shared object when model and API key match
+    analyzer.client.scheduler = auditor.client.scheduler = scheduler
+    analyzer.client.budget = auditor.client.budget = budget
+
     # Define UDF for Pathway
-    @pw.udf
+    # Fully async when prefetching: the engine keeps going while backstories are decomposed,
+    # so the speculative retrieval below runs concurrently with the two decomposition calls.
+    # Also with the queue: a batch-async UDF emits nothing until every call of its batch is
+    # done, so a call held back by the queue would wait for claims that were never emitted.
+    fully_async = not args.no_prefetch or auditor.queue is not None
+    executor = pw.udfs.fully_async_executor() if fully_async else pw.udfs.auto_executor()
+
+    @pw.udf(executor=executor)
     async def decompose_udf(text: str) -> list[str]:
-        return await analyzer.extract_atomic_claims(text)
+        # One item for the decomposition itself, then one per extracted claim
+        scheduler.register(text)
+        claims = await analyzer.extract_atomic_claims(text)
+        scheduler.register(text, len(claims))
+        scheduler.finish(text)
+        if auditor.queue is not None:
+            # Claims are emitted only once the queue has room for them
+            await auditor.queue.admit(len(claims))
+        return claims
 
     # Apply decomposition
     claims_table = test_table.select(
         original_text=pw.this.backstory,
+        backstory_id=pw.this.id,
         claims=decompose_udf(pw.this.backstory)
-    )
+    ).await_futures()
+
+    def print_reports():
+        print(analyzer.path_report())
+        if budget is not None:
+            print(budget.report())
+        if auditor.queue is not None:
+            print(auditor.queue.report())
+        print(auditor.client.verdict_report())
+
+    # Progress reports every 10 decomposed backstories, from the engine's output thread
+    decomposed = 0
+
+    def on_decomposed(key, row, time, is_addition):
+        nonlocal decomposed
+        if is_addition:
+            decomposed += 1
+            if decomposed % 10 == 0:
+                print_reports()
+
+    pw.io.subscribe(claims_table, on_change=on_decomposed)
+
+    # Speculative retrieval: one candidate pool per backstory (text + char + book_name)
+    pool = None if args.no_prefetch else auditor.prefetch(test_table)
     
     # Flatten/Explode claims so each claim is a row
     atomic_claims = claims_table.flatten(pw.this.claims).select(
         claim=pw.this.claims,
-        source_text=pw.this.original_text
+        source_text=pw.this.original_text,
+        backstory_id=pw.this.backstory_id
     )
 
-    # C. Audit Claims
-    auditor = NarrativeAuditor(
-        index_table=index, 
-        llm_config={"model": "gemini/gemini-flash-latest", "api_key": api_key}
+    # Change-driven re-audit: when a book changes, only the claims whose evidence was
+    # edited (or that a new chunk is relevant to) are retrieved and verified again
+    tracker = None if args.no_reaudit else ReauditTracker(chunk_store=auditor.chunk_store)
+
+    # C. Audit Claims (reranked within the prefetched pool unless --no-prefetch)
+    audit_results = auditor.audit_backstory(
+        atomic_claims,
+        pool=pool,
+        revisions=tracker.revisions() if tracker is not None else None
     )
-    audit_results = auditor.audit_backstory(atomic_claims)
+    if tracker is not None:
+        tracker.watch(index.chunked_docs, audit_results)
     
     # 5. Output
-    # Write results to CSV
-    pw.io.csv.write(audit_results, "results/audit_results.csv")
+    # Write results to CSV, with the evidence text read back from the mapped books
+    pw.io.csv.write(auditor.with_evidence_text(audit_results), "results/audit_results.csv")
     
     print("Pipeline defined. Starting Pathway...")
-    pw.run()
+    if args.profile:
+        with SamplingProfiler(interval_s=args.profile_interval_ms / 1000, out_dir="results"):
+            pw.run()
+    else:
+        pw.run()
+    print_reports()
+    if auditor.queue is not None:
+        auditor.queue.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+"""
+Module: measure_chunk_memory.py
+Description: Peak-RSS comparison of copied chunk text versus memory-mapped chunk spans.
+
+Each mode runs in its own subprocess and replays the memory-relevant part of an audit
+over the books: chunking, one retrieval result per claim (candidate_k chunks, decoded
+from JSON as `pw.Json` values are), the selected context kept per output row, prompt
+building and the CSV write.
+
+    copy  - chunks are materialized strings and every result / output row carries text.
+    spans - chunks are byte spans into memory-mapped books; results and output rows carry
+            span references and text is decoded only while a prompt is built.
+
+Both modes still hold one copy of the chunk texts, standing in for the vector index.
+
+Usage example::
+    python -m src.measure_chunk_memory --books-dir data/Books --claims 5000
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, books_dir: str, claims: int, candidate_k: int, context_k: int, seed: int) -> dict:
+    from src.auditor import build_verification_prompt
+    from src.chunk_store import ChunkStore, drop_text
+    from src.chunker import BookChunker
+
+    baseline = peak_rss_mb()
+    paths = [os.path.join(books_dir, name) for name in sorted(os.listdir(books_dir))]
+    store = ChunkStore()
+
+    # Chunking; `index_texts` stands in for the text held by the vector index in both modes
+    chunks = []
+    if mode == "copy":
+        chunker = BookChunker()
+        for path in paths:
+            with open(path, "rb") as f:
+                for text, meta in chunker.chunk(f.read()):
+                    chunks.append({"text": text, "metadata": dict(meta, path=path)})
+        index_texts = [c["text"] for c in chunks]
+    else:
+        for path in paths:
+            for span, meta in zip(store.add_book(path), store.chunk_metadata(path)):
+                chunks.append({"text": store.text(span), "metadata": dict(meta, path=path)})
+        index_texts = [c["text"] for c in chunks]
+
+    # Retrieval results arrive as JSON (pw.Json), so each row decodes its own copy of the text
+    rng = random.Random(seed)
+    rows = []
+    for claim_id in range(claims):
+        candidates = json.loads(json.dumps([chunks[i] for i in rng.sample(range(len(chunks)), candidate_k)]))
+        context = candidates[:context_k]
+        if mode == "spans":
+            context = drop_text(context)
+        rows.append((f"claim {claim_id}", json.loads(json.dumps(context))))
+
+    # Verification prompts are transient in both modes
+    prompt_chars = 0
+    for claim, context in rows:
+        prompt_chars += len(build_verification_prompt(claim, context, store))
+
+    with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["claim", "context", "context_k"])
+        for claim, context in rows:
+            writer.writerow([claim, json.dumps(context), len(context)])
+        csv_path = f.name
+    csv_mb = os.path.getsize(csv_path) / (1024 * 1024)
+    os.unlink(csv_path)
+
+    return {
+        "mode": mode,
+        "chunks": len(chunks),
+        "claims": claims,
+        "prompt_chars": prompt_chars,
+        "csv_mb": csv_mb,
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure peak RSS of copied text vs. memory-mapped chunk spans.")
+    parser.add_argument("--books-dir", default="data/Books", help="Books to chunk")
+    parser.add_argument("--claims", type=int, default=5000, help="Claims audited")
+    parser.add_argument("--candidate-k", type=int, default=12, help="Chunks per retrieval result")
+    parser.add_argument("--context-k", type=int, default=5, help="Chunks kept per output row")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for candidate sampling")
+    parser.add_argument("--mode", choices=["copy", "spans"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.books_dir, args.claims, args.candidate_k, args.context_k, args.seed)))
+        return
+
+    book_mb = sum(os.path.getsize(os.path.join(args.books_dir, n)) for n in os.listdir(args.books_dir)) / (1024 * 1024)
+    print(f"Books: {args.books_dir} ({book_mb:.1f} MB), {args.claims} claims, "
+          f"k={args.candidate_k} candidates / {args.context_k} kept")
+
+    reports = {}
+    for mode in ("copy", "spans"):
+        out = subprocess.run(
+            [sys.executable, "-m", "src.measure_chunk_memory", "--mode", mode, "--books-dir", args.books_dir,
+             "--claims", str(args.claims), "--candidate-k", str(args.candidate_k),
+             "--context-k", str(args.context_k), "--seed", str(args.seed)],
+            check=True, capture_output=True, text=True,
+        )
+        reports[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    print(f"{'mode':<6} {'chunks':>7} {'peak RSS MB':>12} {'over baseline':>14} {'CSV MB':>8}")
+    for mode, r in reports.items():
+        print(f"{mode:<6} {r['chunks']:>7} {r['peak_rss_mb']:>12.1f} "
+              f"{r['peak_rss_mb'] - r['baseline_rss_mb']:>14.1f} {r['csv_mb']:>8.2f}")
+    assert reports["copy"]["prompt_chars"] == reports["spans"]["prompt_chars"], "prompts differ between modes"
+    saved = reports["copy"]["peak_rss_mb"] - reports["spans"]["peak_rss_mb"]
+    print(f"Peak RSS saved by spans: {saved:.1f} MB (identical prompts in both modes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Module: parallel_parser.py
+Description: Book parsing on a process pool, with a bound on the bytes being parsed at once.
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import pathway as pw
+
+from src.chunker import BookChunker, chunk_spans
+
+
+class ByteBudget:
+    """
+    Async admission control by size: `acquire(n)` waits until `n` more bytes fit under
+    `max_bytes`. An item larger than the whole budget is admitted once nothing else is in
+    flight, so it runs alone instead of waiting forever. Waiters are admitted in arrival
+    order, so a large file is not overtaken indefinitely by small ones.
+
+    Usage:
+        await budget.acquire(len(data))
+        try:
+            ...
+        finally:
+            budget.release(len(data))
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Initialize the budget.
+
+        Args:
+            max_bytes (int): Bytes allowed in flight at once.
+        """
+        self.max_bytes = max_bytes
+        self.in_flight = 0
+        self.peak = 0
+        self._waiting: List[tuple] = []  # (size, future)
+
+    def _fits(self, size: int) -> bool:
+        return self.in_flight == 0 or self.in_flight + size <= self.max_bytes
+
+    def _admit(self, size: int) -> None:
+        self.in_flight += size
+        self.peak = max(self.peak, self.in_flight)
+
+    def _dispatch(self) -> None:
+        while self._waiting and self._fits(self._waiting[0][0]):
+            size, future = self._waiting.pop(0)
+            if future.cancelled():
+                continue
+            self._admit(size)
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+
+    async def acquire(self, size: int) -> None:
+        if not self._waiting and self._fits(size):
+            self._admit(size)
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((size, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(size)
+            raise
+
+    def release(self, size: int) -> None:
+        self.in_flight -= size
+        self._dispatch()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class ParallelBookParser(pw.UDF):
+    """
+    `BookChunker` as an async Pathway parser whose chunking runs in worker processes.
+
+    Pathway calls a parser once per file row; a plain parser chunks the files of a large
+    drop one after another on one core. Here each call hands the file to a process pool
+    of `workers` processes and awaits the result, so several files are chunked at once.
+    Workers return only the chunk spans (small metadata dicts); the text of each span is
+    sliced from the bytes the parent already holds.
+
+    At most `max_inflight_mb` of file contents are being parsed at any time, however many
+    files arrive together: the copies sent to workers and the chunk text sliced from them
+    stay within that budget until the chunks are handed back to Pathway. Files wait for
+    their turn in arrival order.
+
+    The pool uses the "spawn" start method (the Pathway engine is multithreaded, so
+    forking it is unsafe) and is created on first use. As with any spawned pool, the
+    script that runs the pipeline must start it under `if __name__ == "__main__":`.
+
+    Usage:
+        parser = ParallelBookParser(workers=os.cpu_count())
+        VectorStoreServer(books, embedder=embedder, parser=parser)
+    """
+
+    def __init__(self, chunker: Optional[BookChunker] = None, workers: Optional[int] = None,
+                 max_inflight_mb: float = 256):
+        """
+        Initialize the parser.
+
+        Args:
+            chunker (BookChunker): Chunking settings applied in the workers.
+            workers (int): Worker processes (defaults to the number of CPUs).
+            max_inflight_mb (float): Largest amount of file contents parsed at once, in MB.
+        """
+        super().__init__()
+        self.chunker = chunker or BookChunker()
+        self.workers = workers or os.cpu_count() or 1
+        self.budget = ByteBudget(int(max_inflight_mb * 1024 * 1024))
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.files = 0
+        self.bytes = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def __wrapped__(self, contents: bytes, **kwargs) -> List[Tuple[str, dict]]:
+        if isinstance(contents, str):
+            contents = contents.encode("utf-8")
+        size = len(contents)
+        await self.budget.acquire(size)
+        try:
+            spans = await asyncio.get_running_loop().run_in_executor(
+                self._executor(), chunk_spans, contents, self.chunker.chunk_size, self.chunker.min_chapter_bytes
+            )
+            chunks = self.chunker.materialize(contents, spans)
+        finally:
+            self.budget.release(size)
+        self.files += 1
+        self.bytes += size
+        return chunks
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+def make_parser(workers: Optional[int] = None, max_inflight_mb: float = 256, chunker: Optional[BookChunker] = None):
+    """
+    Parser for `VectorStoreServer`: a `ParallelBookParser` when more than one worker is
+    available, otherwise the in-process `BookChunker` (a pool of one only adds copying).
+
+    Args:
+        workers (int): Worker processes (defaults to the number of CPUs).
+        max_inflight_mb (float): See `ParallelBookParser`.
+        chunker (BookChunker): Chunking settings.
+    """
+    chunker = chunker or BookChunker()
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return chunker
+    return ParallelBookParser(chunker, workers, max_inflight_mb)
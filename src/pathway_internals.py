@@ -0,0 +1,41 @@
+"""
+Module: pathway_internals.py
+Description: The private Pathway APIs this project relies on, in one place. They were
+             verified against Pathway 0.33.x (pinned in requirements.txt); on any other
+             version every helper raises instead of silently changing behaviour.
+"""
+
+import pathway as pw
+
+VERIFIED_VERSION = "0.33."
+
+
+def _check_version() -> None:
+    if not pw.__version__.startswith(VERIFIED_VERSION):
+        raise RuntimeError(
+            f"src.pathway_internals was verified against Pathway {VERIFIED_VERSION}x, found {pw.__version__}: "
+            "re-check the private APIs it wraps, then update VERIFIED_VERSION and requirements.txt"
+        )
+
+
+def append_only(table: pw.Table) -> pw.Table:
+    """
+    Copy of `table` that ignores retractions: deleted rows stay in the copy.
+
+    Used for index queries, since the vector store's `retrieve_query` panics when a query
+    row is retracted. Wraps the private `Table._remove_retractions`.
+    """
+    _check_version()
+    return table._remove_retractions()
+
+
+def clear_graph() -> None:
+    """
+    Drop every table and output built so far, so that the next `pw.run` in this process
+    runs only what is built after this call (tests building several graphs). Wraps the
+    private `pathway.internals.parse_graph.G`.
+    """
+    _check_version()
+    from pathway.internals.parse_graph import G
+
+    G.clear()
@@ -0,0 +1,236 @@
+"""
+Module: profiler.py
+Description: Low-overhead sampling profiler for pipeline runs. Samples are tagged by
+             pipeline stage and written as collapsed stacks (flamegraph input) plus a
+             top-N hot-function summary.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# (stage, path fragment, function name or None). A sample belongs to the stage of its
+# outermost matching frame, so an LLM call made while verifying counts as "verify".
+STAGE_RULES: Tuple[Tuple[str, str, Optional[str]], ...] = (
+    ("decompose", "src/main.py", "decompose_udf"),
+    ("decompose", "src/analyzer.py", None),
+    ("decompose", "src/fast_decomposer.py", None),
+    ("verify", "src/auditor.py", "verify_claim"),
+    ("verify", "src/work_queue.py", None),
+    ("verify", "src/batcher.py", None),
+    ("retrieve", "src/auditor.py", None),
+    ("retrieve", "src/reranker.py", None),
+    ("retrieve", "src/chunk_store.py", None),
+    ("retrieve", "pathway/xpacks/llm/vector_store.py", None),
+    ("retrieve", "pathway/xpacks/llm/document_store.py", None),
+    ("parse", "src/chunker.py", None),
+    ("parse", "src/parallel_parser.py", None),
+    ("parse", "pathway/xpacks/llm/parsers.py", None),
+    ("embed", "pathway/xpacks/llm/embedders.py", None),
+    ("embed", "src/local_embedder.py", None),
+    ("llm", "src/llm_client.py", None),
+    ("llm", "litellm/", None),
+    ("output", "pathway/io/", None),
+    ("output", "src/server.py", None),
+)
+
+
+def _label(code) -> str:
+    path = code.co_filename.replace(os.sep, "/")
+    short = path.split("/site-packages/", 1)[-1]
+    if "/site-packages/" not in path and "/lib/python3" in path:  # standard library
+        short = path.split("/lib/python3", 1)[1].split("/", 1)[-1]
+    elif "/src/" in short:
+        short = "src/" + short.split("/src/", 1)[1]
+    return f"{code.co_name} ({short}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every thread from a background thread.
+
+    Each sample is weighted by the CPU time its thread used since the previous sample
+    (per-thread CPU clocks), so threads blocked in I/O, sleeping or waiting on the Pathway
+    engine cost nothing and the profile shows where CPU goes. Async UDFs are covered: a
+    coroutine's frames are on its event-loop thread's stack while it runs. CPU used by
+    the Rust engine (and other threads without Python frames) is reported as "native".
+    Worker processes (e.g. `ParallelBookParser`) are not sampled.
+
+    On platforms without per-thread CPU clocks every sample weighs one interval (wall time).
+
+    Output (in `out_dir`, prefixed by `name`):
+        <name>.collapsed          "stage;outer;...;inner <microseconds>" lines for
+                                  flamegraph.pl, speedscope or inferno
+        <name>.<stage>.collapsed  the same, one file per stage
+        <name>_summary.txt        CPU per stage and the top-N functions by self and total time
+
+    Usage:
+        with SamplingProfiler(out_dir="results"):
+            pw.run()
+    """
+
+    def __init__(self, interval_s: float = 0.005, out_dir: str = "results", name: str = "profile",
+                 top_n: int = 25, stage_rules: Sequence[Tuple[str, str, Optional[str]]] = STAGE_RULES):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval_s (float): Time between samples.
+            out_dir (str): Directory the profile is written to.
+            name (str): File name prefix.
+            top_n (int): Functions listed in the summary.
+            stage_rules: (stage, path fragment, function or None) rules, see `STAGE_RULES`.
+        """
+        self.interval_s = interval_s
+        self.out_dir = out_dir
+        self.name = name
+        self.top_n = top_n
+        self.stage_rules = [(stage, fragment.replace("/", os.sep), function) for stage, fragment, function in stage_rules]
+
+        self.stacks: Dict[Tuple[str, tuple], float] = collections.Counter()  # (stage, codes) -> seconds
+        self.samples = 0
+        self.native_s = 0.0
+        self.overhead_s = 0.0
+        self.wall_s = 0.0
+        self._stage_of: Dict[object, Optional[str]] = {}
+        self._cpu: Dict[int, float] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    # -- sampling -----------------------------------------------------------------------
+
+    def _code_stage(self, code) -> Optional[str]:
+        if code not in self._stage_of:
+            stage = None
+            for rule_stage, fragment, function in self.stage_rules:
+                if fragment in code.co_filename and (function is None or code.co_name == function):
+                    stage = rule_stage
+                    break
+            self._stage_of[code] = stage
+        return self._stage_of[code]
+
+    @staticmethod
+    def _thread_cpu(ident: int) -> Optional[float]:
+        try:
+            return time.clock_gettime(time.pthread_getcpuclockid(ident))
+        except (AttributeError, OSError):
+            return None
+
+    def _sample(self) -> float:
+        """Record one stack per thread; returns the CPU seconds used by the sampled threads."""
+        own = threading.get_ident()
+        python_cpu = 0.0
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            cpu = self._thread_cpu(ident)
+            if cpu is None:
+                weight = self.interval_s
+            else:
+                weight = cpu - self._cpu.get(ident, cpu)
+                self._cpu[ident] = cpu
+                python_cpu += weight
+                if weight <= 0:
+                    continue
+            codes = []
+            while frame is not None:
+                codes.append(frame.f_code)
+                frame = frame.f_back
+            codes.reverse()  # outermost first
+            stage = next((s for s in map(self._code_stage, codes) if s is not None), "other")
+            self.stacks[(stage, tuple(codes))] += weight
+        self.samples += 1
+        return python_cpu
+
+    def _run(self) -> None:
+        process_cpu = time.process_time()
+        own_cpu = time.thread_time()
+        while not self._stop.wait(self.interval_s):
+            python_cpu = self._sample()
+            now_process, now_own = time.process_time(), time.thread_time()
+            own = now_own - own_cpu
+            self.overhead_s += own
+            self.native_s += max(0.0, (now_process - process_cpu) - own - python_cpu)
+            process_cpu, own_cpu = now_process, now_own
+
+    def start(self) -> "SamplingProfiler":
+        self._stop.clear()
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            self.wall_s += time.monotonic() - self._started
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+        print(f"Profile written to {', '.join(self.write())}")
+
+    # -- output -------------------------------------------------------------------------
+
+    def stage_seconds(self) -> Dict[str, float]:
+        """CPU seconds per stage, including "native"."""
+        stages = collections.Counter()
+        for (stage, _), seconds in self.stacks.items():
+            stages[stage] += seconds
+        if self.native_s:
+            stages["native"] += self.native_s
+        return dict(stages.most_common())
+
+    def hot_functions(self) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+        """Top-N functions by self CPU time and by total (inclusive) CPU time."""
+        own, total = collections.Counter(), collections.Counter()
+        for (_, codes), seconds in self.stacks.items():
+            own[_label(codes[-1])] += seconds
+            for label in {_label(code) for code in codes}:
+                total[label] += seconds
+        return own.most_common(self.top_n), total.most_common(self.top_n)
+
+    def _collapsed(self, stage: Optional[str] = None) -> List[str]:
+        lines = []
+        for (sample_stage, codes), seconds in sorted(self.stacks.items(), key=lambda item: -item[1]):
+            if stage is not None and sample_stage != stage:
+                continue
+            frames = ";".join(_label(code).replace(";", ",") for code in codes)
+            lines.append(f"{sample_stage};{frames} {max(1, round(seconds * 1e6))}")
+        return lines
+
+    def summary(self) -> str:
+        stages = self.stage_seconds()
+        cpu = sum(stages.values()) or 1.0
+        lines = [f"Sampled {self.samples} times every {self.interval_s * 1000:.0f} ms over {self.wall_s:.1f}s; "
+                 f"{cpu:.2f} CPU-s, profiler overhead {self.overhead_s:.2f} CPU-s", "", "CPU by stage:"]
+        lines += [f"  {stage:<10} {seconds:>8.2f}s {seconds / cpu:>6.1%}" for stage, seconds in stages.items()]
+        own, total = self.hot_functions()
+        for title, rows in (("self", own), ("total", total)):
+            lines += ["", f"Top {len(rows)} functions by {title} CPU time:"]
+            lines += [f"  {seconds:>8.3f}s {seconds / cpu:>6.1%}  {label}" for label, seconds in rows]
+        return "\n".join(lines) + "\n"
+
+    def write(self) -> List[str]:
+        """Write the collapsed stacks and the summary; returns the paths written."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        outputs = {f"{self.name}.collapsed": self._collapsed()}
+        for stage in {stage for stage, _ in self.stacks}:
+            outputs[f"{self.name}.{stage}.collapsed"] = self._collapsed(stage)
+        paths = []
+        for filename, lines in outputs.items():
+            paths.append(os.path.join(self.out_dir, filename))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + ("\n" if lines else ""))
+        paths.append(os.path.join(self.out_dir, f"{self.name}_summary.txt"))
+        with open(paths[-1], "w", encoding="utf-8") as f:
+            f.write(self.summary())
+        return paths
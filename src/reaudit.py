@@ -0,0 +1,300 @@
+"""
+Module: reaudit.py
+Description: Change-driven re-audit. Tracks which chunks each verdict was checked against
+             and re-verifies only the claims whose evidence changed when books are updated.
+"""
+
+import collections
+import queue
+import threading
+import time
+from typing import Dict, Iterable, List, Set, Tuple
+
+import pathway as pw
+
+from src.chunk_store import ChunkSpan, ChunkStore, get_chunk_store
+from src.reranker import as_chunk_list, content_words, entities
+
+
+def relevance(claim: str, text: str) -> float:
+    """Lexical and entity overlap of a chunk with a claim (the reranker's CPU signals), in [0, 1]."""
+    claim_words = content_words(claim)
+    if not claim_words:
+        return 0.0
+    words = content_words(text)
+    lexical = len(claim_words & words) / len(claim_words)
+    claim_entities = entities(claim)
+    entity = len(claim_entities & entities(text)) / len(claim_entities) if claim_entities else lexical
+    return (lexical + entity) / 2
+
+
+def merge_ranges(ranges: Iterable[Tuple[int, int]], gap: int = 0) -> List[Tuple[int, int]]:
+    """Merge byte ranges that overlap or lie within `gap` bytes of each other."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + gap:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class DependencyIndex:
+    """
+    Maps each audited claim to the chunk spans its verdict was checked against.
+
+    Two lookups decide which claims a chunk change affects:
+        - `near`: claims with evidence in the same book within `radius_bytes` of the changed
+          bytes (evidence edited or removed, or a neighbor that expansion would add).
+        - `attracted`: claims an inserted chunk is at least as relevant to as their weakest
+          current evidence, so it would likely enter their context.
+    """
+
+    def __init__(self, chunk_store: ChunkStore = None, radius_bytes: int = 1500, min_relevance: float = 0.5):
+        """
+        Initialize the index.
+
+        Args:
+            chunk_store (ChunkStore): Resolves span references to text when claims are recorded.
+            radius_bytes (int): Distance around a change within which evidence counts as affected
+                                (default: one chunk of `BookChunker`).
+            min_relevance (float): Lowest `relevance` at which an inserted chunk can attract a claim.
+        """
+        self.chunk_store = chunk_store or get_chunk_store()
+        self.radius_bytes = radius_bytes
+        self.min_relevance = min_relevance
+        self._lock = threading.Lock()
+        self._claims: Dict[str, tuple] = {}  # claim_key -> (claim, revision, spans, admission)
+        self._by_path: Dict[str, Set[str]] = collections.defaultdict(set)
+        self._by_word: Dict[str, Set[str]] = collections.defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._claims)
+
+    def record(self, claim_key: str, claim: str, context, revision: int = 0) -> None:
+        """
+        Store (or replace) the evidence of a verdict.
+
+        Args:
+            claim_key (str): Identity of the claim row.
+            claim (str): The claim text.
+            context: The verdict's context (span references, see `drop_text`).
+            revision (int): Revision of the claim the verdict belongs to.
+        """
+        chunks = as_chunk_list(context)
+        spans = [span for span in map(ChunkStore.span_of, chunks) if span is not None]
+        scores = [relevance(claim, self.chunk_store.text_of(chunk)) for chunk in chunks]
+        # An inserted chunk must beat the weakest current evidence (and the floor) to matter
+        admission = max(self.min_relevance, min(scores, default=0.0))
+        with self._lock:
+            self._remove(claim_key)
+            self._claims[claim_key] = (claim, revision, spans, admission)
+            for span in spans:
+                self._by_path[span.file_id].add(claim_key)
+            for word in content_words(claim):
+                self._by_word[word].add(claim_key)
+
+    def forget(self, claim_key: str, revision: int = None) -> None:
+        """Drop a claim's evidence (only if it still belongs to `revision`, when given)."""
+        with self._lock:
+            entry = self._claims.get(claim_key)
+            if entry is not None and (revision is None or entry[1] == revision):
+                self._remove(claim_key)
+
+    def _remove(self, claim_key: str) -> None:
+        entry = self._claims.pop(claim_key, None)
+        if entry is None:
+            return
+        claim, _, spans, _ = entry
+        for span in spans:
+            self._by_path[span.file_id].discard(claim_key)
+        for word in content_words(claim):
+            self._by_word[word].discard(claim_key)
+
+    def near(self, path: str, ranges: Iterable[Tuple[int, int]]) -> Set[str]:
+        """Claims with evidence in `path` within `radius_bytes` of any of the byte ranges."""
+        ranges = merge_ranges(ranges, gap=self.radius_bytes)
+        affected = set()
+        with self._lock:
+            for claim_key in self._by_path.get(path, ()):
+                spans = self._claims[claim_key][2]
+                if any(
+                    span.file_id == path
+                    and span.start < end + self.radius_bytes
+                    and span.end > start - self.radius_bytes
+                    for span in spans
+                    for start, end in ranges
+                ):
+                    affected.add(claim_key)
+        return affected
+
+    def remap(self, path: str, moves: Dict[ChunkSpan, ChunkSpan]) -> None:
+        """Point evidence at the new spans of chunks whose content moved within `path`."""
+        with self._lock:
+            for claim_key in self._by_path.get(path, ()):
+                claim, revision, spans, admission = self._claims[claim_key]
+                self._claims[claim_key] = (claim, revision, [moves.get(span, span) for span in spans], admission)
+
+    def attracted(self, text: str) -> Set[str]:
+        """Claims that an inserted chunk with this text is relevant enough to join."""
+        words = content_words(text)
+        with self._lock:
+            candidates = set().union(*(self._by_word.get(word, ()) for word in words)) if words else set()
+            entries = {key: self._claims[key] for key in candidates}
+        return {
+            key for key, (claim, _, _, admission) in entries.items()
+            if relevance(claim, text) >= admission
+        }
+
+
+class RevisionSubject(pw.io.python.ConnectorSubject):
+    """
+    Emits one row per re-audit request, numbering the revisions of each claim from 1.
+
+    Requests are held for `delay_s`: the chunk table changes before the index has embedded
+    the new chunks, and retrieval is as-of-now, so an immediate re-audit would search the
+    old index.
+    """
+
+    def __init__(self, delay_s: float = 2.0):
+        super().__init__()
+        self.delay_s = delay_s
+        self._queue = queue.Queue()
+
+    def run(self):
+        revisions = collections.Counter()
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            claim_key, due = item
+            time.sleep(max(0.0, due - time.monotonic()))
+            revisions[claim_key] += 1
+            self.next(claim_key=claim_key, revision=revisions[claim_key])
+
+    def bump(self, claim_key: str) -> None:
+        self._queue.put((claim_key, time.monotonic() + self.delay_s))
+
+    def stop(self) -> None:
+        self._queue.put(None)
+
+
+class ReauditTracker:
+    """
+    Re-audits only the claims whose evidence neighborhood changed.
+
+    `watch` subscribes to the chunk table of the index and to the audit results. The results
+    fill a `DependencyIndex`; chunk changes are netted per engine time by content (an edited
+    book re-parses every chunk; unchanged ones come back with the same text, at a shifted
+    span when the edit was earlier in the book). Evidence in moved chunks is remapped to the
+    new spans, and the remaining removals and insertions bump the revision of each affected
+    claim. The requests
+    are a Pathway table (`revisions`) that the auditor joins with the claims, so a bump re-runs
+    retrieval and verification for that claim only, and the engine retracts the stale verdict
+    and inserts the new one in every output.
+
+    Usage:
+        tracker = ReauditTracker()
+        results = auditor.audit_backstory(claims, revisions=tracker.revisions())
+        tracker.watch(index.chunked_docs, results)
+    """
+
+    def __init__(self, chunk_store: ChunkStore = None, radius_bytes: int = 1500, min_relevance: float = 0.5,
+                 delay_s: float = 2.0, verbose: bool = True):
+        """
+        Initialize the tracker.
+
+        Args:
+            chunk_store (ChunkStore): Resolves evidence spans (see `DependencyIndex`).
+            radius_bytes (int): Neighborhood around changed bytes (see `DependencyIndex`).
+            min_relevance (float): Relevance floor for inserted chunks (see `DependencyIndex`).
+            delay_s (float): Time for the index to absorb a change before claims are re-audited;
+                             should exceed the embedding latency.
+            verbose (bool): Print a line per batch of re-audits.
+        """
+        self.dependencies = DependencyIndex(chunk_store, radius_bytes, min_relevance)
+        self.subject = RevisionSubject(delay_s)
+        self.verbose = verbose
+        self.bumps = 0
+        # (path, text) -> spans removed / added in this time
+        self._removed: Dict[tuple, List[ChunkSpan]] = collections.defaultdict(list)
+        self._added: Dict[tuple, List[ChunkSpan]] = collections.defaultdict(list)
+
+    def revisions(self) -> pw.Table:
+        """
+        Append-only table of re-audit requests with 'claim_key' and 'revision' (1, 2, ...).
+        """
+        class RevisionSchema(pw.Schema):
+            claim_key: str
+            revision: int
+
+        return pw.io.python.read(self.subject, schema=RevisionSchema, autocommit_duration_ms=100)
+
+    def watch(self, chunks: pw.Table, results: pw.Table) -> None:
+        """
+        Track evidence and chunk changes.
+
+        Args:
+            chunks (pw.Table): Indexed chunks with 'text' and 'metadata' (path, start, end),
+                               e.g. `VectorStoreServer.chunked_docs`.
+            results (pw.Table): Output of `NarrativeAuditor.audit_backstory` with revisions.
+        """
+        pw.io.subscribe(chunks, on_change=self._on_chunk, on_time_end=self._on_chunk_time_end)
+        pw.io.subscribe(results, on_change=self._on_result)
+
+    def close(self) -> None:
+        """Stop the revision stream (lets static runs finish)."""
+        self.subject.stop()
+
+    def _on_result(self, key, row, time, is_addition):
+        claim_key, revision = row["claim_key"], row["revision"]
+        if is_addition:
+            self.dependencies.record(claim_key, row["claim"], row["context"], revision)
+        else:
+            self.dependencies.forget(claim_key, revision)
+
+    def _on_chunk(self, key, row, time, is_addition):
+        span = ChunkStore.span_of(as_chunk_list({"metadata": row["metadata"]})[0])
+        if span is None:
+            return
+        (self._added if is_addition else self._removed)[span.file_id, row["text"]].append(span)
+
+    def _on_chunk_time_end(self, time):
+        removed, self._removed = self._removed, collections.defaultdict(list)
+        added, self._added = self._added, collections.defaultdict(list)
+        moves = collections.defaultdict(dict)  # path -> old span -> new span
+        changed = collections.defaultdict(list)  # path -> ranges of removed content (old offsets)
+        inserted = collections.defaultdict(list)  # path -> ranges of inserted content (new offsets)
+        texts = []
+        for path, text in removed.keys() | added.keys():
+            # Repeated texts are paired in file order
+            old, new = sorted(removed.get((path, text), ())), sorted(added.get((path, text), ()))
+            for before, after in zip(old, new):
+                if before != after:
+                    moves[path][before] = after
+            changed[path] += [(span.start, span.end) for span in old[len(new):]]
+            inserted[path] += [(span.start, span.end) for span in new[len(old):]]
+            if len(new) > len(old):
+                texts.append(text)
+        if not len(self.dependencies):
+            return
+
+        # Removals are compared with the evidence before it moves, insertions after
+        affected = set()
+        for path, path_ranges in changed.items():
+            if path_ranges:
+                affected |= self.dependencies.near(path, path_ranges)
+        for path, path_moves in moves.items():
+            self.dependencies.remap(path, path_moves)
+        for path, path_ranges in inserted.items():
+            if path_ranges:
+                affected |= self.dependencies.near(path, path_ranges)
+        for text in texts:
+            affected |= self.dependencies.attracted(text)
+
+        for claim_key in sorted(affected):
+            self.subject.bump(claim_key)
+        self.bumps += len(affected)
+        if self.verbose and affected:
+            count = sum(len(r) for r in changed.values()) + sum(len(r) for r in inserted.values())
+            print(f"Re-audit: {count} changed chunks affect {len(affected)} of {len(self.dependencies)} claims")
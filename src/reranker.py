@@ -0,0 +1,171 @@
+"""
+Module: reranker.py
+Description: CPU-only second-stage reranking of retrieved chunks with a per-claim dynamic k.
+"""
+
+import re
+from functools import lru_cache
+from typing import List
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "been", "but", "by", "for", "from", "had", "has", "have",
+    "he", "her", "his", "him", "in", "into", "is", "it", "its", "of", "on", "or", "she", "that", "the",
+    "their", "them", "they", "this", "to", "was", "were", "which", "who", "with", "would",
+}
+WORD = re.compile(r"\w+")
+ENTITY = re.compile(r"\b(?:[A-Z][\w’'-]+|\d[\d,.]*)")
+
+
+def as_chunk_list(context) -> List[dict]:
+    """
+    Normalize a retrieval result into a list of plain dicts.
+
+    `retrieve_query` returns a `pw.Json` list, UDFs may receive a tuple of `pw.Json`
+    items, and mocks pass plain dicts; all of them end up as `[{"text": ..., ...}]`.
+    """
+    if context is None:
+        return []
+    context = getattr(context, "value", context)
+    if isinstance(context, (str, dict)):
+        context = [context]
+    chunks = []
+    for item in context:
+        item = getattr(item, "value", item)
+        if isinstance(item, str):
+            item = {"text": item}
+        item = dict(item)
+        metadata = getattr(item.get("metadata"), "value", item.get("metadata"))
+        item["metadata"] = dict(metadata) if isinstance(metadata, dict) else {}
+        chunks.append(item)
+    return chunks
+
+
+# Cached: claims reranked within a shared prefetched pool see the same chunk texts repeatedly.
+# Callers must not mutate the returned sets.
+@lru_cache(maxsize=8192)
+def content_words(text: str) -> frozenset:
+    return frozenset(w for w in WORD.findall(text.lower()) if w not in STOPWORDS and len(w) > 1)
+
+
+@lru_cache(maxsize=8192)
+def entities(text: str) -> frozenset:
+    return frozenset(e.rstrip(".,").lower() for e in ENTITY.findall(text) if e.lower() not in STOPWORDS)
+
+
+class LocalReranker:
+    """
+    Reranks a generous candidate set from the vector index and keeps only as many chunks
+    as the claim needs.
+
+    Each candidate is scored on four cheap signals, each scaled to [0, 1]:
+        - vector: the index similarity, min-max scaled across the candidates.
+        - lexical: share of the claim's content words found in the chunk.
+        - entity: share of the claim's names and numbers found in the chunk.
+        - proximity: whether the chunk sits in the same chapter as, or next to, other strong hits.
+
+    The ranked list is then cut where the score drops off (dynamic k).
+    """
+
+    def __init__(
+        self,
+        candidate_k: int = 12,
+        min_k: int = 1,
+        max_k: int = 5,
+        drop_ratio: float = 0.75,
+        weights: dict = None,
+    ):
+        """
+        Initialize the reranker.
+
+        Args:
+            candidate_k (int): Candidates requested from the vector index per claim.
+            min_k (int): Chunks always kept.
+            max_k (int): Upper bound on chunks kept.
+            drop_ratio (float): Stop once a chunk scores below this fraction of the best chunk.
+            weights (dict): Weights of the 'vector', 'lexical', 'entity' and 'proximity' signals.
+        """
+        self.candidate_k = candidate_k
+        self.min_k = min_k
+        self.max_k = max_k
+        self.drop_ratio = drop_ratio
+        self.weights = {"vector": 0.4, "lexical": 0.25, "entity": 0.25, "proximity": 0.1}
+        self.weights.update(weights or {})
+
+    def rerank(self, claim: str, candidates) -> List[dict]:
+        """
+        Score and sort candidates for a claim.
+
+        Args:
+            claim (str): The atomic claim.
+            candidates: Retrieval result (see `as_chunk_list`).
+
+        Returns:
+            List[dict]: Candidates best first, each with an added 'rerank_score'.
+        """
+        chunks = as_chunk_list(candidates)
+        if not chunks:
+            return []
+
+        claim_words = content_words(claim)
+        claim_entities = entities(claim)
+
+        # Index similarity: pathway reports dist = -score, so a lower dist is better.
+        dists = [c.get("dist") for c in chunks]
+        if all(d is not None for d in dists) and max(dists) > min(dists):
+            lo, hi = min(dists), max(dists)
+            vector = [(hi - d) / (hi - lo) for d in dists]
+        else:
+            vector = [1.0 - i / len(chunks) for i in range(len(chunks))]
+
+        # Anchors for proximity: the three strongest vector hits.
+        anchors = sorted(range(len(chunks)), key=lambda i: -vector[i])[:3]
+
+        for i, chunk in enumerate(chunks):
+            text = chunk.get("text", "")
+            words = content_words(text)
+            lexical = len(claim_words & words) / len(claim_words) if claim_words else 0.0
+            entity = len(claim_entities & entities(text)) / len(claim_entities) if claim_entities else lexical
+            proximity = self._proximity(chunk, [chunks[a] for a in anchors if a != i])
+
+            chunk["rerank_score"] = (
+                self.weights["vector"] * vector[i]
+                + self.weights["lexical"] * lexical
+                + self.weights["entity"] * entity
+                + self.weights["proximity"] * proximity
+            )
+
+        return sorted(chunks, key=lambda c: -c["rerank_score"])
+
+    @staticmethod
+    def _proximity(chunk: dict, anchors: List[dict]) -> float:
+        meta = chunk["metadata"]
+        if not anchors or "chunk_index" not in meta:
+            return 0.0
+        score = 0.0
+        for anchor in anchors:
+            other = anchor["metadata"]
+            if other.get("path") != meta.get("path"):
+                continue
+            if abs(other.get("chunk_index", -10) - meta["chunk_index"]) <= 1:
+                score = max(score, 1.0)
+            elif other.get("chapter") is not None and other.get("chapter") == meta.get("chapter"):
+                score = max(score, 0.5)
+        return score
+
+    def select(self, claim: str, candidates) -> List[dict]:
+        """
+        Rerank candidates and keep the top chunks until the score drops off.
+
+        Returns:
+            List[dict]: Between `min_k` and `max_k` chunks, best first.
+        """
+        ranked = self.rerank(claim, candidates)
+        if not ranked:
+            return []
+        best = ranked[0]["rerank_score"]
+        selected = ranked[:self.min_k]
+        for chunk in ranked[self.min_k:self.max_k]:
+            if chunk["rerank_score"] < best * self.drop_ratio:
+                break
+            selected.append(chunk)
+        return selected
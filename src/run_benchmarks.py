@@ -0,0 +1,213 @@
+"""
+Module: run_benchmarks.py
+Description: Microbenchmarks of the pipeline's CPU hot paths with JSON baselines and
+             regression checks.
+
+Each benchmark runs a fixed workload built from data/Books and data/train.csv, repeats it
+and records the median wall time. Results are written to JSON; when a baseline is given,
+any benchmark slower than baseline * (1 + threshold) fails the run (exit code 1).
+
+Usage example::
+    python -m src.run_benchmarks --save-baseline results/benchmark_baseline.json
+    python -m src.run_benchmarks --baseline results/benchmark_baseline.json --threshold 0.25
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict
+
+import pandas as pd
+
+from src.analyzer import BackstoryAnalyzer, ExtractionResponse
+from src.auditor import build_verification_prompt
+from src.chunker import BookChunker
+from src.fast_decomposer import FastDecomposer
+from src.local_embedder import HashingEmbedder
+from src.reranker import LocalReranker
+from src.vector_index import QuantizedVectorIndex
+
+
+def measure(fn: Callable, repeat: int, warmup: int = 1) -> dict:
+    """Run `fn` warmup + repeat times and summarize the timed runs."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"median_s": statistics.median(times), "min_s": min(times), "repeat": repeat}
+
+
+class Workload:
+    """Fixed inputs shared by the benchmarks, built once from the repository data."""
+
+    def __init__(self, books_dir: str, train_csv: str, queries: int = 100):
+        self.books = {}
+        for name in sorted(os.listdir(books_dir)):
+            with open(os.path.join(books_dir, name), "rb") as f:
+                self.books[name] = f.read()
+        self.all_backstories = pd.read_csv(train_csv)["content"].astype(str).tolist()
+        self.backstories = self.all_backstories[:queries]
+
+        self.chunker = BookChunker()
+        self.chunks = []
+        for name, contents in self.books.items():
+            for text, meta in self.chunker.chunk(contents):
+                self.chunks.append({"text": text, "metadata": dict(meta, path=name)})
+
+        self.claims = [b.split(".")[0] for b in self.backstories]
+        self.embedder = HashingEmbedder()
+        self.index = QuantizedVectorIndex(self.embedder.dimensions, storage="int8")
+        self.index.add(list(range(len(self.chunks))), self.embedder.embed([c["text"] for c in self.chunks]))
+        self.query_vectors = self.embedder.embed(self.claims)
+
+        # Retrieval candidates per claim (12, as the auditor over-fetches) with synthetic distances
+        ids, scores = self.index.search_batch(self.query_vectors, k=12)
+        self.candidates = [
+            [dict(self.chunks[i], dist=-float(s)) for i, s in zip(row_ids, row_scores)]
+            for row_ids, row_scores in zip(ids, scores)
+        ]
+        self.extraction_payloads = [
+            json.dumps({"facts": [{"fact": s.strip() + "."} for s in b.split(".") if s.strip()] * 4})
+            for b in self.all_backstories
+        ]
+        self.analyzer = BackstoryAnalyzer(llm_config={"model": "gemini/gemini-flash-latest", "api_key": "offline"})
+        self.reranker = LocalReranker()
+        self.fast_decomposer = FastDecomposer()
+
+    @property
+    def book_bytes(self) -> int:
+        return sum(len(c) for c in self.books.values())
+
+
+def build_benchmarks(w: Workload) -> Dict[str, Callable]:
+    def chunk_books():
+        for contents in w.books.values():
+            w.chunker.chunk(contents)
+
+    def decomposition_prompts():
+        for backstory in w.all_backstories:
+            w.analyzer.build_decomposition_prompt(backstory)
+
+    def validation_prompts():
+        for backstory in w.all_backstories:
+            w.analyzer.build_validation_prompt(backstory, backstory.split("."))
+
+    def verification_prompts():
+        for claim, candidates in zip(w.claims, w.candidates):
+            build_verification_prompt(claim, candidates[:5])
+
+    def fast_decomposition():
+        for backstory in w.all_backstories:
+            if w.fast_decomposer.accepts(backstory):
+                w.fast_decomposer.decompose(backstory)
+
+    def parse_extraction():
+        for payload in w.extraction_payloads:
+            ExtractionResponse.model_validate_json(payload)
+
+    def rerank():
+        for claim, candidates in zip(w.claims, w.candidates):
+            w.reranker.select(claim, candidates)
+
+    def retrieval():
+        w.index.search_batch(w.query_vectors, k=12)
+
+    def serialize_results():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(["claim", "context", "context_k", "is_consistent", "reason"])
+        for claim, candidates in zip(w.claims, w.candidates):
+            context = candidates[:5]
+            writer.writerow([claim, json.dumps(context), len(context), True, "Supported by the passage."])
+
+    return {
+        "chunk_books": chunk_books,
+        "decomposition_prompts": decomposition_prompts,
+        "validation_prompts": validation_prompts,
+        "verification_prompts": verification_prompts,
+        "fast_decomposition": fast_decomposition,
+        "parse_extraction": parse_extraction,
+        "rerank": rerank,
+        "retrieval": retrieval,
+        "serialize_results": serialize_results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_s: float = 0.0) -> list:
+    """
+    Return (name, baseline_s, current_s) for every benchmark slower than allowed.
+    Slowdowns smaller than `min_delta_s` are treated as timer noise.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if not previous or current["median_s"] - previous["median_s"] < min_delta_s:
+            continue
+        if current["median_s"] > previous["median_s"] * (1 + threshold):
+            regressions.append((name, previous["median_s"], current["median_s"]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run component microbenchmarks.")
+    parser.add_argument("--books-dir", default="data/Books", help="Books used for the fixed workload")
+    parser.add_argument("--train-csv", default="data/train.csv", help="Backstories used for the fixed workload")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--only", nargs="+", help="Run only these benchmarks")
+    parser.add_argument("--output", default="results/benchmark_latest.json", help="Where to write this run's results")
+    parser.add_argument("--save-baseline", help="Also write this run as the baseline file")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    print("Building fixed workload...")
+    workload = Workload(args.books_dir, args.train_csv)
+    benchmarks = build_benchmarks(workload)
+    selected = args.only or list(benchmarks)
+
+    results = {}
+    for name in selected:
+        results[name] = measure(benchmarks[name], args.repeat)
+        print(f"{name:<24} median {results[name]['median_s'] * 1000:>9.2f} ms   min {results[name]['min_s'] * 1000:>9.2f} ms")
+    if "chunk_books" in results:
+        mb_s = workload.book_bytes / 1e6 / results["chunk_books"]["median_s"]
+        print(f"Chunking throughput: {mb_s:.1f} MB/s over {len(workload.chunks)} chunks")
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "benchmarks": results,
+    }
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms / 1000)
+        for name, before, after in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms (+{(after / before - 1):.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,7 @@ def main():
     results = auditor.audit_backstory(gold_table)
     
     # 5. Save Results
-    pw.io.csv.write(results, "results/evaluation_results.csv")
+    pw.io.csv.write(auditor.with_evidence_text(results), "results/evaluation_results.csv")
     
     print("Evaluation pipeline started. Results will be in 'results/evaluation_results.csv'.")
     pw.run()
@@ -0,0 +1,138 @@
+"""
+Module: scheduler.py
+Description: Weighted fair queuing of LLM work across backstories.
+"""
+
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Hashable, List
+
+
+class FairScheduler:
+    """
+    Orders LLM calls so that one long backstory cannot starve the others.
+
+    Each backstory is a flow. Calls are ordered by start-time fair queuing: a call's
+    finish tag is `max(virtual_time, flow's last finish tag) + cost / weight`, so a flow
+    that already queued many claims gets later tags than a flow that just arrived.
+    Flows with few items left get a boost (`finishing_boost / remaining`) so backstories
+    that are about to produce a verdict are finished first.
+
+    Usage:
+        scheduler.register(flow, items=3)
+        async with scheduler.slot(flow):
+            ...  # LLM call
+        scheduler.finish(flow)
+    """
+
+    def __init__(self, max_concurrency: int = 4, finishing_boost: float = 2.0, verbose: bool = True):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_concurrency (int): LLM calls allowed in flight at once.
+            finishing_boost (float): Tag bonus for flows close to completion (0 disables it).
+            verbose (bool): Print a line whenever a backstory completes.
+        """
+        self.max_concurrency = max_concurrency
+        self.finishing_boost = finishing_boost
+        self.verbose = verbose
+
+        self._virtual_time = 0.0
+        self._last_finish: Dict[Hashable, float] = {}
+        self._weights: Dict[Hashable, float] = {}
+        self._remaining: Dict[Hashable, int] = {}
+        self._started_at: Dict[Hashable, float] = {}
+        self._waiting: List[tuple] = []  # (finish_tag, start_tag, seq, flow, future)
+        self._seq = itertools.count()
+        self._in_flight = 0
+        self.completed: List[float] = []
+
+    def register(self, flow: Hashable, items: int = 1, weight: float = 1.0) -> None:
+        """
+        Announce work items (decomposition or claim verifications) for a flow.
+
+        Args:
+            flow (Hashable): Backstory key.
+            items (int): Number of items that must finish before the backstory is complete.
+            weight (float): Relative share of LLM capacity for this flow.
+        """
+        if flow not in self._remaining:
+            self._started_at[flow] = time.monotonic()
+            self._remaining[flow] = 0
+        self._remaining[flow] += items
+        self._weights[flow] = weight
+
+    def finish(self, flow: Hashable) -> None:
+        """Mark one item of a flow as done; records the backstory latency on the last one."""
+        if flow not in self._remaining:
+            return
+        self._remaining[flow] -= 1
+        if self._remaining[flow] <= 0:
+            latency = time.monotonic() - self._started_at.pop(flow)
+            del self._remaining[flow]
+            self._weights.pop(flow, None)
+            self._last_finish.pop(flow, None)
+            self.completed.append(latency)
+            if self.verbose:
+                print(f"Backstory complete in {latency:.1f}s ({len(self.completed)} done, p95 {self.percentile(95):.1f}s)")
+
+    def _priority(self, entry: tuple) -> float:
+        finish_tag, _, _, flow, _ = entry
+        remaining = self._remaining.get(flow, 1)
+        return finish_tag - self.finishing_boost / max(1, remaining)
+
+    def _dispatch(self) -> None:
+        while self._in_flight < self.max_concurrency and self._waiting:
+            entry = min(self._waiting, key=lambda e: (self._priority(e), e[2]))
+            self._waiting.remove(entry)
+            _, start_tag, _, _, future = entry
+            if future.cancelled():
+                continue
+            self._virtual_time = max(self._virtual_time, start_tag)
+            self._in_flight += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, flow: Hashable, cost: float = 1.0):
+        """
+        Wait for this flow's turn, then hold one of the `max_concurrency` slots.
+
+        Args:
+            flow (Hashable): Backstory key.
+            cost (float): Relative cost of the call (e.g. prompt size); defaults to 1.
+        """
+        weight = self._weights.get(flow, 1.0)
+        start_tag = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        finish_tag = start_tag + cost / weight
+        self._last_finish[flow] = finish_tag
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.append((finish_tag, start_tag, next(self._seq), flow, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._in_flight -= 1
+                self._dispatch()
+            raise
+
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiting)
+
+    def percentile(self, q: float) -> float:
+        """Percentile of completed backstory latencies in seconds."""
+        if not self.completed:
+            return 0.0
+        ordered = sorted(self.completed)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q / 100))]
@@ -0,0 +1,249 @@
+"""
+Module: server.py
+Description: HTTP audit service. Accepts a backstory (or a single claim) through a Pathway
+             REST connector and answers with one verdict per claim. Requests that arrive
+             within the same window are processed together: their claims share the engine's
+             retrieval batches and the auditor's verification batches.
+"""
+
+import os
+
+import pathway as pw
+from dotenv import load_dotenv
+
+from src.analyzer import BackstoryAnalyzer
+from src.auditor import NarrativeAuditor
+from src.profiler import SamplingProfiler
+from src.reranker import as_chunk_list
+from src.scheduler import FairScheduler
+
+load_dotenv()
+
+
+class AuditRequestSchema(pw.Schema):
+    """
+    Body of POST /v1/audit. Either 'backstory' (decomposed into claims) or 'claim' (checked
+    as is); 'char' and 'book_name' narrow the prefetched evidence pool.
+    """
+    backstory: str = pw.column_definition(default_value="")
+    claim: str = pw.column_definition(default_value="")
+    char: str = pw.column_definition(default_value="")
+    book_name: str = pw.column_definition(default_value="")
+
+
+def verdict_entry(claim: str, consistent, reason, context, mode) -> dict:
+    """One verdict of the response, from the columns of `NarrativeAuditor.audit_backstory`."""
+    value = lambda v: v.value if isinstance(v, pw.Json) else v
+    # Evidence as span references only: the caller gets where to look, not the book text
+    evidence = [
+        {key: chunk["metadata"].get(key) for key in ("path", "chapter_title", "start", "end")}
+        for chunk in as_chunk_list(value(context))
+    ]
+    return {
+        "claim": claim,
+        "consistent": bool(value(consistent)),
+        "reason": value(reason),
+        "evidence": evidence,
+        "mode": value(mode),
+    }
+
+
+def assemble_response(expected: int, verdicts: tuple) -> dict:
+    """
+    Response body of one request.
+
+    Args:
+        expected (int): Number of claims of the request.
+        verdicts (tuple): (position, verdict) pairs, in any order.
+
+    Returns:
+        dict: {"claims": n, "consistent": bool, "verdicts": [...]} with verdicts in claim order;
+              a request is consistent when every claim is.
+    """
+    ordered = [verdict.value if isinstance(verdict, pw.Json) else verdict for _, verdict in sorted(verdicts)]
+    return {
+        "claims": expected,
+        "consistent": all(v["consistent"] for v in ordered),
+        "verdicts": ordered,
+    }
+
+
+def answer_requests(
+    queries: pw.Table,
+    analyzer: BackstoryAnalyzer,
+    auditor: NarrativeAuditor,
+    window_ms: int = 200,
+    scheduler: FairScheduler = None,
+) -> pw.Table:
+    """
+    Decompose, retrieve and verify a table of audit requests.
+
+    Args:
+        queries (pw.Table): Requests with the columns of `AuditRequestSchema`.
+        analyzer (BackstoryAnalyzer): Decomposes backstories into claims.
+        auditor (NarrativeAuditor): Retrieves evidence and verifies claims.
+        window_ms (int): Commit interval of the decomposition results.
+        scheduler (FairScheduler): Optional fair scheduler shared with the LLM client.
+
+    Returns:
+        pw.Table: Table in the universe of `queries` (rows appear once every claim of the
+                  request has a verdict) with a 'result' column (see `assemble_response`).
+    """
+    @pw.udf(executor=pw.udfs.fully_async_executor(autocommit_duration_ms=window_ms))
+    async def claims_of(backstory: str, claim: str) -> list[str]:
+        if claim.strip():
+            return [claim.strip()]
+        if scheduler is not None:
+            scheduler.register(backstory)
+        claims = await analyzer.extract_atomic_claims(backstory)
+        if scheduler is not None:
+            scheduler.register(backstory, len(claims))
+            scheduler.finish(backstory)
+        return claims
+
+    # Keep each claim's position so the verdicts can be returned in order
+    requests = queries.select(
+        source_text=pw.if_else(pw.this.claim != "", pw.this.claim, pw.this.backstory),
+        claims=claims_of(pw.this.backstory, pw.this.claim),
+    ).await_futures()
+    requests = requests.select(
+        pw.this.source_text,
+        request_id=pw.this.id,
+        expected=pw.apply_with_type(len, int, pw.this.claims),
+        numbered=pw.apply_with_type(lambda claims: tuple(enumerate(claims)), tuple, pw.this.claims),
+    )
+    claims = requests.flatten(pw.this.numbered).select(
+        backstory_id=pw.this.request_id,
+        source_text=pw.this.source_text,
+        position=pw.apply_with_type(lambda item: item[0], int, pw.this.numbered),
+        claim=pw.apply_with_type(lambda item: item[1], str, pw.this.numbered),
+    )
+
+    # Evidence pool per request, retrieved while the backstory is decomposed (empty
+    # requests have no claims and no pool)
+    pool = auditor.prefetch(queries.select(
+        backstory=pw.if_else(pw.this.claim != "", pw.this.claim, pw.this.backstory),
+        char=pw.this.char,
+        book_name=pw.this.book_name,
+    ).filter(pw.this.backstory.str.strip() != ""))
+    results = auditor.audit_backstory(claims, pool=pool)
+
+    verdicts = results.join(claims, results.id == claims.id).select(
+        claims.backstory_id,
+        entry=pw.make_tuple(
+            claims.position,
+            pw.apply_with_type(
+                verdict_entry, pw.Json,
+                results.claim, results.is_consistent, results.reason, results.context, results.mode,
+            ),
+        ),
+    )
+    answered = verdicts.groupby(pw.this.backstory_id, id=pw.this.backstory_id).reduce(
+        done=pw.reducers.count(),
+        entries=pw.reducers.tuple(pw.this.entry),
+    )
+
+    # Requests without claims have no verdict rows: the left join answers them at once
+    progress = requests.join_left(answered, requests.id == answered.id, id=requests.id).select(
+        requests.expected,
+        done=pw.coalesce(answered.done, 0),
+        entries=pw.coalesce(answered.entries, ()),
+    )
+    return progress.filter(pw.this.done >= pw.this.expected).select(
+        result=pw.apply_with_type(assemble_response, pw.Json, pw.this.expected, pw.this.entries)
+    )
+
+
+def build_service(
+    analyzer: BackstoryAnalyzer,
+    auditor: NarrativeAuditor,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    window_ms: int = 200,
+    route: str = "/v1/audit",
+    scheduler: FairScheduler = None,
+) -> pw.Table:
+    """
+    Serve `answer_requests` over HTTP (POST `route`, body as in `AuditRequestSchema`).
+
+    The connector commits the requests received during each `window_ms` window as one
+    batch. Their claims reach the index together (one engine batch of queries), and with
+    `auditor.batch_size` > 1 their verifications are grouped across callers by the
+    auditor's `MicroBatcher` (whose wait should match the window). A request is answered
+    once all of its claims have a verdict.
+
+    Args:
+        analyzer (BackstoryAnalyzer): Decomposes backstories into claims.
+        auditor (NarrativeAuditor): Retrieves evidence and verifies claims; its index table
+                                    is the vector store over the books.
+        host (str): Interface to listen on.
+        port (int): Port to listen on.
+        window_ms (int): How long requests are held to be batched with concurrent ones.
+        route (str): Path of the endpoint.
+        scheduler (FairScheduler): Optional fair scheduler shared with the LLM client.
+
+    Returns:
+        pw.Table: The answered requests, with a 'result' column.
+    """
+    webserver = pw.io.http.PathwayWebserver(host=host, port=port)
+    queries, response_writer = pw.io.http.rest_connector(
+        webserver=webserver,
+        route=route,
+        schema=AuditRequestSchema,
+        autocommit_duration_ms=window_ms,
+        delete_completed_queries=True,
+    )
+    responses = answer_requests(queries, analyzer, auditor, window_ms, scheduler)
+    response_writer(responses)
+    return responses
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve narrative audits over HTTP.")
+    parser.add_argument("--books-dir", default="./data/external/Dataset/Books", help="Books to index")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on")
+    parser.add_argument("--window-ms", type=int, default=200, help="How long requests are held to be batched together")
+    parser.add_argument("--batch-size", type=int, default=8, help="Claims verified per LLM call (1 disables batching)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="LLM calls in flight, shared fairly across requests")
+    parser.add_argument("--profile", action="store_true", help="Sample CPU stacks by pipeline stage until shutdown; written to results/")
+    parser.add_argument("--profile-interval-ms", type=float, default=5, help="Time between profiler samples")
+    parser.add_argument("--pacing-s", type=float, default=0.0, help="Pause before each LLM call (free-tier rate limits)")
+    parser.add_argument("--stream", action="store_true", help="Stream verification completions and parse the verdicts as they arrive")
+    parser.add_argument("--early-stop", action="store_true", help="With --stream, stop each verification once the verdict fields are in (no reason)")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    from src.indexer import HybridIndexer
+    from src.ingestor import DataIngestor
+
+    books = DataIngestor(args.books_dir).ingest_books()
+    index = HybridIndexer(embedder_config={"model": "gemini/text-embedding-004", "api_key": api_key}).build_index(books)
+
+    llm_config = {"model": "gemini/gemini-flash-latest", "api_key": api_key, "pacing_s": args.pacing_s}
+    analyzer = BackstoryAnalyzer(llm_config=llm_config)
+    scheduler = FairScheduler(max_concurrency=args.llm_concurrency)
+    auditor = NarrativeAuditor(
+        index_table=index,
+        llm_config={**llm_config, "stream": args.stream, "early_stop": args.early_stop},
+        batch_size=args.batch_size,
+        batch_wait_s=args.window_ms / 1000,
+        commit_ms=args.window_ms,
+    )
+    # Decomposition and verification calls are scheduled together, whichever client makes them
+    analyzer.client.scheduler = auditor.client.scheduler = scheduler
+
+    build_service(analyzer, auditor, args.host, args.port, args.window_ms, scheduler=scheduler)
+    print(f"Serving POST http://{args.host}:{args.port}/v1/audit (window {args.window_ms} ms, batch {args.batch_size})")
+    if args.profile:
+        # Written when the server stops (Ctrl-C)
+        with SamplingProfiler(interval_s=args.profile_interval_ms / 1000, out_dir="results", name="server_profile"):
+            pw.run()
+    else:
+        pw.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import os
+import tempfile
+from unittest.mock import patch
+
+from src.batch_evaluation import BatchEvaluator
+from src.benchmark_batch_eval import OfflineBulkEmbedder, spans_of
+from src.benchmark_server import simulated_completion
+from src.chunk_store import ChunkStore
+
+CONFIG = {"model": "offline", "api_key": "offline", "pacing_s": 0, "hedge": False}
+
+
+def test_batch_evaluation():
+    with patch("src.llm_client.acompletion", simulated_completion(1, 0)):
+        check_batch_evaluation()
+
+
+def check_batch_evaluation():
+    print("Testing static batch evaluation...")
+    claims = [
+        "The harpooner sharpened his harpoon on the whaling ship.",
+        "The gardener planted roses along the cottage wall.",
+        "The astronomer watched the comet through her telescope.",
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.txt")
+        with open(book, "w") as f:
+            for number, claim in enumerate(claims, start=1):
+                f.write(f"CHAPTER {number}.\n\n" + f"{claim} " * 40 + "\n\n")
+
+        async def scenario(batch_size):
+            embedder = OfflineBulkEmbedder(0, batch_size=2)
+            evaluator = BatchEvaluator(embedder, CONFIG, chunk_store=ChunkStore(), batch_size=batch_size)
+            chunks = await evaluator.index_books([book])
+            results = await evaluator.evaluate(claims)
+            evaluator.chunk_store.close()
+            return embedder, chunks, results
+
+        embedder, chunks, results = asyncio.run(scenario(1))
+        # Chunks and claims are embedded two texts per request
+        assert embedder.calls == -(-chunks // 2) + -(-len(claims) // 2), (embedder.calls, chunks)
+        assert list(results.columns) == ["claim", "context", "context_k", "expanded", "mode",
+                                         "is_consistent", "reason"]
+        assert results["is_consistent"].all()
+        for claim, context in zip(results["claim"], results["context"]):
+            chunk = json.loads(context)[0]
+            assert "text" not in chunk and {"path", "start", "end"} <= set(chunk["metadata"])
+            with open(book) as f:
+                text = f.read()[chunk["metadata"]["start"]:chunk["metadata"]["end"]]
+            assert claim in text, (claim, text[:80])
+
+        _, _, batched = asyncio.run(scenario(2))
+        assert batched["claim"].tolist() == claims and batched["is_consistent"].all()
+        assert [spans_of(c) for c in batched["context"]] == [spans_of(c) for c in results["context"]]
+    print(f"  {chunks} chunks, {embedder.calls} embedding calls for {len(claims)} claims")
+    print("SUCCESS: Claims were retrieved in bulk and verified singly and in batches.")
+
+
+if __name__ == "__main__":
+    test_batch_evaluation()
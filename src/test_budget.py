@@ -0,0 +1,67 @@
+import asyncio
+from types import SimpleNamespace
+
+import pandas as pd
+import pathway as pw
+
+from src.auditor import NarrativeAuditor, pack_context, parse_batch_verdicts
+from src.batcher import MicroBatcher
+from src.budget import BudgetController
+
+
+class MockIndex:
+    def query(self, query_table, k=3):
+        return query_table.select(query=pw.this.query, result=[{"text": "Context info 1"}, {"text": "Context info 2"}])
+
+
+def test_budget():
+    print("Testing the run-level budget and its degradation ladder...")
+
+    budget = BudgetController(max_calls=100)
+    modes = []
+    for _ in range(100):
+        modes.append(budget.mode())
+        budget.record(SimpleNamespace(usage=SimpleNamespace(total_tokens=250)))
+    modes.append(budget.mode())
+    ladder = list(dict.fromkeys(modes))
+    print(f"Modes over 100 calls: {ladder}")
+    assert ladder == ["full", "skip_validation", "small_k", "packed_context", "batched", "exhausted"]
+    assert budget.tokens == 25000
+    assert BudgetController(max_tokens=1000).mode() == "full"
+
+    # Micro-batching: 10 concurrent submissions, batches of at most 4, results routed back
+    async def double_all(items):
+        await asyncio.sleep(0.01)
+        return [2 * item for item in items]
+
+    async def submit_all():
+        batcher = MicroBatcher(double_all, max_batch=4, max_wait_s=0.05)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(10)))
+        return batcher, results
+
+    batcher, results = asyncio.run(submit_all())
+    assert results == [2 * i for i in range(10)] and batcher.batches == 3
+    print(f"10 items in {batcher.batches} batches (mean {batcher.mean_batch_size:.1f}).")
+
+    verdicts = parse_batch_verdicts({"verdicts": [{"id": 1, "consistent": True, "reason": "ok"}]}, 2)
+    assert verdicts[1]["consistent"] and "Missing" in verdicts[0]["reason"]
+
+    chunk = {"text": "Glenarvan owned the Duncan. The sea was calm. A shark was caught off the coast.", "metadata": {}}
+    packed = pack_context("Glenarvan caught a shark.", [chunk], max_chars=40)
+    assert packed[0]["packed"] and "shark" in packed[0]["text"] and len(packed[0]["text"]) < len(chunk["text"])
+
+    # An exhausted budget stops verification calls; every row records its mode
+    claims_table = pw.debug.table_from_pandas(pd.DataFrame({"claim": ["Claim 1", "Claim 2"]}))
+    auditor = NarrativeAuditor(index_table=MockIndex(), llm_config={"model": "mock/budget", "api_key": "dummy"})
+    auditor.client.budget = BudgetController(max_calls=1)
+    auditor.client.budget.record()
+    rows = pw.debug.table_to_pandas(auditor.audit_backstory(claims_table))
+    modes = {row["mode"].value for _, row in rows.iterrows()}
+    print(f"Verdict modes: {modes}; reason: {rows['reason'].iloc[0].value}")
+    assert modes == {"exhausted"}
+
+    print("SUCCESS: The pipeline steps down to cheaper modes as the budget runs out.")
+
+
+if __name__ == "__main__":
+    test_budget()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+from src.auditor import build_verification_prompt
+from src.chunk_store import ChunkStore, attach_text, drop_text, replace_book
+from src.chunker import BookChunker
+
+
+def test_chunk_store():
+    print("Testing memory-mapped chunk spans...")
+
+    path = "data/Books/In search of the castaways.txt"
+    store = ChunkStore()
+    spans = store.add_book(path)
+    with open(path, "rb") as f:
+        eager = BookChunker().chunk(f.read())
+    assert len(spans) == len(eager)
+    assert all(store.text(span) == text for span, (text, _) in zip(spans, eager))
+    print(f"{len(spans)} spans resolve to the same text as the eager chunker.")
+
+    # Results keep span references only; the prompt reads the text back from the map
+    meta = dict(eager[10][1], path=path)
+    context = drop_text([{"text": eager[10][0], "metadata": meta}])
+    assert "text" not in context[0]
+    assert eager[10][0] in build_verification_prompt("A claim.", context, store)
+    # Output gets the text back from the span
+    assert attach_text(context, store) == [{"text": eager[10][0], "metadata": meta}]
+
+    # Chunks without offsets (e.g. from a mock index) keep their text
+    assert drop_text([{"text": "inline", "metadata": {}}])[0]["text"] == "inline"
+
+    neighbors = store.neighbors(spans[10])
+    assert neighbors == [spans[9], spans[11]]
+
+    # A book that grows is remapped and rechunked
+    with tempfile.TemporaryDirectory() as tmp:
+        book = os.path.join(tmp, "book.txt")
+        with open(book, "w") as f:
+            f.write("CHAPTER I.\n\nFirst paragraph of the book.\n")
+        first = store.add_book(book)
+        with open(book, "a") as f:
+            f.write("\nCHAPTER II.\n\nA paragraph added while the pipeline runs.\n")
+        grown = store.add_book(book)
+        assert grown[-1].end > first[-1].end
+        assert store.text(grown[-1]).endswith("added while the pipeline runs.")
+
+        # An edit before a chunk moves its bytes; the digest finds it again
+        second = "CHAPTER II.\n\n" + "A paragraph of the second chapter. " * 10
+        replace_book(book, "CHAPTER I.\n\n" + "First paragraph of the book. " * 12 + "\n\n" + second)
+        moved = dict(store.chunk_metadata(book)[-1], path=book)
+        with store._lock:
+            held = store._map(book)  # as a reader on another thread would
+        replace_book(book, "CHAPTER I.\n\n" + "The first paragraph, rewritten. " * 12 + "\n\n" + second)
+        assert store.locate({"metadata": moved}).start > moved["start"]
+        assert store.text_of({"metadata": moved}) == second.strip()
+        # The replaced map was not closed under its reader
+        assert held[moved["start"]:moved["end"]].decode().strip() == second.strip()
+        store.close()
+
+    print("SUCCESS: Chunk text is materialized lazily from memory-mapped books.")
+
+
+if __name__ == "__main__":
+    test_chunk_store()
@@ -0,0 +1,54 @@
+import asyncio
+
+from src.auditor import needs_more_evidence, verify_with_expansion
+from src.chunk_store import ChunkStore, drop_text
+from src.chunker import BookChunker
+
+
+def test_evidence_expansion():
+    print("Testing lazy neighbor-chunk expansion...")
+
+    path = "data/Books/In search of the castaways.txt"
+    store = ChunkStore()
+    with open(path, "rb") as f:
+        chunks = BookChunker().chunk(f.read())
+    hit = drop_text([{"text": chunks[100][0], "metadata": dict(chunks[100][1], path=path)}])
+
+    assert needs_more_evidence({"insufficient_evidence": True, "confidence": 0.9}, 0.6)
+    assert needs_more_evidence({"confidence": "0.3"}, 0.6)
+    assert not needs_more_evidence({"confidence": 0.8}, 0.6)
+    assert not needs_more_evidence({"consistent": False, "reason": "Error during verification"}, 0.6)
+
+    prompts = []
+
+    def verifier(uncertain_until: int):
+        async def ask(prompt: str) -> dict:
+            prompts.append(prompt)
+            if len(prompts) <= uncertain_until:
+                return {"consistent": False, "confidence": 0.2, "insufficient_evidence": True, "reason": "?"}
+            return {"consistent": True, "confidence": 0.9, "insufficient_evidence": False, "reason": "Found it."}
+        return ask
+
+    # Confident first answer: one call, context untouched
+    verdict = asyncio.run(verify_with_expansion("A claim.", hit, verifier(0), store))
+    assert len(prompts) == 1 and not verdict["expanded"] and len(verdict["context"]) == 1
+
+    # Uncertain first answer: neighbors by file offset are added and the claim is checked again
+    prompts.clear()
+    verdict = asyncio.run(verify_with_expansion("A claim.", hit, verifier(1), store, radius=1))
+    assert len(prompts) == 2 and verdict["expanded"] and verdict["consistent"]
+    assert [c["metadata"]["chunk_index"] for c in verdict["context"]] == [99, 100, 101]
+    assert all("text" not in c for c in verdict["context"])
+    assert chunks[99][0] in prompts[1] and chunks[101][0] in prompts[1] and chunks[99][0] not in prompts[0]
+    print(f"Second prompt grew from {len(prompts[0])} to {len(prompts[1])} chars.")
+
+    # Chunks without offsets cannot be expanded: no second call
+    prompts.clear()
+    verdict = asyncio.run(verify_with_expansion("A claim.", [{"text": "inline"}], verifier(1), store))
+    assert len(prompts) == 1 and not verdict["expanded"]
+
+    print("SUCCESS: Only uncertain verdicts pay for the extra context.")
+
+
+if __name__ == "__main__":
+    test_evidence_expansion()
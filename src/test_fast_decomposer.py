@@ -0,0 +1,48 @@
+import asyncio
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.analyzer import BackstoryAnalyzer
+from src.fast_decomposer import FastDecomposer, entities
+
+
+def test_fast_decomposer():
+    print("Testing the rule-based fast-path decomposer...")
+
+    decomposer = FastDecomposer(threshold=2.0)
+    claims = decomposer.decompose(
+        "In a Marseille waterfront bar he met young Captain Grant in 1851; "
+        "a fierce argument over Magellan Strait tides almost came to blows."
+    )
+    assert claims == [
+        "In a Marseille waterfront bar he met young Captain Grant in 1851.",
+        "A fierce argument over Magellan Strait tides almost came to blows.",
+    ]
+    # Shared-subject verb phrases stay together; a new subject after ', but' is split off
+    assert len(decomposer.decompose("He was re-arrested and shipped to the Château d’If.")) == 1
+    assert len(decomposer.decompose("He sailed to Lisbon in 1820, but the ship sank off the Azores.")) == 2
+
+    # Relative clauses and pronouns across sentences go to the LLM
+    assert not decomposer.accepts("The library, which was built in 1890, burned down in 1995. Mayor Thomas rebuilt it two years later.")
+
+    backstories = pd.read_csv("data/train.csv")["content"].astype(str).tolist()
+    fast = [b for b in backstories if decomposer.accepts(b)]
+    for backstory in fast:
+        kept = set().union(*(entities(c) for c in decomposer.decompose(backstory)))
+        assert entities(backstory) <= kept, backstory
+    print(f"{len(fast)}/{len(backstories)} train.csv backstories take the fast path, entities preserved.")
+
+    # Routing: the fast path never calls the LLM and both paths are counted
+    analyzer = BackstoryAnalyzer(llm_config={"model": "gemini/gemini-flash-latest", "api_key": "offline"})
+    with patch("src.llm_client.acompletion") as completion:
+        claims = asyncio.run(analyzer.extract_atomic_claims(fast[0]))
+        completion.assert_not_called()
+    assert claims and analyzer.path_counts["fast"] == 1 and analyzer.path_counts["llm"] == 0
+    print(analyzer.path_report())
+
+    print("SUCCESS: Simple backstories are decomposed locally.")
+
+
+if __name__ == "__main__":
+    test_fast_decomposer()
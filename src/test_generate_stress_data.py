@@ -0,0 +1,52 @@
+import json
+import os
+import re
+import tempfile
+
+import pandas as pd
+
+from src.generate_stress_data import generate
+
+
+def test_generate_stress_data():
+    print("Testing the labels of the synthetic corpus...")
+    with tempfile.TemporaryDirectory() as out:
+        counts = generate(out, books=3, book_mb=0.05, chapters=10, facts_per_book=200, rows=2000,
+                          contradict_ratio=0.5, seed=0)
+        check_generate_stress_data(out, counts)
+
+
+def check_generate_stress_data(out: str, counts: dict):
+    with open(os.path.join(out, "facts.jsonl"), encoding="utf-8") as f:
+        facts = [json.loads(line) for line in f]
+    assert len(facts) == counts["facts"] == 3 * 200
+
+    planted = {}
+    for fact in facts:
+        planted.setdefault((fact["book"], fact["char"]), set()).add(fact["sentence"])
+        # Every fact sits at its byte span in the book
+        with open(os.path.join(out, "Books", f"{fact['book']}.txt"), "rb") as book:
+            book.seek(fact["byte_start"])
+            assert book.read(fact["byte_end"] - fact["byte_start"]).decode("utf-8") == fact["sentence"]
+        if fact["type"] == "relation":
+            assert not fact["sentence"].endswith(f" of {fact['char']}."), fact["sentence"]
+
+    rows = pd.read_csv(os.path.join(out, "train.csv"))
+    contradict = 0
+    for row in rows.itertuples():
+        sentences = re.split(r"(?<=\.) ", row.content)
+        true = planted[(row.book_name, row.char)]
+        claims = [sentence for sentence in sentences if sentence not in true]
+        if row.label == "consistent":
+            assert not claims, (row.content, claims)
+        else:
+            # The altered claim is never one of the character's true facts
+            assert len(claims) == 1, (row.content, claims)
+            contradict += 1
+    assert 0 < contradict < len(rows)
+    print(f"  {len(facts)} facts, {contradict} of {len(rows)} backstories contradicted")
+    print("SUCCESS: Every contradicting backstory is contradicted by its book.")
+
+
+if __name__ == "__main__":
+    test_generate_stress_data()
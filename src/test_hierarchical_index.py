@@ -0,0 +1,74 @@
+import os
+import tempfile
+
+import numpy as np
+
+from src.hierarchical_index import HierarchicalIndex, index_books
+from src.local_embedder import HashingEmbedder
+
+
+def test_hierarchical_index():
+    print("Testing coarse-to-fine search against exact search...")
+    rng = np.random.default_rng(0)
+    # 30 chapters of 5-20 passages; passages of a chapter share a topic direction
+    ids, vectors, chapters = [], [], []
+    for chapter in range(30):
+        topic = rng.normal(size=64)
+        for passage in range(rng.integers(5, 21)):
+            ids.append(f"c{chapter}-p{passage}")
+            vectors.append(topic + 0.5 * rng.normal(size=64))
+            chapters.append(chapter)
+    vectors = np.array(vectors, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    index = HierarchicalIndex(64, top_sections=4, section_passages=8)
+    index.add(ids, vectors, chapters)
+    assert len(index) == len(ids)
+    # Long chapters are split into sections of at most 8 passages
+    sizes = np.bincount(chapters)
+    assert len(index.section_keys) == sum(-(-int(n) // 8) for n in sizes)
+
+    queries = vectors[rng.integers(0, len(ids), size=50)] + 0.05 * rng.normal(size=(50, 64)).astype(np.float32)
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+    found, scores = index.search_batch(queries, k=5)
+    hits = sum(len(set(f) & {ids[i] for i in row}) for f, row in zip(found, exact))
+    print(f"  recall@5 with 4 of {len(index.section_keys)} sections probed: {hits / 250:.3f}")
+    assert hits / 250 > 0.9
+    assert all(np.all(np.diff(row) <= 1e-6) for row in scores)
+
+    # Probing every section is an exact search
+    everything, _ = index.search_batch(queries, k=5, top_sections=len(index.section_keys))
+    assert everything == [[ids[i] for i in row] for row in exact]
+
+    # Chapters added later are searchable
+    late = rng.normal(size=64).astype(np.float32)
+    index.add_chapter("late", ["late-0"], late[None, :])
+    assert index.search(late, k=1)[0][0] == "late-0"
+    assert HierarchicalIndex(64).search(late, k=3) == []
+
+
+def test_index_books():
+    print("Testing chapter-aware indexing of a book...")
+    chapters = [
+        "Ayrton was the quartermaster of the Britannia and sailed from Glasgow.",
+        "Paganel studied the map of Patagonia and lectured on geography.",
+        "Mary Grant travelled to Scotland with her brother Robert.",
+    ]
+    text = "".join(f"CHAPTER {i + 1}\n\n{body}\n\n" + "The crew kept watch. " * 30 + "\n\n"
+                   for i, body in enumerate(chapters))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.txt")
+        with open(path, "w") as f:
+            f.write(text)
+        embedder = HashingEmbedder(256)
+        index = index_books([path], embedder.embed, 256, top_sections=1)
+        [(span, score)] = index.search(embedder.embed(["Paganel lectured on geography."])[0], k=1)
+        assert span[0] == path
+        assert "Paganel" in text.encode()[span[1]:span[2]].decode()
+        assert {key[0][1] for key in index.section_keys} == {1, 2, 3}
+    print("SUCCESS: The hierarchical index finds passages through their chapters.")
+
+
+if __name__ == "__main__":
+    test_hierarchical_index()
+    test_index_books()
@@ -0,0 +1,104 @@
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.analyzer import BackstoryAnalyzer
+from src.auditor import EARLY_STOP_REASON, ask_verifier
+from src.benchmark_server import simulated_completion
+from src.incremental_json import IncrementalJSONParser, loads_lenient, repair_json
+from src.llm_client import get_llm_client
+
+
+def test_incremental_parser():
+    print("Testing incremental parsing of a streamed object...")
+    payload = ('Sure: {"consistent": false, "confidence": 0.85, "reason": "It says \\"no\\", {x}.", '
+               '"facts": [{"fact": "A, b."}, "c"]} done')
+    parser, seen = IncrementalJSONParser(), []
+    for i in range(0, len(payload), 3):
+        seen += [(i, event) for event in parser.feed(payload[i:i + 3])]
+    events = [event for _, event in seen]
+    assert events == [
+        ("field", "consistent", False),
+        ("field", "confidence", 0.85),
+        ("field", "reason", 'It says "no", {x}.'),
+        ("item", "facts", {"fact": "A, b."}),
+        ("item", "facts", "c"),
+        ("field", "facts", [{"fact": "A, b."}, "c"]),
+    ], events
+    # The literal is reported as soon as its last letter arrives, before the comma
+    assert seen[0][0] < payload.index("false, ") + len("false")
+    assert parser.done and parser.result()["consistent"] is False and parser.repaired is False
+
+
+def test_repair():
+    print("Testing local repair of malformed JSON...")
+    assert repair_json('```json\n{"consistent": true, "reason": "ok"}\n```') == {"consistent": True, "reason": "ok"}
+    assert repair_json("{'consistent': False, 'reason': 'He\\'s \"sure\"'}") == {
+        "consistent": False, "reason": 'He\'s "sure"'}
+    assert repair_json('{"facts": [{"fact": "A."}, {"fact": "B."},],}') == {"facts": [{"fact": "A."}, {"fact": "B."}]}
+    assert repair_json('{consistent: true "confidence": 0.7}') == {"consistent": True, "confidence": 0.7}
+    # Cut off: the open string is kept, partial values and dangling keys are dropped
+    assert repair_json('{"consistent": false, "reason": "The passage') == {"consistent": False, "reason": "The passage"}
+    assert repair_json('{"consistent": true, "confidence": 0.') == {"consistent": True}
+    assert repair_json('{"facts": [{"fact": "A."}, {"fa') == {"facts": [{"fact": "A."}, {}]}
+    assert loads_lenient('{"a": 1}') == ({"a": 1}, False)
+    try:
+        repair_json("no object here")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_streamed_verification():
+    print("Testing streamed verification with early stop and repair...")
+    reason = "The passages describe the voyage in detail and agree with every part of the claim. " * 3
+    async def scenario():
+        full = get_llm_client({"model": "offline/full", "hedge": False})
+        verdict = await ask_verifier(full, "Claim: x", "x", "flow", 0, stream=True)
+        stopped = get_llm_client({"model": "offline/early", "hedge": False})
+        early = await ask_verifier(stopped, "Claim: x", "x", "flow", 0, stream=True, early_stop=True)
+        return full, verdict, stopped, early
+
+    with patch("src.llm_client.acompletion", simulated_completion(50, 0, token_ms=2, reason=reason)):
+        full, verdict, stopped, early = asyncio.run(scenario())
+    assert verdict["consistent"] is True and verdict["reason"] == reason
+    assert early["consistent"] is True and early["confidence"] == 0.9 and early["reason"] == EARLY_STOP_REASON
+    assert stopped.stats["stopped_early"] == 1
+    assert stopped.verdict_tokens[0] < full.verdict_tokens[0] / 4, (stopped.verdict_tokens, full.verdict_tokens)
+    # Without early stop the verdict is returned only once the reason is in
+    assert stopped.verdict_latencies[0] < full.verdict_latencies[0] - 0.05, (stopped.verdict_latencies, full.verdict_latencies)
+    print(f"  full: {full.verdict_report()}")
+    print(f"  early stop: {stopped.verdict_report()}")
+
+    async def single_quoted(messages=None, **kwargs):
+        content = "{'consistent': False, 'confidence': 0.8, 'reason': 'Contradicted by chapter 3',}"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    client = get_llm_client({"model": "offline/repair", "hedge": False})
+    with patch("src.llm_client.acompletion", single_quoted):
+        repaired = asyncio.run(ask_verifier(client, "Claim: x", "x", "flow", 0))
+    assert repaired == {"consistent": False, "confidence": 0.8, "reason": "Contradicted by chapter 3"}
+    assert client.stats["json_repaired"] == 1
+
+
+def test_repaired_facts():
+    print("Testing decomposition of malformed facts payloads...")
+
+    async def malformed(messages=None, **kwargs):
+        # Single quotes, a trailing comma and an entry cut off mid-way
+        content = "{'facts': [{'fact': 'He sailed from Glasgow in 1864.'}, {'fact': 'He met the captain.'}, {'fa"
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=None)
+
+    analyzer = BackstoryAnalyzer({"model": "offline/facts", "hedge": False, "pacing_s": 0, "fast_path_threshold": 0})
+    with patch("src.llm_client.acompletion", malformed):
+        claims = asyncio.run(analyzer.extract_atomic_claims("He sailed from Glasgow in 1864 and met the captain."))
+    assert claims == ["He sailed from Glasgow in 1864.", "He met the captain."], claims
+    # Extraction and validation were both repaired instead of falling back to the backstory
+    assert analyzer.client.stats["json_repaired"] == 2
+    print("SUCCESS: Streamed JSON was parsed incrementally, stopped early and repaired locally.")
+
+if __name__ == "__main__":
+    test_incremental_parser()
+    test_repair()
+    test_streamed_verification()
+    test_repaired_facts()
@@ -0,0 +1,83 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import litellm
+
+from src.llm_client import LLMClient, LLMError, LLMErrorKind, classify_error
+
+
+def test_error_classification():
+    print("Testing structured error classification...")
+    rate_limited = litellm.RateLimitError("quota", llm_provider="gemini", model="gemini/gemini-flash-latest")
+    bad_request = litellm.BadRequestError("bad", llm_provider="gemini", model="gemini/gemini-flash-latest")
+    assert classify_error(rate_limited) == LLMErrorKind.RATE_LIMIT
+    assert classify_error(bad_request) == LLMErrorKind.BAD_REQUEST
+    assert classify_error(asyncio.TimeoutError()) == LLMErrorKind.TIMEOUT
+    print("SUCCESS: Errors classified by type, not by message text.")
+
+
+def test_hedged_request():
+    print("Testing deadline and hedged requests with a mocked provider...")
+    calls = []
+
+    async def fake_acompletion(**kwargs):
+        calls.append(kwargs)
+        # Every 5th call is stuck: it only returns well past the p95 latency.
+        await asyncio.sleep(2.0 if len(calls) % 5 == 0 else 0.01)
+        response = MagicMock()
+        response.choices[0].message.content = '{"consistent": true, "reason": "ok"}'
+        return response
+
+    async def run():
+        client = LLMClient(model="gemini/gemini-flash-latest", api_key="dummy", timeout=1.0, hedge_min_samples=3)
+        with patch("src.llm_client.acompletion", side_effect=fake_acompletion):
+            for _ in range(4):
+                await client.complete("warm up")
+            start = asyncio.get_running_loop().time()
+            await client.complete("the stuck call")
+            elapsed = asyncio.get_running_loop().time() - start
+        await client.aclose()
+        return client, elapsed
+
+    client, elapsed = asyncio.run(run())
+    print(f"Stuck call answered in {elapsed:.2f}s, stats: {dict(client.stats)}")
+    assert client.stats["hedged"] == 1 and client.stats["hedge_wins"] == 1
+    assert elapsed < 1.0
+    assert all(call["timeout"] == 1.0 for call in calls)
+    # Every call (hedges included) goes through the client's one pooled session
+    assert len({id(call["client"].client) for call in calls}) == 1
+    assert litellm.aclient_session is None
+
+    async def openai_call():
+        seen = []
+
+        async def record(**kwargs):
+            seen.append(kwargs)
+            return MagicMock()
+
+        with patch("src.llm_client.acompletion", side_effect=record):
+            await LLMClient(model="openai/gpt-4o-mini", api_key="dummy", hedge=False).complete("hi")
+        return seen[0]
+
+    # OpenAI's handler expects its own SDK client, so none is passed
+    assert "client" not in asyncio.run(openai_call())
+
+    async def never_answers(**kwargs):
+        await asyncio.sleep(5)
+
+    async def timed_out():
+        client = LLMClient(model="gemini/gemini-flash-latest", api_key="dummy", timeout=0.1, hedge=False)
+        with patch("src.llm_client.acompletion", side_effect=never_answers):
+            try:
+                await client.complete("never answers")
+            except LLMError as e:
+                return e
+
+    error = asyncio.run(timed_out())
+    assert error.kind == LLMErrorKind.TIMEOUT and error.retryable
+    print("SUCCESS: Slow calls are hedged and stuck calls hit their deadline.")
+
+
+if __name__ == "__main__":
+    test_error_classification()
+    test_hedged_request()
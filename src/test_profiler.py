@@ -0,0 +1,57 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+from src.profiler import SamplingProfiler
+
+
+def hot_loop(seconds: float) -> int:
+    total, end = 0, time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+async def busy_coroutine(seconds: float) -> int:
+    await asyncio.sleep(0.01)
+    return hot_loop(seconds)
+
+
+def test_sampling_profiler():
+    print("Testing the sampling profiler...")
+    rules = (("verify", "test_profiler.py", "busy_coroutine"), ("parse", "test_profiler.py", "hot_loop"))
+    with tempfile.TemporaryDirectory() as tmp:
+        profiler = SamplingProfiler(interval_s=0.002, out_dir=tmp, name="run", stage_rules=rules)
+        with profiler:
+            sleeper = threading.Thread(target=time.sleep, args=(0.6,))
+            sleeper.start()
+            worker = threading.Thread(target=hot_loop, args=(0.3,))
+            worker.start()
+            worker.join()
+            asyncio.run(busy_coroutine(0.3))
+            sleeper.join()
+
+        stages = profiler.stage_seconds()
+        print(f"  {profiler.samples} samples, stages: { {k: round(v, 2) for k, v in stages.items()} }")
+        # The sleeping thread costs nothing; the coroutine is tagged by its outermost rule
+        assert stages["parse"] > 0.15 and stages["verify"] > 0.15, stages
+        assert sum(stages.values()) < 1.0
+        own, total = profiler.hot_functions()
+        assert own[0][0].startswith("hot_loop (") and "test_profiler.py" in own[0][0], own
+
+        files = set(os.listdir(tmp))
+        assert {"run.collapsed", "run.parse.collapsed", "run.verify.collapsed", "run_summary.txt"} <= files, files
+        with open(os.path.join(tmp, "run.verify.collapsed")) as f:
+            line = f.readline()
+        frames, weight = line.rsplit(" ", 1)
+        assert frames.startswith("verify;") and "busy_coroutine" in frames and frames.endswith(own[0][0])
+        assert int(weight) > 0
+        with open(os.path.join(tmp, "run_summary.txt")) as f:
+            assert "Top" in f.read()
+    print("SUCCESS: CPU samples were attributed to stages and hot functions.")
+
+
+if __name__ == "__main__":
+    test_sampling_profiler()
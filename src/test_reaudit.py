@@ -0,0 +1,218 @@
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pathway as pw
+from pathway.xpacks import llm
+
+from src.auditor import NarrativeAuditor
+from src.budget import BudgetController
+from src.chunk_store import ChunkSpan, ChunkStore, replace_book
+from src.chunker import BookChunker
+from src.local_embedder import HashingEmbedder
+from src.pathway_internals import clear_graph
+from src.reaudit import DependencyIndex, ReauditTracker
+from src.reranker import LocalReranker
+
+FILLER = "The wind rose over the grey water and the crew kept to their stations through the long night. "
+
+
+def chapter(number: int, text: str) -> str:
+    # Each chapter is several chunks long, so edits in one chapter stay away from the others
+    return f"CHAPTER {number}\n\n{text}\n\n" + "\n\n".join(FILLER * 6 for _ in range(3)) + "\n\n"
+
+
+AYRTON = "Ayrton was the quartermaster of the Britannia and sailed from Glasgow in 1862."
+MARY = "Mary Grant was sixteen years old when she travelled to Scotland."
+
+
+def book(mary_text: str = MARY, ayrton_text: str = AYRTON) -> str:
+    return (
+        chapter(1, ayrton_text)
+        + chapter(2, "Paganel studied the map of Patagonia and lectured on geography.")
+        + chapter(3, mary_text)
+    )
+
+
+class StaticEmbedder(pw.UDF):
+    """Offline embedder for the vector store."""
+
+    def __init__(self):
+        super().__init__()
+        self.local = HashingEmbedder(256)
+
+    def __wrapped__(self, text: str, **kwargs) -> np.ndarray:
+        return self.local.embed([text])[0]
+
+    def get_embedding_dimension(self, **kwargs) -> int:
+        return self.local.dimensions
+
+
+def test_dependency_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.txt")
+        with open(path, "w") as f:
+            f.write(book())
+        check_dependency_index(path)
+
+
+def check_dependency_index(path: str):
+    print("Testing the claim -> chunk dependency index...")
+    store = ChunkStore()
+    spans = store.add_book(path)
+    deps = DependencyIndex(store, radius_bytes=100)
+    ayrton = {"metadata": {"path": path, "start": spans[0].start, "end": spans[0].end}}
+    deps.record("c1", "Ayrton sailed from Glasgow.", [ayrton])
+
+    assert deps.near(path, [(spans[0].start + 5, spans[0].start + 10)]) == {"c1"}
+    assert deps.near(path, [(spans[-1].start, spans[-1].end)]) == set()
+    assert deps.near("elsewhere.txt", [(0, 10)]) == set()
+    assert deps.attracted("Ayrton sailed from Glasgow on the Britannia.") == {"c1"}
+    assert deps.attracted("Paganel lectured on geography.") == set()
+
+    # Evidence follows its chunk when an earlier edit shifts it
+    shifted = ChunkSpan(path, spans[0].start + 40, spans[0].end + 40)
+    deps.remap(path, {spans[0]: shifted})
+    assert deps.near(path, [(shifted.end + 50, shifted.end + 60)]) == {"c1"}
+    deps.remap(path, {shifted: spans[0]})
+
+    # A retraction of an older revision does not drop the newer evidence
+    deps.record("c1", "Ayrton sailed from Glasgow.", [ayrton], revision=1)
+    deps.forget("c1", revision=0)
+    assert len(deps) == 1
+    deps.forget("c1", revision=1)
+    assert len(deps) == 0 and deps.near(path, [(spans[0].start, spans[0].end)]) == set()
+
+
+def audit_edits(path: str, versions: list):
+    """
+    Audits two claims while the book goes through `versions`.
+
+    Returns the result events, the tracker, the evidence of each verdict and the chunk store.
+    """
+    clear_graph()
+    # revision -> set once a verdict of that revision is out (both claims for revision 0)
+    settled = [threading.Event() for _ in versions]
+
+    class BookSchema(pw.Schema):
+        path: str = pw.column_definition(primary_key=True)
+        data: bytes
+        _metadata: pw.Json
+
+    class BookSubject(pw.io.python.ConnectorSubject):
+        def __init__(self):
+            super().__init__(session_type="upsert")
+
+        def run(self):
+            for version, text in enumerate(versions):
+                replace_book(path, text)  # never truncate a mapped book
+                self.next(path=path, data=text.encode(), _metadata={"path": path, "modified_at": version})
+                settled[version].wait(60)
+            # Give a stray (wrong) revision of the other claim time to show up
+            time.sleep(2)
+            tracker.close()
+
+    class BackstorySchema(pw.Schema):
+        backstory: str
+
+    class BackstorySubject(pw.io.python.ConnectorSubject):
+        def run(self):
+            time.sleep(3)  # retrieval is as-of-now: let the index build first
+            self.next(backstory="Ayrton sailed from Glasgow in 1862. Mary Grant travelled to Scotland.")
+
+    books = pw.io.python.read(BookSubject(), schema=BookSchema, autocommit_duration_ms=50)
+    index = llm.vector_store.VectorStoreServer(books, embedder=StaticEmbedder(), parser=BookChunker())
+    backstories = pw.io.python.read(BackstorySubject(), schema=BackstorySchema, autocommit_duration_ms=50)
+
+    @pw.udf
+    def split(text: str) -> list[str]:
+        return [s.strip() for s in text.split(". ") if s.strip()]
+
+    claims = backstories.select(backstory_id=pw.this.id, source_text=pw.this.backstory,
+                                claims=split(pw.this.backstory))
+    claims = claims.flatten(pw.this.claims).select(pw.this.backstory_id, pw.this.source_text, claim=pw.this.claims)
+
+    auditor = NarrativeAuditor(index_table=index, llm_config={"model": "mock/reaudit", "api_key": "dummy"},
+                               reranker=LocalReranker(max_k=1), prefetch_k=12)
+    # No LLM here: an exhausted budget answers at once, with the selected context
+    auditor.client.budget = BudgetController(max_calls=1)
+    auditor.client.budget.record()
+    tracker = ReauditTracker(chunk_store=auditor.chunk_store, delay_s=1.0)
+    results = auditor.audit_backstory(claims, pool=auditor.prefetch(backstories), revisions=tracker.revisions())
+    tracker.watch(index.chunked_docs, results)
+
+    events = []  # (claim, revision, is_addition)
+    current = {}
+    contexts = {}  # (first word of the claim, revision) -> evidence
+
+    def on_change(key, row, time, is_addition):
+        events.append((row["claim"], row["revision"], is_addition))
+        if is_addition:
+            contexts[row["claim"].split()[0], row["revision"]] = row["context"].value
+            current[row["claim"]] = row["revision"]
+        if is_addition and (row["revision"] > 0 or len(current) == 2):
+            settled[row["revision"]].set()
+
+    pw.io.subscribe(results, on_change)
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+
+    for event in events:
+        print(f"  {'+' if event[2] else '-'} rev {event[1]}: {event[0]}")
+    return events, tracker, contexts, auditor.chunk_store
+
+
+def test_reaudit():
+    print("Testing change-driven re-audit on a streaming book edit...")
+    versions = [
+        book(MARY),
+        book("Mary Grant was sixteen years old when she travelled to Scotland with her brother Robert."),
+        book("Mary Grant was sixteen years old when she and Robert travelled to Scotland in the spring."),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        events, tracker, contexts, _ = audit_edits(os.path.join(tmp, "book.txt"), versions)
+
+    mary = [e for e in events if e[0].startswith("Mary")]
+    ayrton = [e for e in events if e[0].startswith("Ayrton")]
+    # The edited claim is retracted and re-verified; the other verdict is never touched
+    claim = mary[0][0]
+    assert mary == [(claim, 0, True), (claim, 0, False), (claim, 1, True), (claim, 1, False), (claim, 2, True)], mary
+    assert ayrton == [(ayrton[0][0], 0, True)], ayrton
+    assert tracker.bumps == 2
+    # Each new verdict was checked against the edited chunk, not the stale one
+    ends = [contexts["Mary", revision][0]["metadata"]["end"] for revision in range(3)]
+    assert ends[0] < ends[1] < ends[2], ends
+    print("SUCCESS: Only the claim whose evidence changed was re-audited.")
+
+
+def test_reaudit_shifted_chunks():
+    print("Testing re-audit after an edit that shifts every later chunk...")
+    versions = [
+        book(),
+        book(ayrton_text=AYRTON + " He kept the ship's log on the long voyage south with Captain Grant."),
+        book(ayrton_text="In the spring of 1862, Ayrton, quartermaster of the Britannia, sailed from Glasgow "
+                         "with Captain Grant and kept the ship's log on the long voyage south."),
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        events, tracker, contexts, store = audit_edits(os.path.join(tmp, "book.txt"), versions)
+        # The untouched verdict's evidence still resolves, although its bytes moved
+        evidence = contexts["Mary", 0][0]
+        moved = store.locate(evidence)
+        assert moved is not None and moved.start > evidence["metadata"]["start"], (moved, evidence["metadata"])
+        assert MARY in store.text_of(evidence)
+
+    mary = [e for e in events if e[0].startswith("Mary")]
+    ayrton = [e for e in events if e[0].startswith("Ayrton")]
+    # Only the claim in chapter 1 is re-audited; chunks after the edit count as moved, not changed
+    claim = ayrton[0][0]
+    assert ayrton == [(claim, 0, True), (claim, 0, False), (claim, 1, True), (claim, 1, False), (claim, 2, True)], ayrton
+    assert mary == [(mary[0][0], 0, True)], mary
+    assert tracker.bumps == 2
+    print("SUCCESS: Chunks shifted by an earlier edit were remapped instead of re-audited.")
+
+
+if __name__ == "__main__":
+    test_dependency_index()
+    test_reaudit()
+    test_reaudit_shifted_chunks()
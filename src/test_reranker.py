@@ -0,0 +1,31 @@
+from src.chunker import BookChunker
+from src.reranker import LocalReranker
+
+
+def test_reranker():
+    print("Testing chapter-aware chunking and local reranking...")
+
+    with open("data/Books/In search of the castaways.txt", "rb") as f:
+        chunks = BookChunker().chunk(f.read())
+    print(f"Chunked book into {len(chunks)} chunks across {chunks[-1][1]['chapter']} chapters.")
+    assert all(meta["end"] > meta["start"] for _, meta in chunks)
+
+    # Pretend the vector index returned 12 candidates with the evidence ranked 7th, outside the old k=3.
+    claim = "Lord Glenarvan found a message inside a shark."
+    evidence = next(i for i, (text, _) in enumerate(chunks) if "shark" in text and "Glenarvan" in text)
+    candidates = [
+        {"text": text, "metadata": dict(meta, path="castaways.txt"), "dist": -0.5 + 0.01 * rank}
+        for rank, (text, meta) in enumerate(chunks[200:206] + [chunks[evidence]] + chunks[206:211])
+    ]
+
+    selected = LocalReranker(max_k=5).select(claim, candidates)
+    for chunk in selected:
+        print(f"{chunk['rerank_score']:.3f}  {chunk['metadata']['chapter_title']}  {chunk['text'][:60]!r}")
+
+    assert evidence in [chunk["metadata"]["chunk_index"] for chunk in selected]
+    assert len(selected) < len(candidates)
+    print("SUCCESS: Reranker promoted the evidence chunk and trimmed the context.")
+
+
+if __name__ == "__main__":
+    test_reranker()
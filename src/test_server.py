@@ -0,0 +1,126 @@
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import numpy as np
+import pathway as pw
+from pathway.xpacks import llm
+
+from src.analyzer import BackstoryAnalyzer
+from src.auditor import NarrativeAuditor
+from src.benchmark_server import simulated_completion
+from src.chunker import BookChunker
+from src.local_embedder import HashingEmbedder
+from src.pathway_internals import clear_graph
+from src.server import AuditRequestSchema, answer_requests, assemble_response
+
+BOOK = (
+    "CHAPTER 1\n\nAyrton was the quartermaster of the Britannia and sailed from Glasgow in 1862.\n\n"
+    "CHAPTER 2\n\nThalcave grew up on the pampas, where his father taught him to track animals.\n\n"
+    "CHAPTER 3\n\nThalcave guided Glenarvan across Patagonia to the Atlantic coast.\n"
+)
+BACKSTORY = "Thalcave grew up on the pampas. His father taught him to track animals. He guided Glenarvan across Patagonia."
+
+
+class StaticEmbedder(pw.UDF):
+    """Offline embedder for the vector store."""
+
+    def __init__(self):
+        super().__init__()
+        self.local = HashingEmbedder(256)
+
+    def __wrapped__(self, text: str, **kwargs) -> np.ndarray:
+        return self.local.embed([text])[0]
+
+    def get_embedding_dimension(self, **kwargs) -> int:
+        return self.local.dimensions
+
+
+def test_assemble_response():
+    print("Testing response assembly...")
+    verdicts = ((1, pw.Json({"claim": "b", "consistent": False})), (0, pw.Json({"claim": "a", "consistent": True})))
+    response = assemble_response(2, verdicts)
+    assert response["claims"] == 2 and response["consistent"] is False
+    assert [v["claim"] for v in response["verdicts"]] == ["a", "b"]
+    assert assemble_response(0, ()) == {"claims": 0, "consistent": True, "verdicts": []}
+
+
+def test_answer_requests():
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "book.txt"), "w") as f:
+            f.write(BOOK)
+        with patch("src.llm_client.acompletion", simulated_completion(llm_ms=50, per_claim_ms=0)):
+            check_answer_requests(tmp)
+
+
+def check_answer_requests(books_dir: str):
+    print("Testing concurrent requests batched through one window...")
+    clear_graph()
+    answered = threading.Event()
+
+    class RequestSchema(AuditRequestSchema):
+        request: int = pw.column_definition(primary_key=True)
+
+    class RequestSubject(pw.io.python.ConnectorSubject):
+        def __init__(self):
+            super().__init__(session_type="upsert")
+
+        def run(self):
+            time.sleep(3)  # retrieval is as-of-now: let the index build first
+            self.next(request=0, claim="Ayrton sailed from Glasgow.")
+            self.next(request=1, backstory=BACKSTORY, char="Thalcave")
+            self.next(request=2, backstory="")
+            # Answered requests are deleted, as the REST connector does
+            answered.wait(60)
+            for request in range(3):
+                self.delete(request=request)
+            time.sleep(1)
+
+    books = pw.io.fs.read(books_dir, format="binary", mode="static", with_metadata=True)
+    index = llm.vector_store.VectorStoreServer(books, embedder=StaticEmbedder(), parser=BookChunker())
+    llm_config = {"model": "mock/server", "api_key": "dummy", "pacing_s": 0, "hedge": False}
+    analyzer = BackstoryAnalyzer(llm_config=llm_config)
+    auditor = NarrativeAuditor(index_table=index, llm_config=llm_config, batch_size=8, batch_wait_s=0.5,
+                               commit_ms=100)
+    queries = pw.io.python.read(RequestSubject(), schema=RequestSchema, autocommit_duration_ms=100)
+    responses = answer_requests(queries, analyzer, auditor, window_ms=100)
+
+    answers, live = [], set()
+
+    def on_change(key, row, time, is_addition):
+        if is_addition:
+            answers.append(row["result"].value)
+            live.add(key)
+        else:
+            live.discard(key)
+        if len(answers) == 3:
+            answered.set()
+
+    pw.io.subscribe(responses, on_change)
+    pw.run(monitoring_level=pw.MonitoringLevel.NONE)
+
+    by_claims = sorted(answers, key=lambda a: a["claims"])
+    assert [a["claims"] for a in by_claims] == [0, 1, 3], answers
+    empty, single, backstory = by_claims
+    assert empty["verdicts"] == []
+    assert single["verdicts"][0]["claim"] == "Ayrton sailed from Glasgow."
+    # Verdicts come back in the order of the decomposed claims, each with span evidence
+    assert [v["claim"] for v in backstory["verdicts"]] == analyzer.fast_decomposer.decompose(BACKSTORY)
+    for verdict in single["verdicts"] + backstory["verdicts"]:
+        assert verdict["consistent"] and verdict["evidence"], verdict
+        assert all(span["path"].endswith("book.txt") and span["end"] > span["start"] for span in verdict["evidence"])
+    # Deleting the requests retracted their responses (and all state in between)
+    assert not live, live
+
+    # The four claims of the two requests shared verification calls
+    batcher = next(iter(auditor.batchers.values()))
+    print(f"  {batcher.items} claims in {batcher.batches} verification calls")
+    assert batcher.items == 4 and batcher.batches < 4
+    print("SUCCESS: Requests were answered in order with batched verification.")
+
+
+if __name__ == "__main__":
+    test_assemble_response()
+    test_answer_requests()
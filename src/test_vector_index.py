@@ -0,0 +1,35 @@
+import numpy as np
+
+from src.vector_index import QuantizedVectorIndex
+
+
+def test_vector_index():
+    print("Testing QuantizedVectorIndex storage modes...")
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(2000, 64)).astype(np.float32)
+    ids = [f"chunk-{i}" for i in range(len(vectors))]
+    query = vectors[42] + 0.01 * rng.normal(size=64).astype(np.float32)
+
+    baseline = None
+    for storage in QuantizedVectorIndex.STORAGE_MODES:
+        index = QuantizedVectorIndex(64, storage=storage, pq_subspaces=16)
+        index.add(ids, vectors)
+        results = index.search(query, k=5)
+        print(f"{storage:<8} memory={index.memory_bytes():>8} bytes  top={results[0]}")
+
+        # Exact rescoring means the nearest neighbour and its score match the full-precision index.
+        assert results[0][0] == "chunk-42"
+        if baseline is None:
+            baseline = index.memory_bytes()
+        else:
+            assert index.memory_bytes() < baseline
+            assert abs(results[0][1] - first_score) < 1e-5
+        first_score = results[0][1]
+        index.close()
+
+    print("SUCCESS: Quantized storage returns exactly rescored neighbours.")
+
+
+if __name__ == "__main__":
+    test_vector_index()
@@ -0,0 +1,118 @@
+import asyncio
+from unittest.mock import patch
+
+import pandas as pd
+import pathway as pw
+
+from src.auditor import NarrativeAuditor
+from src.benchmark_server import simulated_completion
+from src.work_queue import WorkQueue
+
+
+class MockIndex:
+    def query(self, query_table, k=3):
+        return query_table.select(query=pw.this.query, result=[{"text": "Context info 1"}, {"text": "Context info 2"}])
+
+
+def test_order():
+    print("Testing the bounded queue: FIFO order, results, errors...")
+    handled = []
+
+    async def handler(item):
+        handled.append(item)
+        await asyncio.sleep(0.001)
+        if item == 13:
+            raise ValueError("unlucky")
+        return item * 2
+
+    async def scenario():
+        queue = WorkQueue(handler, workers=2)
+
+        async def one(i):
+            try:
+                return await queue.submit(i)
+            except ValueError:
+                return None
+
+        tasks = [asyncio.ensure_future(one(i)) for i in range(40)]
+        await asyncio.sleep(0)
+        # 2 taken by the workers at most; the rest wait in order
+        assert queue.depth >= 38 and queue.in_progress <= 2, queue.metrics()
+        results = await asyncio.gather(*tasks)
+        queue.close()
+        return queue, results
+
+    queue, results = asyncio.run(scenario())
+    assert results == [None if i == 13 else i * 2 for i in range(40)]
+    assert handled == list(range(40)), handled
+    assert queue.depth == 0 and queue.completed == 40 and queue.max_depth >= 38
+    print(f"  {queue.report()}")
+
+
+def test_backpressure():
+    print("Testing backpressure on producers...")
+
+    async def handler(item):
+        await asyncio.sleep(0.01)
+        return item
+
+    async def scenario():
+        queue = WorkQueue(handler, workers=1, high_watermark=10, low_watermark=3)
+        peak = 0
+
+        # Every producer starts at once; each emits 3 items once admitted
+        async def producer(i):
+            nonlocal peak
+            await queue.admit(3)
+            peak = max(peak, queue.outstanding)
+            return await asyncio.gather(*(queue.submit((i, j)) for j in range(3)))
+
+        results = await asyncio.gather(*(producer(i) for i in range(20)))
+        queue.close()
+        return queue, peak, results
+
+    queue, peak, results = asyncio.run(scenario())
+    print(f"  peak outstanding {peak}, {queue.report()}")
+    # Admitted in arrival order; one producer's batch may overshoot the watermark
+    assert results == [[(i, j) for j in range(3)] for i in range(20)]
+    assert peak <= 10 + 2 and queue.max_outstanding == peak and queue.outstanding == 0
+    assert queue.backpressure_waits > 0 and queue.metrics()["p95_wait_s"] >= 0
+
+
+def test_pipeline_backpressure():
+    print("Testing backpressure in the pipeline on a large drop of backstories...")
+    backstories = [f"Sailor {i} left Glasgow. Sailor {i} met Ayrton. Sailor {i} reached Patagonia." for i in range(60)]
+
+    auditor = NarrativeAuditor(index_table=MockIndex(), llm_config={"model": "offline/queue", "pacing_s": 0, "hedge": False},
+                               queue_workers=2, queue_high_watermark=6, commit_ms=50)
+    queue = auditor.queue
+
+    # As in main.py: every backstory is decomposed at once (fully async); its claims are
+    # emitted only once the queue has room for them
+    @pw.udf(executor=pw.udfs.fully_async_executor(autocommit_duration_ms=50))
+    async def decompose(text: str) -> list[str]:
+        claims = [s.strip() for s in text.split(". ") if s.strip()]
+        await queue.admit(len(claims))
+        return claims
+
+    rows = pw.debug.table_from_pandas(pd.DataFrame({"backstory": backstories}))
+    claims = rows.select(source_text=pw.this.backstory, claims=decompose(pw.this.backstory)).await_futures()
+    claims = claims.flatten(pw.this.claims).select(pw.this.source_text, claim=pw.this.claims)
+
+    with patch("src.llm_client.acompletion", simulated_completion(llm_ms=5, per_claim_ms=0)):
+        verdicts = pw.debug.table_to_pandas(auditor.audit_backstory(claims))
+    queue.close()
+
+    print(f"  {len(verdicts)} verdicts; {queue.report()}")
+    assert len(verdicts) == 3 * len(backstories)
+    assert verdicts["is_consistent"].all()
+    # Never more claims in flight than the watermark plus one backstory's claims
+    assert queue.max_outstanding <= 6 + 2 and queue.max_depth <= 6 + 2, queue.metrics()
+    assert queue.backpressure_waits >= len(backstories) - 6
+    print("SUCCESS: The queue stays bounded and holds producers back.")
+
+
+if __name__ == "__main__":
+    test_order()
+    test_backpressure()
+    test_pipeline_backpressure()
@@ -0,0 +1,271 @@
+"""
+Module: vector_index.py
+Description: Compressed in-memory vector index with exact rescoring of the top candidates.
+"""
+
+import os
+import tempfile
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class QuantizedVectorIndex:
+    """
+    Cosine-similarity index that keeps only compressed vectors resident in memory.
+
+    A query first runs a coarse search over the compressed codes, then the best
+    ``k * rescore_factor`` candidates are rescored exactly against the full-precision
+    vectors, which live in a memory-mapped file on disk rather than in RAM.
+
+    Supported storage modes:
+        - "float32": full precision in memory, no rescoring (the current baseline).
+        - "float16": half precision codes (2x smaller).
+        - "int8":    per-vector scaled int8 codes (4x smaller).
+        - "pq":      product quantization, one byte per subspace (e.g. 768 dims / 96 subspaces = 32x smaller).
+    """
+
+    STORAGE_MODES = ("float32", "float16", "int8", "pq")
+    DECODE_BLOCK = 16384
+
+    def __init__(
+        self,
+        dimensions: int,
+        storage: str = "int8",
+        rescore_factor: int = 4,
+        pq_subspaces: int = 96,
+        pq_iterations: int = 10,
+        full_precision_path: Optional[str] = None,
+        seed: int = 0,
+    ):
+        """
+        Initialize the index.
+
+        Args:
+            dimensions (int): Embedding dimensionality (768 for text-embedding-004).
+            storage (str): One of STORAGE_MODES.
+            rescore_factor (int): Candidates rescored exactly per requested result.
+            pq_subspaces (int): Number of PQ subspaces; must divide `dimensions`.
+            pq_iterations (int): k-means iterations when training PQ codebooks.
+            full_precision_path (str): File backing the full-precision vectors.
+                                       A temporary file is used when omitted.
+            seed (int): Seed for PQ codebook training.
+        """
+        if storage not in self.STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode '{storage}'. Expected one of {self.STORAGE_MODES}.")
+        if storage == "pq" and dimensions % pq_subspaces != 0:
+            raise ValueError(f"pq_subspaces ({pq_subspaces}) must divide dimensions ({dimensions}).")
+
+        self.dimensions = dimensions
+        self.storage = storage
+        self.rescore_factor = max(1, rescore_factor)
+        self.pq_subspaces = pq_subspaces
+        self.pq_iterations = pq_iterations
+        self.seed = seed
+
+        self.ids: List = []
+        self._codes = np.empty((0, dimensions), dtype=self._code_dtype())
+        self._scales = np.empty(0, dtype=np.float32)
+        self._codebooks: Optional[np.ndarray] = None  # [subspaces, 256, sub_dim]
+
+        # Full-precision vectors are appended to disk and memory-mapped on demand.
+        self._full_path = None
+        self._owns_full_path = full_precision_path is None
+        self._full_view: Optional[np.ndarray] = None
+        if storage != "float32":
+            if full_precision_path is None:
+                fd, full_precision_path = tempfile.mkstemp(prefix="vectors_", suffix=".f32")
+                os.close(fd)
+            self._full_path = full_precision_path
+            open(self._full_path, "wb").close()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _code_dtype(self):
+        return {"float32": np.float32, "float16": np.float16, "int8": np.int8, "pq": np.uint8}[self.storage]
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add(self, ids: Sequence, vectors: np.ndarray) -> None:
+        """
+        Add vectors to the index.
+
+        Args:
+            ids (Sequence): Identifiers returned by `search`, one per vector.
+            vectors (np.ndarray): Array of shape [n, dimensions].
+        """
+        vectors = self._normalize(vectors)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors must have the same length.")
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dim vectors, got {vectors.shape[1]}.")
+
+        if self.storage == "float32":
+            codes = vectors
+        elif self.storage == "float16":
+            codes = vectors.astype(np.float16)
+        elif self.storage == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales = np.concatenate([self._scales, scales.astype(np.float32)])
+        else:
+            if self._codebooks is None:
+                self._train_pq(vectors)
+            codes = self._encode_pq(vectors)
+
+        self._codes = np.concatenate([self._codes, codes]) if len(self._codes) else codes
+        self.ids.extend(ids)
+
+        if self._full_path:
+            with open(self._full_path, "ab") as f:
+                f.write(vectors.tobytes())
+            self._full_view = None
+
+    def _train_pq(self, vectors: np.ndarray) -> None:
+        """Train one 256-centroid k-means codebook per subspace."""
+        rng = np.random.default_rng(self.seed)
+        sub_dim = self.dimensions // self.pq_subspaces
+        centroids = min(256, len(vectors))
+        sample = vectors[rng.choice(len(vectors), size=min(len(vectors), 20000), replace=False)]
+        codebooks = np.zeros((self.pq_subspaces, 256, sub_dim), dtype=np.float32)
+
+        for m in range(self.pq_subspaces):
+            sub = sample[:, m * sub_dim:(m + 1) * sub_dim]
+            book = sub[rng.choice(len(sub), size=centroids, replace=False)].copy()
+            for _ in range(self.pq_iterations):
+                assign = self._nearest_centroid(sub, book)
+                sums = np.zeros_like(book)
+                np.add.at(sums, assign, sub)
+                counts = np.bincount(assign, minlength=centroids)
+                filled = counts > 0
+                book[filled] = sums[filled] / counts[filled, None]
+            codebooks[m, :centroids] = book
+            # Unused slots (tiny training sets) repeat the first centroid so they are never closer.
+            codebooks[m, centroids:] = book[0]
+        self._codebooks = codebooks
+
+    @staticmethod
+    def _nearest_centroid(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        dists = (points ** 2).sum(axis=1)[:, None] - 2 * points @ centroids.T + (centroids ** 2).sum(axis=1)[None, :]
+        return dists.argmin(axis=1)
+
+    def _encode_pq(self, vectors: np.ndarray) -> np.ndarray:
+        sub_dim = self.dimensions // self.pq_subspaces
+        codes = np.empty((len(vectors), self.pq_subspaces), dtype=np.uint8)
+        for m in range(self.pq_subspaces):
+            codes[:, m] = self._nearest_centroid(vectors[:, m * sub_dim:(m + 1) * sub_dim], self._codebooks[m])
+        return codes
+
+    def _full_vectors(self) -> np.ndarray:
+        if self.storage == "float32":
+            return self._codes
+        if self._full_view is None:
+            self._full_view = np.memmap(
+                self._full_path, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimensions)
+            )
+        return self._full_view
+
+    def _coarse_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Approximate similarity of every stored vector to every query: [n_queries, n_vectors]."""
+        if self.storage == "float32":
+            return queries @ self._codes.T
+        if self.storage in ("float16", "int8"):
+            # Decode in blocks so a query never materializes a full-precision copy of the index.
+            scores = np.empty((len(queries), len(self.ids)), dtype=np.float32)
+            for start in range(0, len(self.ids), self.DECODE_BLOCK):
+                block = self._codes[start:start + self.DECODE_BLOCK].astype(np.float32)
+                scores[:, start:start + len(block)] = queries @ block.T
+            if self.storage == "int8":
+                scores *= self._scales[None, :]
+            return scores
+
+        # Asymmetric distance computation: lookup table of query-subvector x centroid products.
+        sub_dim = self.dimensions // self.pq_subspaces
+        scores = np.zeros((len(queries), len(self.ids)), dtype=np.float32)
+        for m in range(self.pq_subspaces):
+            table = queries[:, m * sub_dim:(m + 1) * sub_dim] @ self._codebooks[m].T  # [q, 256]
+            scores += table[:, self._codes[:, m]]
+        return scores
+
+    def search_batch(self, queries: np.ndarray, k: int) -> Tuple[List[List], np.ndarray]:
+        """
+        Search many queries at once.
+
+        Args:
+            queries (np.ndarray): Array of shape [n_queries, dimensions].
+            k (int): Number of neighbours per query.
+
+        Returns:
+            Tuple[List[List], np.ndarray]: Neighbour ids per query and their cosine scores.
+        """
+        if not self.ids:
+            return [[] for _ in range(len(np.atleast_2d(queries)))], np.empty((0, 0), dtype=np.float32)
+
+        queries = self._normalize(queries)
+        k = min(k, len(self.ids))
+        coarse = self._coarse_scores(queries).astype(np.float32)
+
+        if self.storage == "float32":
+            candidates = self._top_k(coarse, k)
+            scores = np.take_along_axis(coarse, candidates, axis=1)
+        else:
+            n_candidates = min(len(self.ids), k * self.rescore_factor)
+            candidates = self._top_k(coarse, n_candidates)
+            full = self._full_vectors()
+            exact = np.empty(candidates.shape, dtype=np.float32)
+            for row, query in enumerate(queries):
+                rows = np.sort(candidates[row])  # sequential reads from the memory map
+                exact_row = full[rows] @ query
+                order = np.argsort(-exact_row)
+                candidates[row] = rows[order]
+                exact[row] = exact_row[order]
+            candidates, scores = candidates[:, :k], exact[:, :k]
+
+        return [[self.ids[i] for i in row] for row in candidates], scores
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        if k >= scores.shape[1]:
+            top = np.tile(np.arange(scores.shape[1]), (scores.shape[0], 1))
+        else:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        return np.take_along_axis(top, order, axis=1)
+
+    def search(self, query: np.ndarray, k: int = 3) -> List[Tuple[object, float]]:
+        """
+        Search a single query.
+
+        Returns:
+            List[Tuple[object, float]]: (id, cosine score) pairs, best first.
+        """
+        ids, scores = self.search_batch(np.atleast_2d(query), k)
+        return list(zip(ids[0], scores[0].tolist())) if ids and ids[0] else []
+
+    def memory_bytes(self) -> int:
+        """
+        Resident memory used by the searchable representation (codes, scales, codebooks).
+        The full-precision file is excluded as it is only paged in for rescoring.
+        """
+        total = self._codes.nbytes + self._scales.nbytes
+        if self._codebooks is not None:
+            total += self._codebooks.nbytes
+        return total
+
+    def close(self) -> None:
+        """Release the memory map and delete a temporary full-precision file."""
+        self._full_view = None
+        if self._full_path and self._owns_full_path:
+            try:
+                os.remove(self._full_path)
+            except OSError:
+                pass
@@ -0,0 +1,210 @@
+"""
+Module: work_queue.py
+Description: Bounded work queue between claim generation and verification. Producers are
+             admitted only while the number of claims in flight (emitted but not yet
+             verified) is below a high watermark (backpressure).
+"""
+
+import asyncio
+import collections
+import itertools
+import threading
+import time
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+
+class WorkQueue:
+    """
+    FIFO queue handled by a fixed number of async workers.
+
+    `submit(item)` queues an item and waits for `handler(item)`. At most `workers` items
+    are being handled at once; the rest wait in the queue.
+
+    Backpressure: a producer calls `admit(n)` before it emits `n` items (e.g. the claims
+    of a decomposed backstory). The items count as outstanding from then until a worker
+    has handled them, so items still travelling through the engine towards `submit` are
+    counted too. Once `high_watermark` items are outstanding, producers wait until the
+    count is down to `low_watermark` and are then admitted in arrival order. The number of
+    pending verification calls (and their prompts) is therefore bounded by the watermark
+    plus one producer's batch, however many rows arrive at once.
+
+    Usage:
+        queue = WorkQueue(verify, workers=32, high_watermark=1024)
+        await queue.admit(len(claims))   # producer, before emitting the claims
+        verdict = await queue.submit(item)
+        print(queue.report())
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[object], Awaitable[object]],
+        workers: int = 32,
+        high_watermark: int = 1024,
+        low_watermark: Optional[int] = None,
+    ):
+        """
+        Initialize the queue.
+
+        Args:
+            handler: Async callable handling one item; its result is returned by `submit`.
+            workers (int): Items handled concurrently.
+            high_watermark (int): Outstanding items at which producers are held back.
+            low_watermark (int): Outstanding items at which held producers resume
+                                 (defaults to half the high watermark).
+        """
+        self.handler = handler
+        self.workers = workers
+        self.high_watermark = high_watermark
+        self.low_watermark = high_watermark // 2 if low_watermark is None else low_watermark
+
+        self._items: Deque[tuple] = collections.deque()  # (ticket, enqueued_at, item)
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._tickets = itertools.count()
+        self._idle: List[asyncio.Future] = []  # workers waiting for an item
+        self._producers: Deque[tuple] = collections.deque()  # (future, count) held back
+        self._holding = False  # between reaching the high and the low watermark
+        self._lock = threading.Lock()  # producers may run on another event loop
+        self._tasks: List[asyncio.Task] = []
+
+        self.outstanding = 0
+        self.in_progress = 0
+        self.completed = 0
+        self.max_depth = 0
+        self.max_outstanding = 0
+        self.backpressure_waits = 0
+        self.backpressure_s = 0.0
+        self._waits: Deque[float] = collections.deque(maxlen=1000)  # seconds queued, recent items
+
+    @property
+    def depth(self) -> int:
+        """Items waiting to be handled."""
+        return len(self._items)
+
+    def oldest_age_s(self) -> float:
+        """How long the oldest waiting item has been queued."""
+        return time.monotonic() - self._items[0][1] if self._items else 0.0
+
+    def close(self) -> None:
+        """Stop the workers."""
+        for task in self._tasks:
+            if not task.get_loop().is_closed():
+                task.cancel()
+        self._tasks = []
+
+    # -- producers ----------------------------------------------------------------------
+
+    async def admit(self, count: int = 1) -> None:
+        """Hold the caller until `count` more items fit; they are outstanding from now on."""
+        with self._lock:
+            if self.outstanding >= self.high_watermark:
+                self._holding = True
+            if not self._holding and not self._producers:
+                self._add_outstanding(count)
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._producers.append((future, count))
+            self.backpressure_waits += 1
+        start = time.monotonic()
+        try:
+            await future
+        finally:
+            self.backpressure_s += time.monotonic() - start
+
+    def _add_outstanding(self, count: int) -> None:
+        self.outstanding += count
+        self.max_outstanding = max(self.max_outstanding, self.outstanding)
+
+    def _settle(self) -> None:
+        """One item handled: admit held producers once the low watermark is reached."""
+        with self._lock:
+            # Items that were never admitted (e.g. re-audits) must not drive this negative
+            self.outstanding = max(0, self.outstanding - 1)
+            if self._holding and self.outstanding > self.low_watermark:
+                return
+            self._holding = False
+            while self._producers and self.outstanding < self.high_watermark:
+                future, count = self._producers.popleft()
+                self._add_outstanding(count)
+                future.get_loop().call_soon_threadsafe(_resolve, future)
+            if self._producers:
+                self._holding = True
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        loop = asyncio.get_running_loop()
+        if not self._tasks:
+            self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        ticket = next(self._tickets)
+        future = loop.create_future()
+        self._futures[ticket] = future
+        self._items.append((ticket, time.monotonic(), item))
+        self.max_depth = max(self.max_depth, self.depth)
+        while self._idle:
+            waiter = self._idle.pop()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+        return await future
+
+    # -- workers ------------------------------------------------------------------------
+
+    async def _next(self) -> tuple:
+        while not self._items:
+            waiter = asyncio.get_running_loop().create_future()
+            self._idle.append(waiter)
+            await waiter
+        return self._items.popleft()
+
+    async def _work(self) -> None:
+        while True:
+            ticket, enqueued, item = await self._next()
+            self._waits.append(time.monotonic() - enqueued)
+            future = self._futures.pop(ticket)
+            self.in_progress += 1
+            try:
+                result = await self.handler(item)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                self.in_progress -= 1
+                self.completed += 1
+                self._settle()
+
+    # -- metrics ------------------------------------------------------------------------
+
+    def metrics(self) -> dict:
+        """Queue depth and age figures."""
+        waits = sorted(self._waits)
+        return {
+            "depth": self.depth,
+            "outstanding": self.outstanding,
+            "in_progress": self.in_progress,
+            "completed": self.completed,
+            "max_depth": self.max_depth,
+            "max_outstanding": self.max_outstanding,
+            "held": len(self._producers),
+            "oldest_age_s": self.oldest_age_s(),
+            "p50_wait_s": waits[len(waits) // 2] if waits else 0.0,
+            "p95_wait_s": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+            "backpressure_waits": self.backpressure_waits,
+            "backpressure_s": self.backpressure_s,
+        }
+
+    def report(self) -> str:
+        m = self.metrics()
+        return (f"Verification queue - depth {m['depth']}, {m['outstanding']} outstanding, {m['in_progress']} in progress, "
+                f"{m['completed']} done; oldest {m['oldest_age_s']:.1f}s, wait p95 {m['p95_wait_s']:.1f}s; "
+                f"max depth {m['max_depth']}, max outstanding {m['max_outstanding']}; "
+                f"producers held {m['backpressure_waits']}x ({m['backpressure_s']:.0f}s), {m['held']} waiting")
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
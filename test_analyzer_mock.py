@@ -17,9 +17,8 @@ async def main():
     
     analyzer = BackstoryAnalyzer()
     
-    # We mock the internal _call_llm or litellm.acompletion
-    # Since we use litellm.acompletion in src/analyzer.py, we patch it here.
-    with patch("src.analyzer.acompletion") as mock_completion:
+    # We mock litellm.acompletion where the shared LLM client calls it.
+    with patch("src.llm_client.acompletion") as mock_completion:
         # Setup mock return value structure (resembling OpenAI/LiteLLM response)
         mock_response = AsyncMock()
         mock_response.choices = [AsyncMock()]